@@ -0,0 +1,51 @@
+import os
+import sys
+import timeit
+import tracemalloc
+sys.path.append('..')
+from src.content_provider.html_parsers import PARSERS, create_parser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'fixtures')
+PAGES = ["listing", "paper"]
+REPEAT = 20
+
+
+def load(page):
+    with open(os.path.join(FIXTURES, f"paperswithcode_{page}.html"), "rb") as file:
+        return file.read()
+
+
+def parse(parser, page, html):
+    if page == "listing":
+        return parser.parse_listing(html)
+    return parser.parse_paper(html)
+
+
+def run(parser, page, html):
+    elapsed = min(timeit.repeat(lambda: parse(parser, page, html), number=1, repeat=REPEAT))
+    tracemalloc.start()
+    parse(parser, page, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    pages = {page: load(page) for page in PAGES}
+    reference = create_parser("html.parser")
+    print(f"best of {REPEAT}, peak memory of one parse")
+    print(f"{'parser':>12} {'page':>8} {'size (KB)':>10} {'time (ms)':>10} {'peak (KB)':>10} {'same output':>12}")
+    for name in PARSERS:
+        try:
+            parser = create_parser(name)
+        except ImportError as error:
+            print(f"{name:>12} skipped: {error}")
+            continue
+        for page, html in pages.items():
+            elapsed, peak = run(parser, page, html)
+            same = parse(parser, page, html) == parse(reference, page, html)
+            print(f"{name:>12} {page:>8} {len(html) / 1024:>10.0f} {elapsed * 1000:>10.2f} {peak / 1024:>10.0f} {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
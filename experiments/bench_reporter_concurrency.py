@@ -0,0 +1,53 @@
+import logging
+import sys
+import tempfile
+import time
+sys.path.append('..')
+from src.content_provider.content_provider import ContentProvider
+from src.data_storage import DataStorage
+from src.fake_chain import FakeChain
+from src.reporter import Reporter
+
+PROVIDERS = 6
+ITEMS_PER_PROVIDER = 20
+FETCH_SECONDS = 0.5
+
+
+class SlowContentProvider(ContentProvider):
+    """Stands in for a site like PapersWithCode that takes a while to crawl."""
+
+    def __init__(self, index):
+        super().__init__()
+        self._index = index
+
+    def name(self):
+        return f"SlowContentProvider{self._index}"
+
+    def get_content(self):
+        time.sleep(FETCH_SECONDS)
+        return [{"paper": f"paper {self._index}-{i}"} for i in range(ITEMS_PER_PROVIDER)]
+
+
+def run(max_workers):
+    logger = logging.getLogger("bench_reporter_concurrency")
+    chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=lambda inputs: {"post": inputs["paper"]})
+    with tempfile.TemporaryDirectory() as folder:
+        with DataStorage(folder) as data_storage:
+            providers = [SlowContentProvider(i) for i in range(PROVIDERS)]
+            reporter = Reporter(providers, chain, logger, data_storage, max_workers=max_workers)
+            start = time.perf_counter()
+            reports = reporter.report()
+            elapsed = time.perf_counter() - start
+    return elapsed, len(reports)
+
+
+def main():
+    print(f"{PROVIDERS} providers, {FETCH_SECONDS}s fetch each, {ITEMS_PER_PROVIDER} items each")
+    print(f"{'max_workers':>12} {'wall clock (s)':>15} {'reports':>8}")
+    for max_workers in [1, 2, 4, PROVIDERS]:
+        elapsed, count = run(max_workers)
+        print(f"{max_workers:>12} {elapsed:>15.2f} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
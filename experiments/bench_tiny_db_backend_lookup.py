@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import timeit
+sys.path.append('..')
+from tinydb import Query
+from src.tiny_db_backend import TinyDBBackend
+
+STORE_SIZES = [100, 1000, 10000, 30000]
+LOOKUPS = 200
+
+
+def fill(path, size):
+    db = TinyDBBackend(path)
+    db.db.insert_multiple(
+        {'id': f'id{i}', 'type': 'post', 'content': f'Content {i}', 'timestamp': 1000 + i}
+        for i in range(size)
+    )
+
+
+def main():
+    print(f"{'stored':>8} {'open (s)':>10} {'scan exists (ms)':>18} {'index exists (ms)':>18} {'index get_one (ms)':>19}")
+    with tempfile.TemporaryDirectory() as folder:
+        for size in STORE_SIZES:
+            path = os.path.join(folder, f"bench_{size}.json")
+            fill(path, size)
+
+            start = timeit.default_timer()
+            db = TinyDBBackend(path)
+            open_time = timeit.default_timer() - start
+
+            identifiers = [f'id{(i * 7919) % size}' for i in range(LOOKUPS)]
+            # Linear scan, which is what every lookup cost before the id index.
+            scan = timeit.timeit(lambda: [bool(db.db.search(Query().id == i)) for i in identifiers], number=1)
+            exists = timeit.timeit(lambda: [db.exists(i) for i in identifiers], number=1)
+            get_one = timeit.timeit(lambda: [db.get_one(i) for i in identifiers], number=1)
+
+            print(f"{size:>8} {open_time:>10.3f} {scan / LOOKUPS * 1000:>18.4f} "
+                  f"{exists / LOOKUPS * 1000:>18.4f} {get_one / LOOKUPS * 1000:>19.4f}")
+            db.db.close()
+
+
+if __name__ == "__main__":
+    main()
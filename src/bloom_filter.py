@@ -0,0 +1,68 @@
+import hashlib
+import json
+import math
+import os
+from typing import Iterable
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false positive rate.
+
+    ``item in bloom_filter`` being False means the item was never added. True
+    means it probably was, and has to be confirmed against the exact store.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01) -> None:
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("capacity must be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position // 8] |= 1 << (position % 8)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+
+    def save(self, path: str, metadata: dict = None) -> None:
+        header = {"capacity": self.capacity, "error_rate": self.error_rate, "count": self.count, "metadata": metadata}
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(json.dumps(header, sort_keys=True).encode() + b"\n")
+            file.write(self._bits)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Return the filter stored at path and the metadata saved with it."""
+        with open(path, "rb") as file:
+            header = json.loads(file.readline())
+            bits = file.read()
+        bloom_filter = cls(header["capacity"], header["error_rate"])
+        if len(bits) != len(bloom_filter._bits):
+            raise ValueError(f"Corrupted bloom filter file {path}")
+        bloom_filter._bits = bytearray(bits)
+        bloom_filter.count = header["count"]
+        return bloom_filter, header["metadata"]
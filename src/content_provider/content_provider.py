@@ -1,7 +1,67 @@
+import asyncio
+import threading
+class StopAfterKnown:
+    # Stop predicate for get_content_iter(): true once count listed contents in
+    # a row are already stored, i.e. the listing reached what we reported before.
+    def __init__(self, count):
+        if not isinstance(count, int) or count < 1:
+            raise ValueError("count must be a positive integer")
+        self._count = count
+        self._known_in_a_row = 0
+    def __call__(self, key, known):
+        self._known_in_a_row = self._known_in_a_row + 1 if known else 0
+        return self._known_in_a_row >= self._count
 class ContentProvider:
-    def __init__(self):
-        pass
+    def __init__(self, http_cache=None):
+        self._http_cache = http_cache
     def name(self):
         pass
     def get_content(self):
         pass
+    async def aget_content(self):
+        # Providers without a native async implementation run in a worker thread.
+        return await asyncio.to_thread(self.get_content)
+    def get_content_iter(self, stop=None):
+        # Yields contents one at a time. stop(key, known) is asked about every
+        # listed content, in order, and ends the listing once it returns True.
+        # Providers with a paginated listing override this to fetch it lazily.
+        for content in self.get_content():
+            key = self.content_key(content)
+            if stop is not None and stop(key, key is not None and self.is_known(key)):
+                return
+            yield content
+    async def aget_content_iter(self, stop=None):
+        # Every step of the blocking iterator runs in a worker thread; the lock
+        # keeps a close after a cancelled step from racing that step.
+        iterator = self.get_content_iter(stop)
+        lock = threading.Lock()
+        end = object()
+        def step():
+            with lock:
+                return next(iterator, end)
+        def close():
+            with lock:
+                iterator.close()
+        try:
+            while True:
+                content = await asyncio.to_thread(step)
+                if content is end:
+                    return
+                yield content
+        finally:
+            await asyncio.to_thread(close)
+    def set_known_keys(self, known_keys):
+        # known_keys(key) -> bool tells whether content with that key is already stored.
+        self._known_keys = known_keys
+    def is_known(self, key):
+        known_keys = getattr(self, '_known_keys', None)
+        return known_keys is not None and known_keys(key)
+    def content_key(self, content):
+        # Key of a content that can be read from a listing before fetching any
+        # details; None when the provider has no such key.
+        return None
+    def http_get(self, session, url, **kwargs):
+        # Providers fetch through here so a shared HTTPCache can answer instead.
+        if getattr(self, '_http_cache', None) is None:
+            return session.get(url, **kwargs)
+        return self._http_cache.get(session, url, **kwargs)
@@ -0,0 +1,280 @@
+from bs4 import BeautifulSoup, FeatureNotFound
+from html.parser import HTMLParser
+from typing import Dict, List, Tuple
+try:
+    from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+except ImportError:
+    SelectolaxHTMLParser = None
+
+# Parsers for the two PapersWithCode pages. parse_listing() returns one card per
+# paper with the fields read from the front page, parse_paper() the abstract and
+# arXiv URL of a paper page. Every parser must give exactly the same output.
+
+LISTING_CARDS = ".infinite-container .row.infinite-item.item.paper-card"
+
+
+def _media(style: str) -> str:
+    return style.split("('")[1].split("')")[0]
+
+
+def _stars(text: str) -> int:
+    return int(text.split(" ")[0].replace(",", ""))
+
+
+def _is_arxiv_link(css_class: str) -> bool:
+    # BeautifulSoup matches class_="badge badge-light" against the normalised
+    # class list, so stray whitespace in the attribute must not matter.
+    return " ".join((css_class or "").split()) == "badge badge-light"
+
+
+class BeautifulSoupParser:
+    def __init__(self, features: str = "html.parser") -> None:
+        try:
+            BeautifulSoup("", features)
+        except FeatureNotFound:
+            raise ImportError(f"The {features} parser is not installed")
+        self._features = features
+
+    def parse_listing(self, html: bytes) -> List[Dict]:
+        soup = BeautifulSoup(html, self._features)
+        cards = []
+        for row in soup.select(LISTING_CARDS):
+            cards.append({
+                "uid": row.select_one("h1 a")["href"],
+                "title": row.select_one("h1 a").get_text(strip=True),
+                "subtitle": row.select_one(".item-strip-abstract").get_text(strip=True),
+                "media": _media(row.select_one(".item-image")["style"]),
+                "tags": [a.get_text(strip=True) for a in row.select(".badge-primary a")],
+                "stars": _stars(row.select_one(".entity-stars .badge").get_text(strip=True)),
+                "github_link": row.select_one(".item-github-link a")["href"],
+            })
+        return cards
+
+    def parse_paper(self, html: bytes) -> Tuple[str, str]:
+        soup = BeautifulSoup(html, self._features)
+        paper_abstract_div = soup.select_one(".paper-abstract")
+        abstract = paper_abstract_div.find("p").text.strip()
+        arxiv_url = paper_abstract_div.find("a", class_="badge badge-light")["href"]
+        return abstract, arxiv_url
+
+
+class SelectolaxParser:
+    def __init__(self) -> None:
+        if SelectolaxHTMLParser is None:
+            raise ImportError("selectolax is not installed")
+
+    @staticmethod
+    def _text(node) -> str:
+        return node.text(deep=True, separator="", strip=True)
+
+    def parse_listing(self, html: bytes) -> List[Dict]:
+        tree = SelectolaxHTMLParser(html)
+        cards = []
+        for row in tree.css(LISTING_CARDS):
+            link = row.css_first("h1 a")
+            cards.append({
+                "uid": link.attributes["href"],
+                "title": self._text(link),
+                "subtitle": self._text(row.css_first(".item-strip-abstract")),
+                "media": _media(row.css_first(".item-image").attributes["style"]),
+                "tags": [self._text(a) for a in row.css(".badge-primary a")],
+                "stars": _stars(self._text(row.css_first(".entity-stars .badge"))),
+                "github_link": row.css_first(".item-github-link a").attributes["href"],
+            })
+        return cards
+
+    def parse_paper(self, html: bytes) -> Tuple[str, str]:
+        paper_abstract_div = SelectolaxHTMLParser(html).css_first(".paper-abstract")
+        abstract = paper_abstract_div.css_first("p").text(deep=True).strip()
+        arxiv_url = next(a.attributes["href"] for a in paper_abstract_div.css("a") if _is_arxiv_link(a.attributes.get("class")))
+        return abstract, arxiv_url
+
+
+class _Extractor(HTMLParser):
+    """Tracks the open elements and the text of the ones being captured."""
+
+    VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        # Open elements as [tag, classes, captured text pieces or None, field or None].
+        self.stack = []
+        self.done = False
+        # A text node cut by a chunk boundary arrives in several calls.
+        self._in_text = False
+
+    def has_ancestor(self, css_class: str) -> bool:
+        return any(css_class in classes for _, classes, _, _ in self.stack)
+
+    def handle_starttag(self, tag, attrs):
+        self._in_text = False
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+        element = [tag, classes, None, None]
+        self.start(tag, classes, attrs, element)
+        if tag not in self.VOID_ELEMENTS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self._in_text = False
+        attrs = dict(attrs)
+        self.start(tag, set((attrs.get("class") or "").split()), attrs, [tag, set(), None, None])
+
+    def handle_endtag(self, tag):
+        self._in_text = False
+        # Tolerates unclosed children the way browsers do.
+        if not any(open_tag == tag for open_tag, _, _, _ in self.stack):
+            return
+        while self.stack:
+            element = self.stack.pop()
+            self.end(element)
+            if element[0] == tag:
+                break
+
+    def handle_data(self, data):
+        for _, _, pieces, _ in self.stack:
+            if pieces is not None:
+                if self._in_text and pieces:
+                    pieces[-1] += data
+                else:
+                    pieces.append(data)
+        self._in_text = True
+
+    def start(self, tag, classes, attrs, element):
+        pass
+
+    def end(self, element):
+        pass
+
+
+class _ListingExtractor(_Extractor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.cards = []
+        self.card = None
+
+    def _in_container(self) -> bool:
+        return self.has_ancestor("infinite-container")
+
+    def start(self, tag, classes, attrs, element):
+        if self.card is None:
+            if {"row", "infinite-item", "item", "paper-card"} <= classes and self._in_container():
+                self.card = {"tags": []}
+                element[3] = "card"
+            return
+        card = self.card
+        if tag == "a" and "uid" not in card and any(open_tag == "h1" for open_tag, _, _, _ in self.stack):
+            card["uid"] = attrs.get("href")
+            element[2] = []
+            element[3] = "title"
+        elif "item-strip-abstract" in classes and "subtitle" not in card:
+            element[2] = []
+            element[3] = "subtitle"
+        elif "item-image" in classes and "media" not in card:
+            card["media"] = _media(attrs.get("style"))
+        elif tag == "a" and self.has_ancestor("badge-primary"):
+            element[2] = []
+            element[3] = "tags"
+        elif "badge" in classes and "stars" not in card and self.has_ancestor("entity-stars"):
+            element[2] = []
+            element[3] = "stars"
+        elif tag == "a" and "github_link" not in card and self.has_ancestor("item-github-link"):
+            card["github_link"] = attrs.get("href")
+
+    def end(self, element):
+        field = element[3]
+        if field == "card":
+            card = self.card
+            self.cards.append({field: card[field] for field in ["uid", "title", "subtitle", "media", "tags", "stars", "github_link"]})
+            self.card = None
+        elif field is not None and self.card is not None:
+            text = "".join(piece.strip() for piece in element[2])
+            if field == "tags":
+                self.card["tags"].append(text)
+            elif field == "stars":
+                self.card["stars"] = _stars(text)
+            else:
+                self.card[field] = text
+        if "infinite-container" in element[1]:
+            self.done = True
+
+
+class _PaperExtractor(_Extractor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.abstract = None
+        self.arxiv_url = None
+        self.in_abstract_div = False
+
+    def start(self, tag, classes, attrs, element):
+        if not self.in_abstract_div:
+            if "paper-abstract" in classes:
+                self.in_abstract_div = True
+                element[3] = "div"
+            return
+        if tag == "p" and self.abstract is None:
+            element[2] = []
+            element[3] = "p"
+        elif tag == "a" and self.arxiv_url is None and _is_arxiv_link(attrs.get("class")):
+            self.arxiv_url = attrs.get("href")
+            self._check_done()
+
+    def end(self, element):
+        field = element[3]
+        if field == "p" and self.abstract is None:
+            self.abstract = "".join(element[2]).strip()
+            self._check_done()
+        elif field == "div":
+            self.done = True
+
+    def _check_done(self) -> None:
+        if self.abstract is not None and self.arxiv_url is not None:
+            self.done = True
+
+
+class StreamingParser:
+    """Event-based extractor on the standard library HTMLParser.
+
+    It builds no tree, keeps only the fields it needs and stops reading as soon
+    as it has them: after the card container on the listing, after the abstract
+    and the arXiv link on a paper page.
+    """
+
+    def __init__(self, chunk_size: int = 16384) -> None:
+        self._chunk_size = chunk_size
+
+    def _run(self, extractor: _Extractor, html: bytes) -> None:
+        text = html.decode("utf-8", errors="replace") if isinstance(html, bytes) else html
+        for start in range(0, len(text), self._chunk_size):
+            extractor.feed(text[start:start + self._chunk_size])
+            if extractor.done:
+                return
+        extractor.close()
+        while extractor.stack:
+            extractor.end(extractor.stack.pop())
+
+    def parse_listing(self, html: bytes) -> List[Dict]:
+        extractor = _ListingExtractor()
+        self._run(extractor, html)
+        return extractor.cards
+
+    def parse_paper(self, html: bytes) -> Tuple[str, str]:
+        extractor = _PaperExtractor()
+        self._run(extractor, html)
+        if extractor.abstract is None or extractor.arxiv_url is None:
+            raise ValueError("Paper page without an abstract or an arXiv link")
+        return extractor.abstract, extractor.arxiv_url
+
+
+PARSERS = {
+    "html.parser": lambda: BeautifulSoupParser("html.parser"),
+    "lxml": lambda: BeautifulSoupParser("lxml"),
+    "selectolax": SelectolaxParser,
+    "stream": StreamingParser,
+}
+
+
+def create_parser(name: str):
+    if name not in PARSERS:
+        raise ValueError(f"parser must be one of {list(PARSERS)}")
+    return PARSERS[name]()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import List, Tuple
+import requests
+from requests.structures import CaseInsensitiveDict
+from src.metrics import metrics
+
+class HTTPCache:
+    """On-disk cache of GET responses shared by the content providers.
+
+    A response younger than the TTL of the first pattern matching its URL is
+    served from disk without any request. An older one is revalidated with
+    If-None-Match/If-Modified-Since, and a 304 refreshes it for another TTL.
+    URLs matching no pattern get a TTL of 0, so they are always revalidated.
+    For example ``[(r"/paper/", 7 * 24 * 3600)]`` keeps paper pages for a week
+    while the front page is checked on every run.
+
+    Each entry is a ``.body`` file plus a ``.json`` file with its validators.
+    Once the bodies take more than max_bytes, the least recently used entries
+    are removed.
+    """
+
+    def __init__(self, folder: str, ttls: List[Tuple[str, float]] = None, max_bytes: int = 100 * 1024 * 1024) -> None:
+        if not isinstance(folder, str) or not folder:
+            raise ValueError("folder must be a non empty string")
+        if not isinstance(max_bytes, int) or max_bytes < 1:
+            raise ValueError("max_bytes must be a positive integer")
+        self._folder = folder
+        self._ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls or [])]
+        self._max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        os.makedirs(self._folder, exist_ok=True)
+
+    def ttl(self, url: str) -> float:
+        return next((ttl for pattern, ttl in self._ttls if pattern.search(url)), 0)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self._folder, key + ".json"), os.path.join(self._folder, key + ".body")
+
+    def _load(self, url: str):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as file:
+                entry = json.load(file)
+            with open(body_path, "rb") as file:
+                body = file.read()
+        except (FileNotFoundError, ValueError):
+            return None, None
+        if entry.get("url") != url or entry.get("size") != len(body):
+            return None, None
+        return entry, body
+
+    def _write(self, path: str, data: bytes) -> None:
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+
+    def _store(self, url: str, entry: dict, body: bytes = None) -> None:
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            if self._size is None:
+                self._size = self._stored_size()
+            if body is not None:
+                old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+                self._write(body_path, body)
+                self._size += len(body) - old_size
+            self._write(meta_path, json.dumps(entry).encode())
+            if self._size > self._max_bytes:
+                self._evict()
+
+    def _touch(self, url: str) -> None:
+        # Eviction goes by the mtime of the .json file.
+        try:
+            os.utime(self._paths(url)[0])
+        except FileNotFoundError:
+            pass
+
+    def _stored_size(self) -> int:
+        return sum(os.path.getsize(os.path.join(self._folder, name)) for name in os.listdir(self._folder) if name.endswith(".body"))
+
+    def _evict(self) -> None:
+        # Least recently used first, down to 90% of the limit so this doesn't
+        # run again on the next store.
+        entries = []
+        for name in os.listdir(self._folder):
+            if name.endswith(".json"):
+                meta_path = os.path.join(self._folder, name)
+                body_path = meta_path[:-len(".json")] + ".body"
+                try:
+                    entries.append((os.path.getmtime(meta_path), meta_path, body_path, os.path.getsize(body_path)))
+                except FileNotFoundError:
+                    pass
+        entries.sort()
+        for _, meta_path, body_path, size in entries:
+            if self._size <= self._max_bytes * 0.9:
+                break
+            for path in [meta_path, body_path]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._size -= size
+
+    def _response(self, url: str, entry: dict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = entry.get("encoding")
+        return response
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            setattr(self, result, getattr(self, result) + 1)
+        metrics.increment("http_cache_total", result=result)
+
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        entry, body = self._load(url)
+        if entry is not None and time.time() - entry["stored_at"] < self.ttl(url):
+            self._count("hits")
+            self._touch(url)
+            return self._response(url, entry, body)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = session.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidations")
+            entry["stored_at"] = time.time()
+            self._store(url, entry)
+            return self._response(url, entry, body)
+
+        self._count("misses")
+        if response.status_code == 200:
+            headers = {name: value for name, value in response.headers.items() if name.lower() in ("content-type", "etag", "last-modified")}
+            entry = {"url": url, "stored_at": time.time(), "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"), "headers": headers, "encoding": response.encoding, "size": len(response.content)}
+            self._store(url, entry, response.content)
+        return response
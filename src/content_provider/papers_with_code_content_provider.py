@@ -1,69 +1,164 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import itertools
 import json
 from src.content_provider.content_provider import ContentProvider
+from src.content_provider.http_cache import HTTPCache
+from src.content_provider.html_parsers import create_parser
+from src.metrics import metrics
 class PapersWithCodeContentProvider(ContentProvider):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, base_url: str = "https://paperswithcode.com", max_concurrent_requests: int = 8, timeout: float = 10, http_cache: HTTPCache = None, parser: str = "html.parser", max_pages: int = 10):
+        super().__init__(http_cache)
+        if http_cache is not None and not isinstance(http_cache, HTTPCache):
+            raise TypeError("http_cache must be an instance of HTTPCache")
+        if not isinstance(max_concurrent_requests, int) or max_concurrent_requests < 1:
+            raise ValueError("max_concurrent_requests must be a positive integer")
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError("timeout must be a positive number")
+        if max_pages is not None and (not isinstance(max_pages, int) or max_pages < 1):
+            raise ValueError("max_pages must be a positive integer or None")
+        # "html.parser", "lxml", "selectolax" or "stream"; see html_parsers.
+        self._parser = create_parser(parser)
+        self._base_url = base_url.rstrip("/")
+        self._max_concurrent_requests = max_concurrent_requests
+        self._timeout = timeout
+        # Listing pages get_content_iter() walks at most; None walks all of them.
+        self._max_pages = max_pages
+        # One keep-alive session for the listing and every detail page, with a
+        # connection pool big enough for all the concurrent detail requests.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent_requests)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
 
     def name(self):
         return "PapersWithCodeContentProvider"
     def get_content(self):
-        response = requests.get("https://paperswithcode.com/")
-        
+        response = self.get_listing()
+        result = self.get_papers(response)
+
+        return result
+
+    async def aget_content(self):
+        response = await asyncio.to_thread(self.get_listing)
+
+        return await self.aget_papers(response)
+
+    def get_content_iter(self, stop=None):
+        # Listing pages are fetched one at a time, only when the previous one is
+        # used up; the detail pages of a listing page are fetched concurrently.
+        pages = itertools.count(1) if self._max_pages is None else range(1, self._max_pages + 1)
+        # New papers push the listing down while we walk it, so a paper can show
+        # up again at the top of the next page.
+        seen = set()
+        for page in pages:
+            response = self.get_listing(page)
+            rows = self.parse_rows(response) if response is not None else []
+            # A page with nothing we haven't seen is the end of the listing too:
+            # some sites serve the last page again for any page past it.
+            if all(row["uid"] in seen for row in rows):
+                return
+            new_rows = []
+            stopped = False
+            for row in rows:
+                if row["uid"] in seen:
+                    continue
+                seen.add(row["uid"])
+                known = self.is_known(row["uid"])
+                if stop is not None and stop(row["uid"], known):
+                    stopped = True
+                    break
+                if not known:
+                    new_rows.append(row)
+                else:
+                    metrics.increment("provider_known_skipped_total", provider=self.name())
+            with ThreadPoolExecutor(max_workers=self._max_concurrent_requests) as executor:
+                yield from executor.map(self.extract_paper_info, new_rows)
+            if stopped:
+                return
+
+    def get_listing(self, page=1):
+        # The front page is page 1 of the listing; a missing later page means we
+        # are past its end and gives None.
+        url = self._base_url + "/" if page == 1 else f"{self._base_url}/?page={page}"
+        with metrics.timer("provider_http_seconds", provider=self.name(), page="listing"):
+            response = self.http_get(self._session, url, timeout=self._timeout)
+
+        if page > 1 and response.status_code == 404:
+            return None
         if response.status_code != 200:
+            metrics.increment("provider_http_errors_total", provider=self.name(), page="listing")
             raise requests.exceptions.HTTPError(f"Error getting content with status code: {response.status_code}")
-        
+        return response
 
-        result = self.get_papers(response)
+    def parse_rows(self, response):
+        with metrics.timer("provider_parse_seconds", provider=self.name(), page="listing"):
+            return self._parser.parse_listing(response.content)
 
-        return result
+    def get_rows(self, response):
+        rows = self.parse_rows(response)
+        # Papers already stored don't need their detail page fetched again.
+        new_rows = [row for row in rows if not self.is_known(row["uid"])]
+        metrics.increment("provider_known_skipped_total", len(rows) - len(new_rows), provider=self.name())
+        return new_rows
 
-    def get_papers(self, response):
-        result = []
+    def content_key(self, content):
+        try:
+            paper = json.loads(content["paper"])
+            uid = paper["uid"]
+        except (KeyError, TypeError, ValueError):
+            return None
+        # A paper whose detail page failed has neither an abstract nor an arXiv
+        # link; leaving it without a key gets its detail page fetched next time.
+        if not paper.get("abstract") and not paper.get("arxiv_url"):
+            return None
+        return uid
 
-        soup = BeautifulSoup(response.content, "html.parser")
-        for row in soup.select(".infinite-container .row.infinite-item.item.paper-card"):
-            paper_dict = self.extract_paper_info(row)
+    async def aget_papers(self, response):
+        rows = self.get_rows(response)
+        slots = asyncio.Semaphore(self._max_concurrent_requests)
 
-            
-            result.append(paper_dict)
-        return result
+        async def extract(row):
+            async with slots:
+                return await asyncio.to_thread(self.extract_paper_info, row)
+
+        return list(await asyncio.gather(*(extract(row) for row in rows)))
+
+    def get_papers(self, response):
+        rows = self.get_rows(response)
+        # Detail pages are fetched concurrently; map keeps them in page order.
+        with ThreadPoolExecutor(max_workers=self._max_concurrent_requests) as executor:
+            return list(executor.map(self.extract_paper_info, rows))
 
     def extract_paper_info(self, row):
-        uid = row.select_one("h1 a")["href"]
-        response = requests.get(f"https://paperswithcode.com{uid}")
+        uid = row["uid"]
+        try:
+            with metrics.timer("provider_http_seconds", provider=self.name(), page="detail"):
+                response = self.http_get(self._session, f"{self._base_url}{uid}", timeout=self._timeout)
+        except requests.exceptions.RequestException:
+            # A slow or unreachable paper page costs its abstract, not the whole listing.
+            response = None
         
 
-        if response.status_code == 200:
+        if response is not None and response.status_code == 200:
             
         
-            soup = BeautifulSoup(response.content, "html.parser")
-            paper_abstract_div = soup.select_one(".paper-abstract")
-            # Extract the abstract
-            abstract = paper_abstract_div.find("p").text.strip()
-            # Extract the arXiv URL
-            arxiv_url = paper_abstract_div.find("a", class_="badge badge-light")["href"]
+            with metrics.timer("provider_parse_seconds", provider=self.name(), page="detail"):
+                abstract, arxiv_url = self._parser.parse_paper(response.content)
         else:
+            metrics.increment("provider_http_errors_total", provider=self.name(), page="detail")
             abstract = ""
             arxiv_url = ""
         
         paper_dict = {
-                "title": row.select_one("h1 a").get_text(strip=True),
-                "subtitle": row.select_one(".item-strip-abstract").get_text(strip=True),
-                "media": row.select_one(".item-image")["style"]
-                .split("('")[1]
-                .split("')")[0],
-                "tags": [
-                    a.get_text(strip=True) for a in row.select(".badge-primary a")
-                ],
-                "stars": int(
-                    row.select_one(".entity-stars .badge")
-                    .get_text(strip=True)
-                    .split(" ")[0]
-                    .replace(",", "")
-                ),
-                "github_link": row.select_one(".item-github-link a")["href"],
+                "title": row["title"],
+                "subtitle": row["subtitle"],
+                "media": row["media"],
+                "tags": row["tags"],
+                "stars": row["stars"],
+                "github_link": row["github_link"],
                 "uid": uid,
                 "abstract": abstract,
 			    "arxiv_url": arxiv_url
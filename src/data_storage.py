@@ -1,23 +1,275 @@
 from src.content_provider.content_provider import ContentProvider
 from src.tiny_db_backend import TinyDBBackend
-from typing import List, Dict
+from src.sqlite_backend import SQLiteBackend
+from src.jsonl_backend import JsonLinesBackend
+from src.db_backend_interface import DatabaseBackend, file_signature
+from src.bloom_filter import BloomFilter
+from src.metrics import metrics
+from typing import Callable, List, Dict, Set, Tuple
+from collections import OrderedDict
 from datetime import datetime
+import asyncio
+import functools
 import os
+import re
 import glob
+import threading
 class DataStorage:
-    def __init__(self, folder: str) -> None:
+    # Backend class and storage file extension for each supported backend.
+    BACKENDS = {
+        "tinydb": (TinyDBBackend, ".json"),
+        "sqlite": (SQLiteBackend, ".sqlite3"),
+        "jsonl": (JsonLinesBackend, ".jsonl"),
+    }
+    # Shard key format for each sharding period. Keys sort chronologically.
+    SHARD_FORMATS = {
+        "year": "%Y",
+        "month": "%Y-%m",
+        "day": "%Y-%m-%d",
+    }
+
+    def __init__(self, folder: str, max_open_backends: int = 8, backend: str = "tinydb", shard_by: str = None, backend_options: Dict = None, id_filter: bool = False) -> None:
         if not isinstance(folder, str):
             raise TypeError("folder must be a string")
         
         if not folder:
             raise ValueError("folder must not be empty")
+
+        if not isinstance(max_open_backends, int) or max_open_backends < 1:
+            raise ValueError("max_open_backends must be a positive integer")
+
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {list(self.BACKENDS)}")
+
+        if shard_by is not None and shard_by not in self.SHARD_FORMATS:
+            raise ValueError(f"shard_by must be None or one of {list(self.SHARD_FORMATS)}")
+
+        if backend_options is not None and not isinstance(backend_options, dict):
+            raise TypeError("backend_options must be a dictionary")
         
+        self._shard_format = self.SHARD_FORMATS[shard_by] if shard_by is not None else None
+        # When sharding, id -> shard key for every stored report, per storage file name.
+        self._manifests: Dict[str, Dict[str, str]] = {}
+        # Manifest lines whose reports may still sit in a write-behind buffer.
+        self._pending_manifest_lines: Dict[str, List[str]] = {}
+        # Bloom filters over the stored ids, persisted next to each storage file,
+        # so a fresh process can rule out most new ids without opening the store.
+        self._id_filter = id_filter
+        self._id_filters: Dict[str, BloomFilter] = {}
+        self._unsaved_id_filters: Set[str] = set()
+        # Provider-side keys (e.g. a paper uid) of stored contents, so providers
+        # can skip fetching details for them. Persisted like the manifest.
+        self._known_keys: Dict[str, Set[str]] = {}
+        self._pending_known_key_lines: Dict[str, List[str]] = {}
+        self._backend_class, self._extension = self.BACKENDS[backend]
+        # Extra keyword arguments for the backend constructor, e.g. write_behind.
+        self._backend_options = backend_options or {}
+        self._max_open_backends = max_open_backends
+        # Open backends keyed by storage file name (plus shard), least recently
+        # used first, each with the storage file name that owns it.
+        self._backends: "OrderedDict[str, Tuple[str, DatabaseBackend]]" = OrderedDict()
+        # One lock per storage file name, so threads working on different
+        # provider files never wait for each other. _pool_lock only guards
+        # the pool bookkeeping itself.
+        self._locks: Dict[str, threading.RLock] = {}
+        self._pool_lock = threading.Lock()
+
         self._folder = folder
         if self._folder[-1] != "/":
             self._folder += "/"
         if not os.path.exists(self._folder):
             os.makedirs(self._folder)
 
+    def __enter__(self) -> "DataStorage":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _lock(self, storage_file_name: str) -> threading.RLock:
+        with self._pool_lock:
+            return self._locks.setdefault(storage_file_name, threading.RLock())
+
+    def _flush_storage_file(self, storage_file_name: str) -> None:
+        with self._lock(storage_file_name):
+            self._write_manifest_lines(storage_file_name)
+            self._write_known_key_lines(storage_file_name)
+            if storage_file_name in self._unsaved_id_filters:
+                self._save_id_filter(storage_file_name)
+
+    def flush(self) -> None:
+        with metrics.timer("storage_operation_seconds", operation="flush"):
+            with self._pool_lock:
+                backends = list(self._backends.values())
+            for storage_file_name, db in backends:
+                with self._lock(storage_file_name):
+                    db.flush()
+            for storage_file_name in set(self._pending_manifest_lines) | set(self._pending_known_key_lines) | self._unsaved_id_filters:
+                self._flush_storage_file(storage_file_name)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            backends = list(self._backends.values())
+            self._backends.clear()
+        for storage_file_name, db in backends:
+            with self._lock(storage_file_name):
+                db.close()
+        for storage_file_name in set(self._pending_manifest_lines) | set(self._pending_known_key_lines) | self._unsaved_id_filters:
+            self._flush_storage_file(storage_file_name)
+
+    def _evict_backends(self) -> None:
+        # Called with _pool_lock held. Backends whose storage file is being used
+        # by another thread are skipped, so the pool may briefly exceed its bound.
+        for key, (storage_file_name, db) in list(self._backends.items()):
+            if len(self._backends) < self._max_open_backends:
+                return
+            lock = self._locks[storage_file_name]
+            if lock.acquire(blocking=False):
+                try:
+                    del self._backends[key]
+                    db.close()
+                finally:
+                    lock.release()
+
+    def get_backend(self, storage_file_name: str, shard: str = None) -> DatabaseBackend:
+        key = storage_file_name if shard is None else f"{storage_file_name}.{shard}"
+        with self._lock(storage_file_name):
+            with self._pool_lock:
+                if key in self._backends:
+                    self._backends.move_to_end(key)
+                    return self._backends[key][1]
+                self._evict_backends()
+            db = self._backend_class(self._folder + key + self._extension, **self._backend_options)
+            with self._pool_lock:
+                self._backends[key] = (storage_file_name, db)
+            return db
+
+    def shard_key(self, timestamp: int) -> str:
+        return datetime.utcfromtimestamp(timestamp).strftime(self._shard_format)
+
+    def get_shards(self, storage_file_name: str) -> List[str]:
+        pattern = re.compile(re.escape(storage_file_name) + r"\.(\d{4}(?:-\d{2}){0,2})" + re.escape(self._extension) + "$")
+        shards = []
+        for path in glob.glob(glob.escape(self._folder + storage_file_name) + ".*" + self._extension):
+            match = pattern.match(os.path.basename(path))
+            if match:
+                shards.append(match.group(1))
+        return sorted(shards)
+
+    def _manifest_path(self, storage_file_name: str) -> str:
+        return self._folder + storage_file_name + ".ids"
+
+    def _get_manifest(self, storage_file_name: str) -> Dict[str, str]:
+        # The manifest is an append-only "<id>\t<shard key>" file, so dedup by id
+        # works across shards without opening any of them.
+        if storage_file_name not in self._manifests:
+            manifest = {}
+            if os.path.exists(self._manifest_path(storage_file_name)):
+                with open(self._manifest_path(storage_file_name), encoding="utf-8") as file:
+                    for line in file:
+                        identifier, _, shard = line.rstrip("\n").partition("\t")
+                        if shard:
+                            manifest[identifier] = shard
+            self._manifests[storage_file_name] = manifest
+        return self._manifests[storage_file_name]
+
+    def _store_signature(self, storage_file_name: str) -> List:
+        # Changes whenever the ids stored change. A sidecar saved with a
+        # different signature may have missed writes and is rebuilt.
+        if self._shard_format is not None:
+            return file_signature(self._manifest_path(storage_file_name))
+        return self._backend_class.signature(self._folder + storage_file_name + self._extension)
+
+    def _id_filter_path(self, storage_file_name: str) -> str:
+        return self._folder + storage_file_name + ".bloom"
+
+    def _get_id_filter(self, storage_file_name: str) -> BloomFilter:
+        if storage_file_name in self._id_filters:
+            return self._id_filters[storage_file_name]
+
+        bloom_filter = None
+        if os.path.exists(self._id_filter_path(storage_file_name)):
+            try:
+                bloom_filter, metadata = BloomFilter.load(self._id_filter_path(storage_file_name))
+            except ValueError:
+                metadata = None
+            if metadata != {"signature": self._store_signature(storage_file_name)}:
+                bloom_filter = None
+        if bloom_filter is None:
+            bloom_filter = self._build_id_filter(storage_file_name)
+        self._id_filters[storage_file_name] = bloom_filter
+        return bloom_filter
+
+    def _build_id_filter(self, storage_file_name: str) -> BloomFilter:
+        if self._shard_format is not None:
+            identifiers = list(self._get_manifest(storage_file_name))
+        elif storage_file_name in self._backends or self._store_signature(storage_file_name):
+            identifiers = [item["id"] for item in self.get_backend(storage_file_name).get()]
+        else:
+            identifiers = []
+        bloom_filter = BloomFilter(capacity=max(100000, 2 * len(identifiers)))
+        bloom_filter.update(identifiers)
+        self._unsaved_id_filters.add(storage_file_name)
+        return bloom_filter
+
+    def _save_id_filter(self, storage_file_name: str) -> None:
+        self._unsaved_id_filters.discard(storage_file_name)
+        bloom_filter = self._id_filters.get(storage_file_name)
+        if bloom_filter is not None:
+            bloom_filter.save(self._id_filter_path(storage_file_name), {"signature": self._store_signature(storage_file_name)})
+
+    def _add_to_id_filter(self, storage_file_name: str, identifiers: List[str]) -> None:
+        bloom_filter = self._get_id_filter(storage_file_name)
+        bloom_filter.update(identifiers)
+        if bloom_filter.is_full():
+            # Past its capacity the false positive rate climbs; rebuild bigger.
+            self._id_filters[storage_file_name] = self._build_id_filter(storage_file_name)
+        self._unsaved_id_filters.add(storage_file_name)
+        if not self._backend_options.get("write_behind", False):
+            self._save_id_filter(storage_file_name)
+
+    def _save_sharded_reports(self, storage_file_name: str, reports: List[Dict]) -> None:
+        manifest = self._get_manifest(storage_file_name)
+        shards: Dict[str, Dict[str, Dict]] = {}
+        for report in reports:
+            if report["id"] not in manifest:
+                shards.setdefault(self.shard_key(report["timestamp"]), {}).setdefault(report["id"], report)
+        for shard, shard_reports in shards.items():
+            db = self.get_backend(storage_file_name, shard)
+            db.upsert_many(list(shard_reports.values()))
+            lines = self._pending_manifest_lines.setdefault(storage_file_name, [])
+            for identifier in shard_reports:
+                manifest[identifier] = shard
+                lines.append(f"{identifier}\t{shard}\n")
+        # Ids only reach the manifest once their reports are on disk, so a crash
+        # can at worst make an id look new again, never lose a report.
+        if not self._backend_options.get("write_behind", False):
+            self._write_manifest_lines(storage_file_name)
+
+    def _write_manifest_lines(self, storage_file_name: str) -> None:
+        lines = self._pending_manifest_lines.pop(storage_file_name, [])
+        if lines:
+            with open(self._manifest_path(storage_file_name), "a", encoding="utf-8") as file:
+                file.write("".join(lines))
+
+    def _known_keys_path(self, storage_file_name: str) -> str:
+        return self._folder + storage_file_name + ".keys"
+
+    def _get_known_keys(self, storage_file_name: str) -> Set[str]:
+        if storage_file_name not in self._known_keys:
+            known_keys = set()
+            if os.path.exists(self._known_keys_path(storage_file_name)):
+                with open(self._known_keys_path(storage_file_name), encoding="utf-8") as file:
+                    known_keys.update(line.rstrip("\n") for line in file if line.endswith("\n"))
+            self._known_keys[storage_file_name] = known_keys
+        return self._known_keys[storage_file_name]
+
+    def _write_known_key_lines(self, storage_file_name: str) -> None:
+        lines = self._pending_known_key_lines.pop(storage_file_name, [])
+        if lines:
+            with open(self._known_keys_path(storage_file_name), "a", encoding="utf-8") as file:
+                file.write("".join(lines))
+
     def validate_timestamp(self, timestamp: int) -> None:
         try:
             datetime.utcfromtimestamp(timestamp)
@@ -29,6 +281,15 @@ class DataStorage:
             raise ValueError("ID must be a string")
         if not identifier:
             raise ValueError("ID must not be empty")
+
+    def validate_from_and_to_date(self, from_date, to_date):
+        if from_date is not None:
+            self.validate_timestamp(from_date)
+        if to_date is not None:
+            self.validate_timestamp(to_date)
+        if from_date is not None and to_date is not None:
+            if from_date > to_date:
+                raise ValueError("from_date must be less than to_date")
         
 
     def validate_item(self, item: Dict) -> None:
@@ -51,11 +312,19 @@ class DataStorage:
         
         if not reports:
             raise ValueError("reports must not be empty")
-        db = TinyDBBackend(self._folder + storage_file_name + ".json")
         for report in reports:
             self.validate_item(report)
-            if not db.exists(report["id"]):
-                db.insert(report)
+        with metrics.timer("storage_operation_seconds", operation="save_reports"), self._lock(storage_file_name):
+            if self._id_filter:
+                # Built before the write, so a rebuild doesn't double count the batch.
+                self._get_id_filter(storage_file_name)
+            if self._shard_format is not None:
+                self._save_sharded_reports(storage_file_name, reports)
+            else:
+                db = self.get_backend(storage_file_name)
+                db.upsert_many(reports)
+            if self._id_filter:
+                self._add_to_id_filter(storage_file_name, [report["id"] for report in reports])
 
     def exists(self, storage_file_name: str, identifier: str) -> bool:
         if not isinstance(storage_file_name, str):
@@ -64,5 +333,106 @@ class DataStorage:
         if not isinstance(identifier, str):
             raise ValueError("identifier must be a string")
         
-        db = TinyDBBackend(self._folder + storage_file_name + ".json")
-        return db.exists(identifier)
\ No newline at end of file
+        with metrics.timer("storage_operation_seconds", operation="exists"), self._lock(storage_file_name):
+            if self._id_filter:
+                self.validate_id(identifier)
+                if identifier not in self._get_id_filter(storage_file_name):
+                    return False
+            if self._shard_format is not None:
+                self.validate_id(identifier)
+                return identifier in self._get_manifest(storage_file_name)
+            db = self.get_backend(storage_file_name)
+            return db.exists(identifier)
+
+    def exists_many(self, storage_file_name: str, identifiers: List[str]) -> Set[str]:
+        if not isinstance(storage_file_name, str):
+            raise ValueError("content_provider must be a string")
+        
+        if not isinstance(identifiers, list) or not all(isinstance(identifier, str) for identifier in identifiers):
+            raise ValueError("identifiers must be a list of strings")
+        
+        with metrics.timer("storage_operation_seconds", operation="exists_many"), self._lock(storage_file_name):
+            if self._id_filter:
+                for identifier in identifiers:
+                    self.validate_id(identifier)
+                bloom_filter = self._get_id_filter(storage_file_name)
+                # Only possible hits need the exact check against the store.
+                candidates = [identifier for identifier in identifiers if identifier in bloom_filter]
+                metrics.increment("storage_id_filter_skipped_total", len(identifiers) - len(candidates))
+                identifiers = candidates
+                if not identifiers:
+                    return set()
+            if self._shard_format is not None:
+                for identifier in identifiers:
+                    self.validate_id(identifier)
+                manifest = self._get_manifest(storage_file_name)
+                return {identifier for identifier in identifiers if identifier in manifest}
+            db = self.get_backend(storage_file_name)
+            return db.exists_many(identifiers)
+
+    def get_by_date(self, storage_file_name: str, from_date: int = None, to_date: int = None) -> List[Dict]:
+        if not isinstance(storage_file_name, str):
+            raise ValueError("content_provider must be a string")
+        
+        self.validate_from_and_to_date(from_date, to_date)
+        with metrics.timer("storage_operation_seconds", operation="get_by_date"), self._lock(storage_file_name):
+            if self._shard_format is None:
+                db = self.get_backend(storage_file_name)
+                return db.get_by_date(from_date, to_date)
+
+            # Only shards whose period overlaps [from_date, to_date] are opened.
+            from_shard = self.shard_key(from_date) if from_date is not None else None
+            to_shard = self.shard_key(to_date) if to_date is not None else None
+            results = []
+            for shard in self.get_shards(storage_file_name):
+                if (from_shard is None or shard >= from_shard) and (to_shard is None or shard <= to_shard):
+                    db = self.get_backend(storage_file_name, shard)
+                    results.extend(db.get_by_date(from_date, to_date))
+            return results
+
+    def add_known_keys(self, storage_file_name: str, keys: List[str]) -> None:
+        if not isinstance(storage_file_name, str):
+            raise ValueError("content_provider must be a string")
+
+        if not isinstance(keys, list) or not all(isinstance(key, str) and key and "\n" not in key for key in keys):
+            raise ValueError("keys must be a list of non empty single line strings")
+
+        with self._lock(storage_file_name):
+            known_keys = self._get_known_keys(storage_file_name)
+            new_keys = [key for key in dict.fromkeys(keys) if key not in known_keys]
+            known_keys.update(new_keys)
+            self._pending_known_key_lines.setdefault(storage_file_name, []).extend(key + "\n" for key in new_keys)
+            # Same rule as the manifest: keys only hit the disk with their reports.
+            if not self._backend_options.get("write_behind", False):
+                self._write_known_key_lines(storage_file_name)
+
+    def is_known_key(self, storage_file_name: str, key: str) -> bool:
+        if not isinstance(storage_file_name, str):
+            raise ValueError("content_provider must be a string")
+
+        with self._lock(storage_file_name):
+            return key in self._get_known_keys(storage_file_name)
+
+    def known_keys(self, storage_file_name: str) -> Callable[[str], bool]:
+        """Oracle telling a provider whether a key of its contents is already stored."""
+        return functools.partial(self.is_known_key, storage_file_name)
+
+    # Async wrappers. Storage calls run in worker threads, where the per-file
+    # locks still keep different storage files from waiting for each other.
+    async def asave_reports(self, storage_file_name: str, reports: List[Dict]) -> None:
+        await asyncio.to_thread(self.save_reports, storage_file_name, reports)
+
+    async def aexists(self, storage_file_name: str, identifier: str) -> bool:
+        return await asyncio.to_thread(self.exists, storage_file_name, identifier)
+
+    async def aexists_many(self, storage_file_name: str, identifiers: List[str]) -> Set[str]:
+        return await asyncio.to_thread(self.exists_many, storage_file_name, identifiers)
+
+    async def aget_by_date(self, storage_file_name: str, from_date: int = None, to_date: int = None) -> List[Dict]:
+        return await asyncio.to_thread(self.get_by_date, storage_file_name, from_date, to_date)
+
+    async def aadd_known_keys(self, storage_file_name: str, keys: List[str]) -> None:
+        await asyncio.to_thread(self.add_known_keys, storage_file_name, keys)
+
+    async def aflush(self) -> None:
+        await asyncio.to_thread(self.flush)
@@ -1,8 +1,29 @@
-from typing import List, Dict
+import os
+from typing import List, Dict, Set
+
+def file_signature(path: str) -> List:
+    # Size and mtime of a file, or nothing if there is no such file.
+    if not os.path.exists(path):
+        return []
+    stat = os.stat(path)
+    return [[os.path.basename(path), stat.st_size, stat.st_mtime_ns]]
 
 class DatabaseBackend:
+    @staticmethod
+    def signature(path: str) -> List:
+        # Changes whenever the store at path is written to, and is read without
+        # opening the store, so sidecars can tell they may have missed writes.
+        # Empty when there is no store at path.
+        return file_signature(path)
+
     def insert(self, item: Dict) -> None:
         pass
+
+    def insert_many(self, items: List[Dict]) -> None:
+        pass
+
+    def upsert_many(self, items: List[Dict]) -> None:
+        pass
     
     def get(self) -> List[Dict]:
         pass
@@ -13,6 +34,9 @@ class DatabaseBackend:
     def exists(self, identifier: str) -> bool:
         pass
 
+    def exists_many(self, identifiers: List[str]) -> Set[str]:
+        pass
+
     def delete(self, identifier: str) -> None:
         pass
 
@@ -20,4 +44,10 @@ class DatabaseBackend:
         pass
     
     def delete_by_date(self, from_date: int = None, to_date: int = None) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
         pass
\ No newline at end of file
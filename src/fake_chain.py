@@ -1,8 +1,12 @@
 """Fake chains for testing purposes."""
 
+import asyncio
 from typing import Callable, Dict, List, Optional
 
-from langchain.callbacks.manager import CallbackManagerForChainRun
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForChainRun,
+    CallbackManagerForChainRun,
+)
 from langchain.chains.base import Chain
 from pydantic import Extra
 
@@ -48,4 +52,12 @@ class FakeChain(Chain):
         """Return the output dict, along with inputs if so specified."""
         if self.inputs_to_outputs is None:
             return self.output
-        return self.inputs_to_outputs(inputs)
\ No newline at end of file
+        return self.inputs_to_outputs(inputs)
+
+    async def _acall(
+        self,
+        inputs: Dict[str, str],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> Dict[str, str]:
+        """Same as `_call`, with `inputs_to_outputs` run off the event loop."""
+        return await asyncio.to_thread(self._call, inputs)
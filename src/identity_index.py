@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+ARXIV_ID = re.compile(r"arxiv\.org/(?:abs|pdf)/([a-z\-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})", re.IGNORECASE)
+GITHUB_REPO = re.compile(r"github\.com/([^/\s?#]+)/([^/\s?#]+)", re.IGNORECASE)
+
+def normalize_arxiv_id(url: str) -> Optional[str]:
+    # https://arxiv.org/abs/2301.12345v2 and .../pdf/2301.12345.pdf are the same paper.
+    match = ARXIV_ID.search(url or "")
+    return match.group(1).lower() if match else None
+
+def normalize_github_repo(url: str) -> Optional[str]:
+    match = GITHUB_REPO.search(url or "")
+    if not match:
+        return None
+    owner, repo = match.group(1).lower(), match.group(2).lower()
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return f"{owner}/{repo}"
+
+def normalize_title(title: str) -> Optional[str]:
+    title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode().lower()
+    words = re.findall(r"[a-z0-9]+", title)
+    return " ".join(words) if words else None
+
+def load_paper(content: Dict) -> Optional[Dict]:
+    # Providers wrap the paper as a JSON string under "paper".
+    paper = content.get("paper", content)
+    if isinstance(paper, str):
+        try:
+            paper = json.loads(paper)
+        except ValueError:
+            return None
+    return paper if isinstance(paper, dict) else None
+
+def paper_identities(content: Dict) -> List[str]:
+    """Normalized keys that identify the paper a content item is about.
+
+    Contents without any paper field have no identities and are never treated
+    as duplicates.
+    """
+    paper = load_paper(content)
+    if paper is None:
+        return []
+
+    identities = []
+    for prefix, value in [("arxiv", normalize_arxiv_id(paper.get("arxiv_url"))), ("github", normalize_github_repo(paper.get("github_link"))), ("title", normalize_title(paper.get("title")))]:
+        if value:
+            identities.append(f"{prefix}:{value}")
+    return identities
+
+class IdentityIndex:
+    """Which provider and content id first covered each paper identity.
+
+    Backed by an append-only "<identity>\\t<provider>\\t<content id>" file, so
+    it is shared by every provider and survives restarts. A content reserves
+    its identities before its post is generated and only claims them, on disk,
+    once its report is saved; reservations live in memory, so a post that was
+    never made doesn't block the paper on the next run.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._owners: Dict[str, Tuple[str, str]] = {}
+        self._reservations: Dict[str, Tuple[str, str]] = {}
+        if os.path.exists(self._path):
+            with open(self._path, encoding="utf-8") as file:
+                for line in file:
+                    fields = line.rstrip("\n").split("\t")
+                    # A torn last line has less than three fields.
+                    if len(fields) == 3:
+                        self._owners.setdefault(fields[0], (fields[1], fields[2]))
+
+    def _find(self, identities: List[str], owner: Tuple[str, str] = None, reservations: bool = True) -> Optional[Tuple[str, str]]:
+        # A repo alone doesn't identify a paper: monorepos such as
+        # google-research/google-research hold many. It is recorded, but only the
+        # arXiv id and the title decide whether two contents are the same paper.
+        for identity in identities:
+            if identity.startswith("github:"):
+                continue
+            found = self._owners.get(identity) or (self._reservations.get(identity) if reservations else None)
+            if found is not None and found != owner:
+                return found
+        return None
+
+    def find(self, identities: List[str]) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            return self._find(identities)
+
+    def reserve(self, identities: List[str], provider: str, content_id: str) -> Optional[Tuple[str, str]]:
+        """Hold the identities for this content until it claims them.
+
+        Returns the (provider, content id) that already covers the paper, or None
+        if this content may go ahead. Nothing is written to disk.
+        """
+        owner = (provider, content_id)
+        with self._lock:
+            found = self._find(identities, owner)
+            if found is None:
+                for identity in identities:
+                    self._reservations.setdefault(identity, owner)
+            return found
+
+    def clear_reservations(self) -> None:
+        with self._lock:
+            self._reservations.clear()
+
+    def claim(self, identities: List[str], provider: str, content_id: str) -> Optional[Tuple[str, str]]:
+        """Record the identities for this content, unless another content owns one.
+
+        Returns the (provider, content id) that already covers the paper, or None
+        if the identities are now recorded for this content. Claiming again for
+        the same content is a no-op.
+        """
+        owner = (provider, content_id)
+        with self._lock:
+            # A reservation held by another content doesn't stop a saved report.
+            found = self._find(identities, owner, reservations=False)
+            if found is not None:
+                return found
+            new_identities = [identity for identity in identities if identity not in self._owners]
+            if new_identities:
+                with open(self._path, "a", encoding="utf-8") as file:
+                    file.write("".join(f"{identity}\t{provider}\t{content_id}\n" for identity in new_identities))
+                for identity in new_identities:
+                    self._owners[identity] = owner
+            for identity in identities:
+                if self._reservations.get(identity) == owner:
+                    del self._reservations[identity]
+            return None
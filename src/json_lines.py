@@ -0,0 +1,33 @@
+import json
+import os
+from typing import Dict, List
+
+def load_json_lines(path: str) -> List[Dict]:
+    """Records of an append-only file of JSON objects, one per line.
+
+    A torn last line, left by a crash in the middle of an append, is cut off
+    the file so the next append starts on a line of its own. A broken line
+    anywhere else is corruption and raises ValueError.
+    """
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as file:
+        lines = file.readlines()
+    records = []
+    valid_size = 0
+    for number, line in enumerate(lines):
+        try:
+            # Every record is written with its newline, so a last line
+            # without one was cut short even if what reached the disk parses.
+            if not line.endswith(b"\n"):
+                raise ValueError("Record without its newline")
+            records.append(json.loads(line))
+        except ValueError:
+            if number == len(lines) - 1:
+                with open(path, "r+b") as file:
+                    file.truncate(valid_size)
+                break
+            raise ValueError(f"Corrupted record at line {number + 1} of {path}")
+        valid_size += len(line)
+    return records
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+from typing import List, Dict, Set
+from src.db_backend_interface import DatabaseBackend
+from src.json_lines import load_json_lines
+from datetime import datetime
+
+class JsonLinesBackend(DatabaseBackend):
+    """Append-only log of reports, one JSON object per line.
+
+    An insert appends ``{"item": {...}}`` and a delete appends a tombstone
+    ``{"delete": seq}`` pointing at the n-th insert record of the file. The file
+    is replayed into memory on open, and rewritten without the dead records once
+    ``compaction_threshold`` tombstones have piled up. A torn last line, left by
+    a crash in the middle of an append, is dropped on open.
+    """
+
+    def __init__(self, path: str, compaction_threshold: int = 1000, fsync: bool = False) -> None:
+        if not isinstance(compaction_threshold, int) or compaction_threshold < 1:
+            raise ValueError("compaction_threshold must be a positive integer")
+        self._path = path
+        self._compaction_threshold = compaction_threshold
+        self._fsync = fsync
+        self._lock = threading.RLock()
+        self._compaction_thread = None
+        self._load()
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        # Live items keyed by the sequence number of their insert record.
+        self._items: Dict[int, Dict] = {}
+        self._id_index: Dict[str, List[int]] = {}
+        self._next_seq = 0
+        self._tombstones = 0
+        for record in load_json_lines(self._path):
+            if "item" in record:
+                self._add(record["item"])
+            elif "delete" in record:
+                self._remove(record["delete"])
+                self._tombstones += 1
+
+    def _add(self, item: Dict) -> None:
+        self._items[self._next_seq] = item
+        self._id_index.setdefault(item.get('id'), []).append(self._next_seq)
+        self._next_seq += 1
+
+    def _remove(self, seq: int) -> None:
+        item = self._items.pop(seq)
+        identifier = item.get('id')
+        self._id_index[identifier].remove(seq)
+        if not self._id_index[identifier]:
+            del self._id_index[identifier]
+
+    def _append(self, records: List[Dict]) -> None:
+        self._file.write("".join(json.dumps(record, sort_keys=True) + "\n" for record in records))
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def _delete_seqs(self, seqs: List[int]) -> None:
+        if not seqs:
+            return
+        self._append([{"delete": seq} for seq in seqs])
+        for seq in seqs:
+            self._remove(seq)
+        self._tombstones += len(seqs)
+        if self._tombstones >= self._compaction_threshold and self._compaction_thread is None:
+            self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self) -> None:
+        with self._lock:
+            items = list(self._items.values())
+            compacted_path = self._path + ".compact"
+            with open(compacted_path, "w", encoding="utf-8") as file:
+                file.write("".join(json.dumps({"item": item}, sort_keys=True) + "\n" for item in items))
+                file.flush()
+                os.fsync(file.fileno())
+            self._file.close()
+            os.replace(compacted_path, self._path)
+            self._file = open(self._path, "a", encoding="utf-8")
+
+            self._items, self._id_index, self._next_seq, self._tombstones = {}, {}, 0, 0
+            for item in items:
+                self._add(item)
+            if self._compaction_thread is threading.current_thread():
+                self._compaction_thread = None
+
+    def validate_timestamp(self, timestamp: int) -> None:
+        try:
+            datetime.utcfromtimestamp(timestamp)
+        except (ValueError, TypeError, OverflowError):
+            raise ValueError("Invalid timestamp value")
+
+    def validate_from_and_to_date(self, from_date, to_date):
+        if from_date is not None:
+            self.validate_timestamp(from_date)
+        if to_date is not None:
+            self.validate_timestamp(to_date)
+        if from_date is not None and to_date is not None:
+            if from_date > to_date:
+                raise ValueError("from_date must be less than to_date")
+
+    def validate_id(self, identifier: str) -> None:
+        if not isinstance(identifier, str):
+            raise ValueError("ID must be a string")
+        if not identifier:
+            raise ValueError("ID must not be empty")
+
+    def validate_item(self, item: Dict) -> None:
+        if 'id' not in item:
+            raise ValueError("ID must be present in the item")
+        self.validate_id(item['id'])
+        if 'timestamp' not in item:
+            raise ValueError("Timestamp must be present in the item")
+        self.validate_timestamp(item['timestamp'])
+
+    def _in_range(self, item: Dict, from_date: int = None, to_date: int = None) -> bool:
+        if from_date is not None and item['timestamp'] < from_date:
+            return False
+        if to_date is not None and item['timestamp'] > to_date:
+            return False
+        return True
+
+    def insert(self, item: Dict) -> None:
+        self.insert_many([item])
+
+    def insert_many(self, items: List[Dict]) -> None:
+        for item in items:
+            self.validate_item(item)
+        # Round-trip through JSON so the in-memory copy matches what a replay reads.
+        items = [json.loads(json.dumps(item)) for item in items]
+        with self._lock:
+            self._append([{"item": item} for item in items])
+            for item in items:
+                self._add(item)
+
+    def upsert_many(self, items: List[Dict]) -> None:
+        for item in items:
+            self.validate_item(item)
+        with self._lock:
+            new_items = {}
+            for item in items:
+                if item['id'] not in self._id_index and item['id'] not in new_items:
+                    new_items[item['id']] = item
+            if new_items:
+                self.insert_many(list(new_items.values()))
+
+    def get(self) -> List[Dict]:
+        with self._lock:
+            return json.loads(json.dumps(list(self._items.values())))
+
+    def get_one(self, identifier: str) -> Dict:
+        self.validate_id(identifier)
+        with self._lock:
+            seqs = self._id_index.get(identifier)
+            return json.loads(json.dumps(self._items[seqs[0]])) if seqs else None
+
+    def exists(self, identifier: str) -> bool:
+        self.validate_id(identifier)
+        with self._lock:
+            return identifier in self._id_index
+
+    def exists_many(self, identifiers: List[str]) -> Set[str]:
+        for identifier in identifiers:
+            self.validate_id(identifier)
+        with self._lock:
+            return {identifier for identifier in identifiers if identifier in self._id_index}
+
+    def delete(self, identifier: str) -> None:
+        self.validate_id(identifier)
+        with self._lock:
+            self._delete_seqs(list(self._id_index.get(identifier, [])))
+
+    def get_by_date(self, from_date: int = None, to_date: int = None) -> List[Dict]:
+        self.validate_from_and_to_date(from_date, to_date)
+        if from_date is None and to_date is None:
+            return self.get()
+
+        with self._lock:
+            matches = [(item['timestamp'], seq) for seq, item in self._items.items() if self._in_range(item, from_date, to_date)]
+            return json.loads(json.dumps([self._items[seq] for _, seq in sorted(matches)]))
+
+    def delete_by_date(self, from_date: int = None, to_date: int = None) -> None:
+        self.validate_from_and_to_date(from_date, to_date)
+        if from_date is None and to_date is None:
+            return
+
+        with self._lock:
+            self._delete_seqs([seq for seq, item in self._items.items() if self._in_range(item, from_date, to_date)])
+
+    def close(self) -> None:
+        compaction_thread = self._compaction_thread
+        if compaction_thread is not None:
+            compaction_thread.join()
+        with self._lock:
+            self._file.close()
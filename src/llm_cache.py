@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+class LLMCache:
+    """Content-addressed on-disk cache of generated posts.
+
+    Entries are keyed by the prompt template, the model parameters and the
+    content id, so a post is only reused when the exact same generation would be
+    requested again. Entries older than ``ttl`` seconds are ignored, and the
+    oldest ones are removed once there are more than ``max_entries``.
+    """
+
+    def __init__(self, folder: str, max_entries: int = 10000, ttl: int = None) -> None:
+        if not isinstance(folder, str) or not folder:
+            raise ValueError("folder must be a non empty string")
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self._folder = folder
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries = None
+        self._lock = threading.Lock()
+        os.makedirs(self._folder, exist_ok=True)
+
+    @staticmethod
+    def key(template: str, model_parameters: Dict, content_id: str) -> str:
+        key_json = json.dumps({"template": template, "model_parameters": model_parameters, "content_id": content_id}, sort_keys=True, default=str)
+        return hashlib.sha256(key_json.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._folder, key + ".json")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if self._ttl is not None and time.time() - entry["created_at"] > self._ttl:
+            return None
+        return entry["post"]
+
+    def set(self, key: str, post: str) -> None:
+        path = self._path(key)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"post": post, "created_at": time.time()}, file)
+        with self._lock:
+            is_new = not os.path.exists(path)
+            os.replace(temporary_path, path)
+            if self._entries is None:
+                self._entries = len(self._entry_paths())
+            elif is_new:
+                self._entries += 1
+            if self._entries > self._max_entries:
+                self._evict()
+
+    def _entry_paths(self):
+        return [os.path.join(self._folder, name) for name in os.listdir(self._folder) if name.endswith(".json")]
+
+    def _evict(self) -> None:
+        # Expired entries go first, then the oldest until we are back under the
+        # limit, with some slack so eviction doesn't run on every insert.
+        now = time.time()
+        entries = []
+        for path in self._entry_paths():
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                pass
+        entries.sort()
+        keep = int(self._max_entries * 0.9)
+        removed = 0
+        for mtime, path in entries:
+            expired = self._ttl is not None and now - mtime > self._ttl
+            if not expired and len(entries) - removed <= keep:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            removed += 1
+        self._entries = len(entries) - removed
@@ -0,0 +1,123 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+class Metrics:
+    """Counters and latency histograms for the reporting pipeline.
+
+    Disabled by default: every call returns right away, and timer() hands back a
+    shared no-op context manager, so instrumented code pays one attribute check.
+    Series are named the Prometheus way, ``name{label="value"}``, both in
+    snapshot() and in the text dump written by dump().
+    """
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, enabled: bool = False, path: str = None) -> None:
+        self.enabled = enabled
+        self.path = path
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, Dict] = {}
+        self._disabled_timer = contextlib.nullcontext()
+
+    def configure(self, enabled: bool = True, path: str = None) -> None:
+        self.enabled = enabled
+        self.path = path
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(self.BUCKETS)}
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+            # Buckets are stored non-cumulative and summed up on export.
+            index = bisect.bisect_left(self.BUCKETS, seconds)
+            if index < len(self.BUCKETS):
+                histogram["buckets"][index] += 1
+
+    def timer(self, name: str, **labels):
+        """Context manager observing the seconds spent in its block."""
+        if not self.enabled:
+            return self._disabled_timer
+        return self._timer(name, labels)
+
+    @contextlib.contextmanager
+    def _timer(self, name: str, labels: Dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _series(name: str, labels: Tuple) -> str:
+        if not labels:
+            return name
+        return name + "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = {self._series(name, labels): value for (name, labels), value in self._counters.items()}
+            histograms = {}
+            for (name, labels), histogram in self._histograms.items():
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                histograms[self._series(name, labels)] = {"count": histogram["count"], "sum": histogram["sum"], "buckets": buckets}
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        lines = []
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{self._series(name, labels)} {value}" for (series_name, labels), value in counters if series_name == name)
+        for name in sorted({name for (name, _), _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (series_name, labels), histogram in histograms:
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                    cumulative += count
+                    lines.append(f"{self._series(name + '_bucket', labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{self._series(name + '_bucket', labels + (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{self._series(name + '_sum', labels)} {histogram['sum']}")
+                lines.append(f"{self._series(name + '_count', labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def dump(self, path: str = None) -> None:
+        """Write the Prometheus text format to path, or to the configured path."""
+        path = path or self.path
+        if not self.enabled or path is None:
+            return
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+# Shared by every instrumented module; call metrics.configure() to turn it on.
+metrics = Metrics()
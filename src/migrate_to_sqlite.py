@@ -0,0 +1,47 @@
+"""Copy TinyDB JSON storage files into SQLite storage files.
+
+Usage:
+    python -m src.migrate_to_sqlite experiments/data/*.json
+
+Each ``<name>.json`` is migrated to ``<name>.sqlite3`` next to it, which is the
+file ``DataStorage(folder, backend="sqlite")`` opens for that storage file name.
+Reports whose id is already in the SQLite file are skipped, so it is safe to run
+the migration more than once.
+"""
+import argparse
+import os
+from typing import List
+from src.tiny_db_backend import TinyDBBackend
+from src.sqlite_backend import SQLiteBackend
+
+
+def migrate(json_path: str, sqlite_path: str = None) -> int:
+    if not os.path.isfile(json_path):
+        raise FileNotFoundError(f"{json_path} does not exist")
+    if sqlite_path is None:
+        sqlite_path = os.path.splitext(json_path)[0] + ".sqlite3"
+
+    source = TinyDBBackend(json_path)
+    target = SQLiteBackend(sqlite_path)
+    try:
+        reports = [dict(report) for report in source.get()]
+        if reports:
+            target.upsert_many(reports)
+    finally:
+        source.close()
+        target.close()
+    return len(reports)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Migrate TinyDB JSON storage files to SQLite")
+    parser.add_argument("json_paths", nargs="+", help="TinyDB JSON files to migrate")
+    args = parser.parse_args(argv)
+
+    for json_path in args.json_paths:
+        count = migrate(json_path)
+        print(f"Migrated {count} reports from {json_path}")
+
+
+if __name__ == "__main__":
+    main()
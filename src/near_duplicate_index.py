@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.identity_index import load_paper
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+def paper_text(content: Dict) -> Optional[str]:
+    """Title and abstract of the paper in a content item, the part worth comparing.
+
+    Stars, media and tags change between fetches of the same paper, so they are
+    left out. Falls back to the subtitle when the abstract couldn't be fetched.
+    """
+    paper = load_paper(content)
+    if paper is None:
+        return None
+    text = " ".join(str(paper.get(field) or "") for field in ["title", "abstract"]) if paper.get("abstract") else " ".join(str(paper.get(field) or "") for field in ["title", "subtitle"])
+    return text if text.strip() else None
+
+class NearDuplicateIndex:
+    """MinHash signatures of reported texts, bucketed with LSH.
+
+    Each text becomes the set of its character shingles, summarized by num_perm
+    MinHash values; the share of equal values estimates the Jaccard similarity
+    of two texts. Signatures are split into bands and a lookup only compares
+    against texts sharing at least one band, so its cost depends on the number
+    of similar texts rather than on the size of the archive.
+
+    Signatures are appended to ``<path>.sig`` and their keys to ``<path>.keys``.
+    reserve() holds a text in memory only, until add() writes it once its
+    report is saved, so a post that was never made doesn't hide the paper.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.8, num_perm: int = 128, bands: int = 32, shingle_size: int = 5, seed: int = 1) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        if not isinstance(num_perm, int) or not isinstance(bands, int) or bands < 1 or num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+        if not isinstance(shingle_size, int) or shingle_size < 1:
+            raise ValueError("shingle_size must be a positive integer")
+        self._path = path
+        self._threshold = threshold
+        self._num_perm = num_perm
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[bytes, List[int]] = {}
+        # Reserved signatures by key; few, so they are compared one by one.
+        self._reservations: Dict[str, np.ndarray] = {}
+        self._load(seed)
+
+    def _load(self, seed: int) -> None:
+        parameters = {"num_perm": self._num_perm, "bands": self._bands, "shingle_size": self._shingle_size, "seed": seed}
+        if not os.path.exists(self._path + ".json"):
+            with open(self._path + ".json", "w", encoding="utf-8") as file:
+                json.dump(parameters, file)
+        with open(self._path + ".json", encoding="utf-8") as file:
+            if json.load(file) != parameters:
+                raise ValueError(f"{self._path} was built with different parameters")
+        if not os.path.exists(self._path + ".keys"):
+            return
+
+        with open(self._path + ".keys", "rb") as file:
+            lines = [line for line in file if line.endswith(b"\n")]
+        signatures = np.fromfile(self._path + ".sig", dtype=np.uint64) if os.path.exists(self._path + ".sig") else np.empty(0, dtype=np.uint64)
+        count = min(len(lines), len(signatures) // self._num_perm)
+        # A crash in the middle of an append leaves a torn key or one file a
+        # record ahead of the other; cut both back to the complete records.
+        with open(self._path + ".keys", "r+b") as file:
+            file.truncate(sum(len(line) for line in lines[:count]))
+        if os.path.exists(self._path + ".sig"):
+            with open(self._path + ".sig", "r+b") as file:
+                file.truncate(count * self._num_perm * signatures.itemsize)
+        for line, signature in zip(lines[:count], signatures[:count * self._num_perm].reshape(-1, self._num_perm)):
+            self._add(line.decode("utf-8").rstrip("\n"), signature)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        text = " ".join(re.findall(r"\w+", text.lower()))
+        size = min(self._shingle_size, len(text))
+        shingles = {text[start:start + size] for start in range(len(text) - size + 1)}
+        return np.array([zlib.crc32(shingle.encode()) for shingle in shingles], dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingles(text)
+        if len(hashes) == 0:
+            return np.full(self._num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        # a * hash stays below 2**64 because both are 32-bit values.
+        return ((np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.to_bytes(2, "little") + signature[band * self._rows:(band + 1) * self._rows].tobytes() for band in range(self._bands)]
+
+    def _add(self, key: str, signature: np.ndarray) -> None:
+        position = len(self._keys)
+        self._keys.append(key)
+        self._positions[key] = position
+        self._signatures.append(signature)
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(position)
+
+    def _find(self, signature: np.ndarray, exclude: str = None) -> Optional[Tuple[str, float]]:
+        candidates = {position for band_key in self._band_keys(signature) for position in self._buckets.get(band_key, [])}
+        best = None
+        for position in candidates:
+            if self._keys[position] == exclude:
+                continue
+            similarity = float(np.mean(self._signatures[position] == signature))
+            if similarity >= self._threshold and (best is None or similarity > best[1]):
+                best = (self._keys[position], similarity)
+        for key, reserved in self._reservations.items():
+            if key == exclude:
+                continue
+            similarity = float(np.mean(reserved == signature))
+            if similarity >= self._threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def find(self, text: str) -> Optional[Tuple[str, float]]:
+        """Return the key of the most similar indexed text and its similarity, if above the threshold."""
+        signature = self.signature(text)
+        with self._lock:
+            return self._find(signature)
+
+    def add(self, key: str, text: str) -> None:
+        with self._lock:
+            signature = self._reservations.pop(key, None)
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock:
+            if key not in self._positions:
+                self._append(key, signature)
+
+    def reserve(self, key: str, text: str) -> Optional[Tuple[str, float]]:
+        """Like claim(), but the text is only held in memory until add() or clear_reservations()."""
+        signature = self.signature(text)
+        with self._lock:
+            match = self._find(signature, exclude=key)
+            if match is None and key not in self._positions:
+                self._reservations[key] = signature
+            return match
+
+    def clear_reservations(self) -> None:
+        with self._lock:
+            self._reservations.clear()
+
+    def claim(self, key: str, text: str) -> Optional[Tuple[str, float]]:
+        """Add the text under key unless a different key already holds a near duplicate of it."""
+        signature = self.signature(text)
+        with self._lock:
+            match = self._find(signature, exclude=key)
+            if match is None and key not in self._positions:
+                self._append(key, signature)
+            return match
+
+    def _append(self, key: str, signature: np.ndarray) -> None:
+        with open(self._path + ".sig", "ab") as file:
+            file.write(signature.tobytes())
+        with open(self._path + ".keys", "a", encoding="utf-8") as file:
+            file.write(key + "\n")
+        self._add(key, signature)
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable
+
+class RateLimiter:
+    """Token-bucket limiter for requests per minute and tokens per minute.
+
+    Each bucket holds up to one minute of quota and refills continuously, so
+    short bursts are allowed while the per-minute averages stay under the limits.
+    acquire() blocks until both buckets can pay for the call; aacquire() waits
+    without blocking the event loop.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep, async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep) -> None:
+        for name, limit in [("requests_per_minute", requests_per_minute), ("tokens_per_minute", tokens_per_minute)]:
+            if limit is not None and (not isinstance(limit, (int, float)) or limit <= 0):
+                raise ValueError(f"{name} must be a positive number")
+        self._limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._available = {name: limit for name, limit in self._limits.items() if limit is not None}
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        # Roughly four characters per token for English/Spanish text.
+        return len(text) // 4 + 1
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        for name in self._available:
+            limit = self._limits[name]
+            self._available[name] = min(limit, self._available[name] + elapsed * limit / 60)
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take the quota for one call and return 0, or return how long to wait."""
+        # A call bigger than a whole minute of quota waits for a full bucket.
+        cost = {"requests": 1, "tokens": tokens}
+        for name in self._available:
+            cost[name] = min(cost[name], self._limits[name])
+        with self._lock:
+            self._refill()
+            missing = {name: cost[name] - available for name, available in self._available.items() if available < cost[name]}
+            if not missing:
+                for name in self._available:
+                    self._available[name] -= cost[name]
+                return 0
+            return max(amount * 60 / self._limits[name] for name, amount in missing.items())
+
+    def acquire(self, tokens: int = 0) -> None:
+        wait = self._try_acquire(tokens)
+        while wait > 0:
+            self._sleep(wait)
+            wait = self._try_acquire(tokens)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        wait = self._try_acquire(tokens)
+        while wait > 0:
+            await self._async_sleep(wait)
+            wait = self._try_acquire(tokens)
@@ -1,17 +1,59 @@
 from langchain.chains.base import Chain
-from src.content_provider.content_provider import ContentProvider
+from src.content_provider.content_provider import ContentProvider, StopAfterKnown
 from src.content_provider.papers_with_code_content_provider import PapersWithCodeContentProvider
 from src.data_storage import DataStorage
+from src.rate_limiter import RateLimiter
+from src.llm_cache import LLMCache
+from src.run_journal import RunJournal
+from src.identity_index import IdentityIndex, paper_identities
+from src.near_duplicate_index import NearDuplicateIndex, paper_text
+from src.metrics import metrics
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 import requests
 import json
 import logging
 from datetime import datetime
 import hashlib
 class Reporter:
-    def __init__(self, content_providers: List[ContentProvider], llm_chain: Chain, logger: logging.Logger, data_storage: DataStorage):
+    def __init__(self, content_providers: List[ContentProvider], llm_chain: Chain, logger: logging.Logger, data_storage: DataStorage, max_workers: int = 1, max_concurrent_generations: int = 1, rate_limiter: RateLimiter = None, llm_cache: LLMCache = None, batch_size: int = 1, run_journal: RunJournal = None, identity_index: IdentityIndex = None, near_duplicate_index: NearDuplicateIndex = None, stream_chunk_size: int = None, stop_after_known: int = None):
 
         self.validate_inputs_types(content_providers, llm_chain, logger, data_storage)
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError('max_workers must be a positive integer')
+        if not isinstance(max_concurrent_generations, int) or max_concurrent_generations < 1:
+            raise ValueError('max_concurrent_generations must be a positive integer')
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError('batch_size must be a positive integer')
+        if rate_limiter is not None and not isinstance(rate_limiter, RateLimiter):
+            raise TypeError('rate_limiter must be an instance of RateLimiter')
+        if llm_cache is not None and not isinstance(llm_cache, LLMCache):
+            raise TypeError('llm_cache must be an instance of LLMCache')
+        if run_journal is not None and not isinstance(run_journal, RunJournal):
+            raise TypeError('run_journal must be an instance of RunJournal')
+        if identity_index is not None and not isinstance(identity_index, IdentityIndex):
+            raise TypeError('identity_index must be an instance of IdentityIndex')
+        if near_duplicate_index is not None and not isinstance(near_duplicate_index, NearDuplicateIndex):
+            raise TypeError('near_duplicate_index must be an instance of NearDuplicateIndex')
+        if stream_chunk_size is not None and (not isinstance(stream_chunk_size, int) or stream_chunk_size < 1):
+            raise ValueError('stream_chunk_size must be a positive integer')
+        if stop_after_known is not None and (not isinstance(stop_after_known, int) or stop_after_known < 1):
+            raise ValueError('stop_after_known must be a positive integer')
+        if stop_after_known is not None and stream_chunk_size is None:
+            raise ValueError('stop_after_known needs stream_chunk_size')
+        self._max_workers = max_workers
+        self._max_concurrent_generations = max_concurrent_generations
+        self._rate_limiter = rate_limiter
+        self._llm_cache = llm_cache
+        self._batch_size = batch_size
+        self._run_journal = run_journal
+        self._identity_index = identity_index
+        self._near_duplicate_index = near_duplicate_index
+        self._stream_chunk_size = stream_chunk_size
+        self._stop_after_known = stop_after_known
+        self._chain_supports_async = True
         self._content_providers = content_providers
         self._llm_chain = llm_chain
         self._logger = logger
@@ -39,34 +81,489 @@ class Reporter:
         return hashlib.sha256(json_str.encode()).hexdigest()
     
 
+    def _create_executor(self):
+        # Blocking provider and storage calls run on the loop's default executor,
+        # sized here so max_workers providers really do run at the same time.
+        return ThreadPoolExecutor(max_workers=self._max_workers + self._max_concurrent_generations + (os.cpu_count() or 1) + 4)
+
+    def _create_slots(self):
+        # Created per run, so each event loop gets semaphores of its own.
+        self._provider_slots = asyncio.Semaphore(self._max_workers)
+        self._generation_slots = asyncio.Semaphore(self._max_concurrent_generations)
+
+    def _clear_reservations(self):
+        # Reservations only hold a paper while this run generates its post; one
+        # whose post failed is free again for the next run.
+        if self._identity_index is not None:
+            self._identity_index.clear_reservations()
+        if self._near_duplicate_index is not None:
+            self._near_duplicate_index.clear_reservations()
+
     def report(self):
+        # Thin wrapper for callers without an event loop; use areport() inside one.
+        async def run():
+            asyncio.get_running_loop().set_default_executor(self._create_executor())
+            return await self.areport()
+
+        return asyncio.run(run())
+
+    async def areport(self):
         self._logger.info('Starting reporting')
-        all_reports = []
-        for content_provider in self._content_providers:
-            reports = self.get_reports_from_content_provider(content_provider)
-            all_reports.extend(reports)
-            if len(reports) > 0:
-                self._data_storage.save_reports(content_provider.name(), reports)
+        self._create_slots()
+        self._clear_reservations()
+        results = await asyncio.gather(*(self.areport_content_provider(content_provider) for content_provider in self._content_providers))
+        all_reports = [report for reports in results for report in reports]
+        await self._data_storage.aflush()
+        await self.afinish_run()
+        await asyncio.to_thread(metrics.dump)
         self._logger.info('Finished reporting')
         return all_reports
 
+    def iter_reports(self, save_batch_size: int = 1):
+        """Yield each report as soon as it is generated and saved.
+
+        Reports are saved in batches of save_batch_size before being yielded, so
+        a crash loses at most one unsaved batch. Generation pauses while the
+        caller handles a report.
+        """
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(self._create_executor())
+        reports = self.aiter_reports(save_batch_size)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(reports.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(reports.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    async def aiter_reports(self, save_batch_size: int = 1):
+        if not isinstance(save_batch_size, int) or save_batch_size < 1:
+            raise ValueError('save_batch_size must be a positive integer')
+        self._logger.info('Starting reporting')
+        self._create_slots()
+        self._clear_reservations()
+        queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            await asyncio.gather(*(self.astream_content_provider(content_provider, save_batch_size, queue.put) for content_provider in self._content_providers))
+            await queue.put(done)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                report = await queue.get()
+                if report is done:
+                    break
+                yield report
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+            await self._data_storage.aflush()
+        await self.afinish_run()
+        await asyncio.to_thread(metrics.dump)
+        self._logger.info('Finished reporting')
+
+    async def afinish_run(self):
+        # A run where every provider got to the end forgets its journal. When
+        # some failed (their failure boundary swallows the error, so the journal
+        # is what tells), only theirs is kept to resume from; the providers that
+        # finished are forgotten so the next run reports their new content.
+        if self._run_journal is None:
+            return
+        finished = []
+        for content_provider in self._content_providers:
+            if await asyncio.to_thread(self._run_journal.is_done, content_provider.name()):
+                finished.append(content_provider.name())
+        if len(finished) == len(self._content_providers):
+            await asyncio.to_thread(self._run_journal.clear)
+        else:
+            await asyncio.to_thread(self._run_journal.forget, finished)
+
+    async def askip_finished_provider(self, content_provider):
+        if self._run_journal is None or not await asyncio.to_thread(self._run_journal.is_done, content_provider.name()):
+            return False
+        self._logger.info(f'Skipping {content_provider.name()}, already reported in this run')
+        return True
+
+    async def afinish_provider(self, content_provider):
+        if self._run_journal is not None:
+            await asyncio.to_thread(self._run_journal.record_done, content_provider.name())
+
+    async def astream_content_provider(self, content_provider, save_batch_size, on_saved):
+        # Same failure boundary as areport_content_provider, but reports are saved
+        # and handed to on_saved every save_batch_size reports.
+        async with self._provider_slots:
+            pending = []
+
+            async def save_pending():
+                reports = pending.copy()
+                pending.clear()
+                with metrics.timer('reporter_stage_seconds', stage='save', provider=content_provider.name()):
+                    await self._data_storage.asave_reports(content_provider.name(), reports)
+                metrics.increment('reporter_reports_saved_total', len(reports), provider=content_provider.name())
+                await self.aadd_known_keys(content_provider, [report['content'] for report in reports])
+                await self.aclaim_reported(content_provider, reports)
+                for report in reports:
+                    await on_saved(report)
+
+            async def on_report(report):
+                pending.append(report)
+                if len(pending) >= save_batch_size:
+                    await save_pending()
 
+            if await self.askip_finished_provider(content_provider):
+                return
+            failed = False
+            try:
+                await self.aget_reports_from_content_provider(content_provider, on_report)
+            except Exception as e:
+                failed = True
+                metrics.increment('reporter_errors_total', provider=content_provider.name(), stage='report')
+                self._logger.error(f'Error reporting from {content_provider.name()}: {e}')
+            try:
+                if pending:
+                    await save_pending()
+                if not failed:
+                    await self.afinish_provider(content_provider)
+            except Exception as e:
+                metrics.increment('reporter_errors_total', provider=content_provider.name(), stage='save')
+                self._logger.error(f'Error reporting from {content_provider.name()}: {e}')
 
-    def get_reports_from_content_provider(self, content_provider):
+    async def areport_content_provider(self, content_provider):
+        # A failing provider is logged and skipped, it never aborts the others.
+        async with self._provider_slots:
+            try:
+                if await self.askip_finished_provider(content_provider):
+                    return []
+                reports = await self.aget_reports_from_content_provider(content_provider)
+                if len(reports) > 0:
+                    with metrics.timer('reporter_stage_seconds', stage='save', provider=content_provider.name()):
+                        await self._data_storage.asave_reports(content_provider.name(), reports)
+                    metrics.increment('reporter_reports_saved_total', len(reports), provider=content_provider.name())
+                    await self.aadd_known_keys(content_provider, [report['content'] for report in reports])
+                    await self.aclaim_reported(content_provider, reports)
+                await self.afinish_provider(content_provider)
+                return reports
+            except Exception as e:
+                metrics.increment('reporter_errors_total', provider=content_provider.name(), stage='report')
+                self._logger.error(f'Error reporting from {content_provider.name()}: {e}')
+                return []
+
+    async def aget_reports_from_content_provider(self, content_provider, on_report=None):
+        # on_report, when given, is awaited with each report as soon as its post
+        # is generated; the returned list keeps the provider's order.
         reports = []
         try:
-            contents = content_provider.get_content()
-            self._logger.info(f'Got {len(contents)} contents from {content_provider.name()}')
-            for content in contents:
-                id = self.create_id(content)
-                if not self._data_storage.exists(content_provider.name(), id):
-                    post = self._llm_chain.run(content.copy())
-                    report = {'content': content, 'report': {'post': post, 'content_provider': content_provider.name()}, 'id': id, 'timestamp': self.get_timestamp()}
-                    reports.append(report)
-                    self._logger.info(json.dumps(report))
-                else:
-                    self._logger.info(f'Content {content} already exists in {content_provider.name()}')
+            if self._stream_chunk_size is None:
+                with metrics.timer('reporter_stage_seconds', stage='fetch', provider=content_provider.name()):
+                    contents = await self.aget_content(content_provider)
+                reports = await self.areport_contents(content_provider, contents, on_report)
+            else:
+                chunks = self.aiter_content_chunks(content_provider)
+                listed = False
+                try:
+                    while True:
+                        try:
+                            contents = await chunks.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        except Exception as e:
+                            # Whatever broke the listing past its first chunk,
+                            # the reports of the chunks before it are kept.
+                            if not listed:
+                                raise
+                            metrics.increment('reporter_errors_total', provider=content_provider.name(), stage='fetch')
+                            self._logger.error(f'Error getting content from {content_provider.name()}: {e}')
+                            break
+                        listed = True
+                        reports.extend(await self.areport_contents(content_provider, contents, on_report))
+                finally:
+                    await chunks.aclose()
         except requests.exceptions.HTTPError as e:
+            metrics.increment('reporter_errors_total', provider=content_provider.name(), stage='fetch')
             self._logger.error(f'Error getting content from {content_provider.name()}: {e}')
             self._logger.info(f'Got 0 contents from {content_provider.name()}')
         return reports
+
+    async def areport_contents(self, content_provider, contents, on_report=None):
+        metrics.increment('reporter_items_fetched_total', len(contents), provider=content_provider.name())
+        self._logger.info(f'Got {len(contents)} contents from {content_provider.name()}')
+        ids = [self.create_id(content) for content in contents]
+        with metrics.timer('reporter_stage_seconds', stage='exists', provider=content_provider.name()):
+            existing_ids = await self._data_storage.aexists_many(content_provider.name(), ids) if ids else set()
+        new_contents = []
+        await self.aadd_known_keys(content_provider, [content for content, id in zip(contents, ids) if id in existing_ids])
+        for content, id in zip(contents, ids):
+            if id not in existing_ids:
+                new_contents.append((content, id))
+            else:
+                metrics.increment('reporter_items_deduped_total', provider=content_provider.name(), reason='stored')
+                self._logger.info(f'Content {content} already exists in {content_provider.name()}')
+        if self._identity_index is not None:
+            new_contents = await asyncio.to_thread(self.reserve_identities, content_provider, new_contents)
+        if self._near_duplicate_index is not None:
+            new_contents = await asyncio.to_thread(self.reserve_near_duplicates, content_provider, new_contents)
+        reports = [None] * len(new_contents)
+        journaled_posts = await asyncio.to_thread(self._run_journal.get_posts, content_provider.name()) if self._run_journal is not None else {}
+        to_generate = [index for index, (_, id) in enumerate(new_contents) if id not in journaled_posts]
+
+        async def on_post(index, post):
+            content, id = new_contents[index]
+            report = {'content': content, 'report': {'post': post, 'content_provider': content_provider.name()}, 'id': id, 'timestamp': self.get_timestamp()}
+            reports[index] = report
+            self._logger.info(json.dumps(report))
+            if on_report is not None:
+                await on_report(report)
+
+        async def on_generated(position, post):
+            index = to_generate[position]
+            if self._run_journal is not None:
+                await asyncio.to_thread(self._run_journal.record_post, content_provider.name(), new_contents[index][1], post)
+            await on_post(index, post)
+
+        for index, (_, id) in enumerate(new_contents):
+            if id in journaled_posts:
+                await on_post(index, journaled_posts[id])
+        await self.agenerate_posts([new_contents[index][0] for index in to_generate], on_generated)
+        return reports
+
+    def reserve_identities(self, content_provider, contents):
+        # The same paper reaches us from several providers with different JSON,
+        # so only the first content reserving its identities gets a post. They
+        # are claimed for good by aclaim_reported once the report is saved.
+        unclaimed = []
+        for content, id in contents:
+            owner = self._identity_index.reserve(paper_identities(content), content_provider.name(), id)
+            if owner is None:
+                unclaimed.append((content, id))
+            else:
+                metrics.increment('reporter_items_deduped_total', provider=content_provider.name(), reason='identity')
+                self._logger.info(f'Content {content} already covered by {owner[0]}')
+        return unclaimed
+
+    def reserve_near_duplicates(self, content_provider, contents):
+        # A star tick or a fixed typo gives the content a new id, but not a new
+        # paper. Texts are added for good by aclaim_reported once saved.
+        unclaimed = []
+        for content, id in contents:
+            text = paper_text(content)
+            match = self._near_duplicate_index.reserve(id, text) if text is not None else None
+            if match is None:
+                unclaimed.append((content, id))
+            else:
+                metrics.increment('reporter_items_deduped_total', provider=content_provider.name(), reason='near_duplicate')
+                self._logger.info(f'Content {content} is a near duplicate of {match[0]} ({match[1]:.2f} similar)')
+        return unclaimed
+
+    async def aclaim_reported(self, content_provider, reports):
+        if self._identity_index is not None:
+            await asyncio.to_thread(self.claim_identities, content_provider, reports)
+        if self._near_duplicate_index is not None:
+            await asyncio.to_thread(self.add_near_duplicates, reports)
+
+    def claim_identities(self, content_provider, reports):
+        for report in reports:
+            self._identity_index.claim(paper_identities(report['content']), content_provider.name(), report['id'])
+
+    def add_near_duplicates(self, reports):
+        for report in reports:
+            text = paper_text(report['content'])
+            if text is not None:
+                self._near_duplicate_index.add(report['id'], text)
+
+    async def aadd_known_keys(self, content_provider, contents):
+        keys = [key for key in map(content_provider.content_key, contents) if key is not None]
+        if keys:
+            await self._data_storage.aadd_known_keys(content_provider.name(), keys)
+
+    async def aget_content(self, content_provider):
+        # Providers skip the details of contents we already stored, and contents
+        # fetched by an interrupted run are reused instead of fetched again.
+        content_provider.set_known_keys(self._data_storage.known_keys(content_provider.name()))
+        if self._run_journal is None:
+            return await content_provider.aget_content()
+        contents = await asyncio.to_thread(self._run_journal.get_contents, content_provider.name())
+        if contents is None:
+            contents = await content_provider.aget_content()
+            await asyncio.to_thread(self._run_journal.record_contents, content_provider.name(), contents)
+        return contents
+
+    async def aiter_content_chunks(self, content_provider):
+        # Yields the provider's contents in chunks of stream_chunk_size as they
+        # are listed. A producer task keeps fetching the next chunk while the
+        # caller generates posts for this one, at most one chunk ahead.
+        content_provider.set_known_keys(self._data_storage.known_keys(content_provider.name()))
+        if self._run_journal is not None:
+            contents = await asyncio.to_thread(self._run_journal.get_contents, content_provider.name())
+            if contents is not None:
+                for start in range(0, len(contents), self._stream_chunk_size):
+                    yield contents[start:start + self._stream_chunk_size]
+                return
+        stop = StopAfterKnown(self._stop_after_known) if self._stop_after_known is not None else None
+        queue = asyncio.Queue(maxsize=self._stream_chunk_size)
+        done = object()
+        failures = []
+
+        async def produce():
+            try:
+                async for content in content_provider.aget_content_iter(stop):
+                    await queue.put(content)
+            except Exception as e:
+                failures.append(e)
+            await queue.put(done)
+
+        producer = asyncio.create_task(produce())
+        fetched = []
+        try:
+            finished = False
+            while not finished:
+                chunk = []
+                with metrics.timer('reporter_stage_seconds', stage='fetch', provider=content_provider.name()):
+                    while len(chunk) < self._stream_chunk_size:
+                        content = await queue.get()
+                        if content is done:
+                            finished = True
+                            break
+                        chunk.append(content)
+                fetched.extend(chunk)
+                if chunk:
+                    yield chunk
+            if failures:
+                raise failures[0]
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+        if self._run_journal is not None:
+            await asyncio.to_thread(self._run_journal.record_contents, content_provider.name(), fetched)
+
+    async def agenerate_posts(self, contents, on_post=None):
+        # on_post, when given, is awaited with (index, post) as each post is ready.
+        async def ready(indexes, posts):
+            if on_post is not None:
+                for index, post in zip(indexes, posts):
+                    await on_post(index, post)
+
+        if self._batch_size == 1:
+            async def generate(index, content):
+                post = await self.agenerate_post(content)
+                await ready([index], [post])
+                return post
+
+            return await self._gather_or_cancel(generate(index, content) for index, content in enumerate(contents))
+
+        posts = [None] * len(contents)
+        if self._llm_cache is not None:
+            keys = [self.cache_key(content) for content in contents]
+            posts = await asyncio.to_thread(lambda: [self._llm_cache.get(key) for key in keys])
+            cached = [index for index, post in enumerate(posts) if post is not None]
+            await ready(cached, [posts[index] for index in cached])
+        missing = [index for index, post in enumerate(posts) if post is None]
+
+        async def generate_batch(batch):
+            batch_posts = await self._agenerate_batch([contents[index] for index in batch])
+            for index, post in zip(batch, batch_posts):
+                posts[index] = post
+            if self._llm_cache is not None:
+                await asyncio.to_thread(lambda: [self._llm_cache.set(keys[index], posts[index]) for index in batch])
+            await ready(batch, batch_posts)
+
+        await self._gather_or_cancel(generate_batch(missing[start:start + self._batch_size]) for start in range(0, len(missing), self._batch_size))
+        return posts
+
+    async def _gather_or_cancel(self, coroutines):
+        # Unlike a bare gather, a failure cancels the remaining generations
+        # instead of leaving them to report after their provider has given up.
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _agenerate_batch(self, contents):
+        posts = await self._aapply(contents)
+        if posts is None:
+            # One bad output shouldn't cost the whole batch, retry item by item.
+            posts = await asyncio.gather(*(self._agenerate_post(content) for content in contents))
+        return posts
+
+    async def _aapply(self, contents):
+        async with self._generation_slots:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.aacquire(sum(self.estimate_tokens(content) for content in contents))
+            inputs = [content.copy() for content in contents]
+            try:
+                metrics.increment('reporter_llm_calls_total', mode='batch')
+                with metrics.timer('reporter_stage_seconds', stage='generate_batch'):
+                    if self._chain_supports_async and hasattr(self._llm_chain, 'aapply'):
+                        outputs = await self._llm_chain.aapply(inputs)
+                    else:
+                        outputs = await asyncio.to_thread(self._llm_chain.apply, inputs)
+                output_key = self._llm_chain._run_output_key
+                posts = [output[output_key] for output in outputs]
+                if len(posts) != len(contents) or not all(isinstance(post, str) for post in posts):
+                    raise ValueError(f'expected {len(contents)} posts, got {posts}')
+                metrics.increment('reporter_posts_generated_total', len(posts))
+                return posts
+            except Exception as e:
+                metrics.increment('reporter_errors_total', stage='generate_batch')
+                self._logger.warning(f'Batch of {len(contents)} contents failed, generating them one by one: {e}')
+                return None
+
+    async def agenerate_post(self, content):
+        # Posts are cached as soon as they are generated, so a run that dies
+        # before save_reports doesn't pay for them again on the next run.
+        if self._llm_cache is None:
+            return await self._agenerate_post(content)
+        key = self.cache_key(content)
+        post = await asyncio.to_thread(self._llm_cache.get, key)
+        metrics.increment('reporter_llm_cache_total', result='miss' if post is None else 'hit')
+        if post is None:
+            post = await self._agenerate_post(content)
+            await asyncio.to_thread(self._llm_cache.set, key, post)
+        return post
+
+    async def _agenerate_post(self, content):
+        async with self._generation_slots:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.aacquire(self.estimate_tokens(content))
+            metrics.increment('reporter_llm_calls_total', mode='single')
+            with metrics.timer('reporter_stage_seconds', stage='generate'):
+                post = await self._arun_chain(content)
+            metrics.increment('reporter_posts_generated_total')
+            return post
+
+    async def _arun_chain(self, content):
+        if self._chain_supports_async:
+            try:
+                return await self._llm_chain.arun(content.copy())
+            except NotImplementedError:
+                # Chains without an async implementation run in a worker thread.
+                self._chain_supports_async = False
+        return await asyncio.to_thread(self._llm_chain.run, content.copy())
+
+    def prompt_template(self):
+        prompt = getattr(self._llm_chain, 'prompt', None)
+        return getattr(prompt, 'template', '')
+
+    def model_parameters(self):
+        llm = getattr(self._llm_chain, 'llm', None)
+        try:
+            return llm.dict() if llm is not None else {}
+        except NotImplementedError:
+            return {'_type': type(llm).__name__}
+
+    def cache_key(self, content):
+        return LLMCache.key(self.prompt_template(), self.model_parameters(), self.create_id(content))
+
+    def estimate_tokens(self, content):
+        return RateLimiter.estimate_tokens(self.prompt_template() + json.dumps(content))
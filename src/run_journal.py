@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+from src.json_lines import load_json_lines
+
+class RunJournal:
+    """Append-only record of a report run, used to resume it after a crash.
+
+    It keeps the contents fetched from each provider, the posts generated for
+    them and the providers whose reports were saved, one JSON object per line.
+    A restarted run reuses all of it instead of fetching and generating again.
+    clear() removes the journal once a run has finished; after a run where some
+    providers failed, forget() drops what the others no longer need.
+    """
+
+    def __init__(self, path: str, fsync: bool = False) -> None:
+        self._path = path
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        self._contents: Dict[str, List[Dict]] = {}
+        self._posts: Dict[str, Dict[str, str]] = {}
+        self._done = set()
+        for record in load_json_lines(self._path):
+            self._apply(record)
+
+    def _apply(self, record: Dict) -> None:
+        provider = record["provider"]
+        if record["type"] == "contents":
+            self._contents[provider] = record["contents"]
+        elif record["type"] == "post":
+            self._posts.setdefault(provider, {})[record["id"]] = record["post"]
+        elif record["type"] == "done":
+            self._done.add(provider)
+
+    def _append(self, record: Dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, sort_keys=True) + "\n")
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+            self._apply(record)
+
+    def get_contents(self, provider: str) -> Optional[List[Dict]]:
+        with self._lock:
+            contents = self._contents.get(provider)
+            return json.loads(json.dumps(contents)) if contents is not None else None
+
+    def record_contents(self, provider: str, contents: List[Dict]) -> None:
+        self._append({"type": "contents", "provider": provider, "contents": contents})
+
+    def get_posts(self, provider: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._posts.get(provider, {}))
+
+    def record_post(self, provider: str, identifier: str, post: str) -> None:
+        self._append({"type": "post", "provider": provider, "id": identifier, "post": post})
+
+    def is_done(self, provider: str) -> bool:
+        with self._lock:
+            return provider in self._done
+
+    def record_done(self, provider: str) -> None:
+        self._append({"type": "done", "provider": provider})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._file.close()
+            os.remove(self._path)
+            self._contents, self._posts, self._done = {}, {}, set()
+            self._file = open(self._path, "a", encoding="utf-8")
+
+    def forget(self, providers: List[str]) -> None:
+        """Drop every record of these providers and keep the others' for the next run."""
+        providers = set(providers)
+        with self._lock:
+            self._file.close()
+            self._contents = {provider: contents for provider, contents in self._contents.items() if provider not in providers}
+            self._posts = {provider: posts for provider, posts in self._posts.items() if provider not in providers}
+            self._done -= providers
+            records = [{"type": "contents", "provider": provider, "contents": contents} for provider, contents in self._contents.items()]
+            records += [{"type": "post", "provider": provider, "id": identifier, "post": post} for provider, posts in self._posts.items() for identifier, post in posts.items()]
+            records += [{"type": "done", "provider": provider} for provider in self._done]
+            temporary_path = self._path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                file.write("".join(json.dumps(record, sort_keys=True) + "\n" for record in records))
+                file.flush()
+                if self._fsync:
+                    os.fsync(file.fileno())
+            os.replace(temporary_path, self._path)
+            self._file = open(self._path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,160 @@
+import sqlite3
+import json
+import os
+import urllib.parse
+from typing import List, Dict, Set
+from src.db_backend_interface import DatabaseBackend
+from datetime import datetime
+
+class SQLiteBackend(DatabaseBackend):
+    # Stay below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds.
+    MAX_QUERY_PARAMETERS = 900
+
+    def __init__(self, path: str) -> None:
+        # The connection may be opened in one thread and used in another; callers
+        # such as DataStorage serialize access to it.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets readers (broadcaster, dashboards) keep reading while the
+        # reporter writes, and makes each insert an append to the log.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS reports (id TEXT NOT NULL, timestamp NUMERIC NOT NULL, item TEXT NOT NULL)")
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS reports_id ON reports (id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS reports_timestamp ON reports (timestamp)")
+            # Every write to reports bumps a persisted counter, which is what
+            # signature() reads; file stats change on each WAL checkpoint.
+            self.conn.execute("CREATE TABLE IF NOT EXISTS changes (counter INTEGER NOT NULL)")
+            self.conn.execute("INSERT INTO changes (counter) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM changes)")
+            for event in ["INSERT", "UPDATE", "DELETE"]:
+                self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS reports_{event.lower()}_changes AFTER {event} ON reports BEGIN UPDATE changes SET counter = counter + 1; END")
+
+    @staticmethod
+    def signature(path: str) -> List:
+        if not os.path.exists(path):
+            return []
+        connection = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            counter = connection.execute("SELECT counter FROM changes").fetchone()
+        except sqlite3.OperationalError:
+            # Not opened by this backend yet, so there is no counter to trust.
+            counter = None
+        finally:
+            connection.close()
+        return [[os.path.basename(path), counter[0] if counter else None]]
+
+    def validate_timestamp(self, timestamp: int) -> None:
+        try:
+            datetime.utcfromtimestamp(timestamp)
+        except (ValueError, TypeError, OverflowError):
+            raise ValueError("Invalid timestamp value")
+
+    def validate_from_and_to_date(self, from_date, to_date):
+        if from_date is not None:
+            self.validate_timestamp(from_date)
+        if to_date is not None:
+            self.validate_timestamp(to_date)
+        if from_date is not None and to_date is not None:
+            if from_date > to_date:
+                raise ValueError("from_date must be less than to_date")
+
+    def validate_id(self, identifier: str) -> None:
+        if not isinstance(identifier, str):
+            raise ValueError("ID must be a string")
+        if not identifier:
+            raise ValueError("ID must not be empty")
+
+    def validate_item(self, item: Dict) -> None:
+        if 'id' not in item:
+            raise ValueError("ID must be present in the item")
+        self.validate_id(item['id'])
+        if 'timestamp' not in item:
+            raise ValueError("Timestamp must be present in the item")
+        self.validate_timestamp(item['timestamp'])
+
+    def _row(self, item: Dict):
+        return (item['id'], item['timestamp'], json.dumps(item, sort_keys=True))
+
+    def _date_condition(self, from_date: int = None, to_date: int = None):
+        conditions, parameters = [], []
+        if from_date is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(from_date)
+        if to_date is not None:
+            conditions.append("timestamp <= ?")
+            parameters.append(to_date)
+        return " AND ".join(conditions), parameters
+
+    def insert(self, item: Dict) -> None:
+        self.validate_item(item)
+        try:
+            with self.conn:
+                self.conn.execute("INSERT INTO reports (id, timestamp, item) VALUES (?, ?, ?)", self._row(item))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"ID {item['id']} already exists")
+
+    def insert_many(self, items: List[Dict]) -> None:
+        for item in items:
+            self.validate_item(item)
+        try:
+            with self.conn:
+                self.conn.executemany("INSERT INTO reports (id, timestamp, item) VALUES (?, ?, ?)", [self._row(item) for item in items])
+        except sqlite3.IntegrityError:
+            raise ValueError("Some of the IDs already exist")
+
+    def upsert_many(self, items: List[Dict]) -> None:
+        for item in items:
+            self.validate_item(item)
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO reports (id, timestamp, item) VALUES (?, ?, ?)", [self._row(item) for item in items])
+
+    def get(self) -> List[Dict]:
+        rows = self.conn.execute("SELECT item FROM reports ORDER BY rowid")
+        return [json.loads(item) for item, in rows]
+
+    def get_one(self, identifier: str) -> Dict:
+        self.validate_id(identifier)
+        row = self.conn.execute("SELECT item FROM reports WHERE id = ?", (identifier,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def exists(self, identifier: str) -> bool:
+        self.validate_id(identifier)
+        return self.conn.execute("SELECT 1 FROM reports WHERE id = ?", (identifier,)).fetchone() is not None
+
+    def exists_many(self, identifiers: List[str]) -> Set[str]:
+        for identifier in identifiers:
+            self.validate_id(identifier)
+        identifiers = list(set(identifiers))
+        found = set()
+        for start in range(0, len(identifiers), self.MAX_QUERY_PARAMETERS):
+            chunk = identifiers[start:start + self.MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT id FROM reports WHERE id IN ({placeholders})", chunk)
+            found.update(identifier for identifier, in rows)
+        return found
+
+    def delete(self, identifier: str) -> None:
+        self.validate_id(identifier)
+        with self.conn:
+            self.conn.execute("DELETE FROM reports WHERE id = ?", (identifier,))
+
+    def get_by_date(self, from_date: int = None, to_date: int = None) -> List[Dict]:
+        self.validate_from_and_to_date(from_date, to_date)
+        if from_date is None and to_date is None:
+            return self.get()
+
+        condition, parameters = self._date_condition(from_date, to_date)
+        rows = self.conn.execute(f"SELECT item FROM reports WHERE {condition} ORDER BY timestamp, rowid", parameters)
+        return [json.loads(item) for item, in rows]
+
+    def delete_by_date(self, from_date: int = None, to_date: int = None) -> None:
+        self.validate_from_and_to_date(from_date, to_date)
+        if from_date is None and to_date is None:
+            return
+
+        condition, parameters = self._date_condition(from_date, to_date)
+        with self.conn:
+            self.conn.execute(f"DELETE FROM reports WHERE {condition}", parameters)
+
+    def close(self) -> None:
+        self.conn.close()
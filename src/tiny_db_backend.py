@@ -1,11 +1,118 @@
-from tinydb import TinyDB, Query
-from typing import List, Dict
+from tinydb import TinyDB
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import Storage
+from tinydb.table import Document
+from typing import List, Dict, Set, Tuple
 from src.db_backend_interface import DatabaseBackend
+from src.metrics import metrics
 from datetime import datetime
+import atexit
+import bisect
+import copy
+import json
+import os
+import time
+
+# Write-behind backends still open, flushed when the interpreter exits. The
+# references are strong so a backend dropped without close() still gets its
+# buffered writes to disk; close() takes it out.
+_write_behind_backends = set()
+
+@atexit.register
+def _flush_write_behind_backends() -> None:
+    for backend in list(_write_behind_backends):
+        backend.flush()
+
+
+class AtomicJSONStorage(Storage):
+    """JSON storage that never leaves a half-written file behind.
+
+    Each write goes to a temporary file that is fsynced and then renamed over
+    the database file, so readers and crashes only ever see a complete document.
+    """
+
+    def __init__(self, path: str, **kwargs) -> None:
+        self._path = path
+        self.kwargs = kwargs
+
+    def read(self):
+        try:
+            with open(self._path, encoding="utf-8") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+        return json.loads(content) if content else None
+
+    def write(self, data) -> None:
+        temporary_path = self._path + ".tmp"
+        with metrics.timer("tinydb_file_write_seconds"):
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                file.write(json.dumps(data, **self.kwargs))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self._path)
+
 
 class TinyDBBackend(DatabaseBackend):
-    def __init__(self, path: str) -> None:
-        self.db = TinyDB(path, sort_keys=True)
+    def __init__(self, path: str, write_behind: bool = False, flush_every: int = 100, flush_interval: float = None) -> None:
+        if not isinstance(flush_every, int) or flush_every < 1:
+            raise ValueError("flush_every must be a positive integer")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+
+        self._write_behind = write_behind
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        if write_behind:
+            # Mutations stay in memory until flush_every writes have been
+            # buffered, flush_interval seconds have passed, or flush() is called.
+            # The interval is only checked on writes: a buffer left by the last
+            # write before an idle spell waits for the next write, flush(),
+            # close() or interpreter exit.
+            self.db = TinyDB(path, storage=CachingMiddleware(AtomicJSONStorage), sort_keys=True)
+            self.db.storage.WRITE_CACHE_SIZE = flush_every
+            _write_behind_backends.add(self)
+        else:
+            self.db = TinyDB(path, sort_keys=True)
+        # In-memory mirror of the table, built once on open and kept in sync on
+        # every mutation, so lookups by id or by date don't scan (or re-read)
+        # the file. The timestamp index is a list of (timestamp, doc_id) pairs
+        # kept sorted, so date ranges are found by bisection.
+        self._documents: Dict[int, Document] = {}
+        self._id_index: Dict[str, List[int]] = {}
+        self._timestamp_index: List[Tuple[int, int]] = []
+        for document in self.db.all():
+            self._index_document(document)
+
+    def _index_document(self, document: Document) -> None:
+        self._documents[document.doc_id] = document
+        self._id_index.setdefault(document.get('id'), []).append(document.doc_id)
+        if document.get('timestamp') is not None:
+            bisect.insort(self._timestamp_index, (document['timestamp'], document.doc_id))
+
+    def _unindex_doc_ids(self, doc_ids: List[int], timestamp_indexed: bool = True) -> None:
+        for doc_id in doc_ids:
+            document = self._documents.pop(doc_id)
+            identifier = document.get('id')
+            self._id_index[identifier].remove(doc_id)
+            if not self._id_index[identifier]:
+                del self._id_index[identifier]
+            if timestamp_indexed and document.get('timestamp') is not None:
+                position = bisect.bisect_left(self._timestamp_index, (document['timestamp'], doc_id))
+                del self._timestamp_index[position]
+
+    def _timestamp_range(self, from_date: int = None, to_date: int = None) -> Tuple[int, int]:
+        start = 0 if from_date is None else bisect.bisect_left(self._timestamp_index, (from_date,))
+        end = len(self._timestamp_index) if to_date is None else bisect.bisect_right(self._timestamp_index, (to_date, float('inf')))
+        return start, end
+
+    def _after_write(self) -> None:
+        if self._write_behind and self._flush_interval is not None:
+            if time.monotonic() - self._last_flush >= self._flush_interval:
+                self.flush()
+
+    def _copy(self, document: Document) -> Document:
+        return Document(copy.deepcopy(dict(document)), doc_id=document.doc_id)
 
     def validate_timestamp(self, timestamp: int) -> None:
         try:
@@ -39,51 +146,85 @@ class TinyDBBackend(DatabaseBackend):
 
     def insert(self, item: Dict) -> None:
         self.validate_item(item)
-        self.db.insert(item)
+        with metrics.timer("tinydb_operation_seconds", operation="insert"):
+            doc_id = self.db.insert(item)
+        self._index_document(Document(copy.deepcopy(item), doc_id=doc_id))
+        self._after_write()
+
+    def insert_many(self, items: List[Dict]) -> None:
+        for item in items:
+            self.validate_item(item)
+        # TinyDB rewrites the whole file per write, so the batch goes in as one.
+        with metrics.timer("tinydb_operation_seconds", operation="insert_many"):
+            doc_ids = self.db.insert_multiple(items)
+        for doc_id, item in zip(doc_ids, items):
+            self._index_document(Document(copy.deepcopy(item), doc_id=doc_id))
+        self._after_write()
+
+    def upsert_many(self, items: List[Dict]) -> None:
+        for item in items:
+            self.validate_item(item)
+        new_items = {}
+        for item in items:
+            if item['id'] not in self._id_index and item['id'] not in new_items:
+                new_items[item['id']] = item
+        if new_items:
+            self.insert_many(list(new_items.values()))
     
     def get(self) -> List[Dict]:
         return self.db.all()
 
     def get_one(self, identifier: str) -> Dict:
         self.validate_id(identifier)
-        item_query = Query()
-        result = self.db.search(item_query.id == identifier)
-        return result[0] if result else None
+        doc_ids = self._id_index.get(identifier)
+        return self._copy(self._documents[doc_ids[0]]) if doc_ids else None
 
     def exists(self, identifier: str) -> bool:
         self.validate_id(identifier)
-        item_query = Query()
-        return bool(self.db.search(item_query.id == identifier))
+        return identifier in self._id_index
+
+    def exists_many(self, identifiers: List[str]) -> Set[str]:
+        for identifier in identifiers:
+            self.validate_id(identifier)
+        return {identifier for identifier in identifiers if identifier in self._id_index}
     
     def delete(self, identifier: str) -> None:
         self.validate_id(identifier)
-        item_query = Query()
-        self.db.remove(item_query.id == identifier)
+        doc_ids = list(self._id_index.get(identifier, []))
+        if doc_ids:
+            with metrics.timer("tinydb_operation_seconds", operation="delete"):
+                self.db.remove(doc_ids=doc_ids)
+            self._unindex_doc_ids(doc_ids)
+            self._after_write()
 
     def get_by_date(self, from_date: int = None, to_date: int = None) -> List[Dict]:
         self.validate_from_and_to_date(from_date, to_date)
-        
-        item_query = Query()
-        if from_date is not None and to_date is not None:
-            results = self.db.search((item_query.timestamp >= from_date) & (item_query.timestamp <= to_date))
-        elif from_date is not None:
-            results = self.db.search(item_query.timestamp >= from_date)
-        elif to_date is not None:
-            results = self.db.search(item_query.timestamp <= to_date)
-        else:
-            results = self.db.all()
-
-        
-        return results
-
+        if from_date is None and to_date is None:
+            return self.db.all()
 
+        start, end = self._timestamp_range(from_date, to_date)
+        return [self._copy(self._documents[doc_id]) for _, doc_id in self._timestamp_index[start:end]]
 
     def delete_by_date(self, from_date: int = None, to_date: int = None) -> None:
         self.validate_from_and_to_date(from_date, to_date)
-        item_query = Query()
-        if from_date is not None and to_date is not None:
-            self.db.remove((item_query.timestamp >= from_date) & (item_query.timestamp <= to_date))
-        elif from_date is not None:
-            self.db.remove(item_query.timestamp >= from_date)
-        elif to_date is not None:
-            self.db.remove(item_query.timestamp <= to_date)
\ No newline at end of file
+        if from_date is None and to_date is None:
+            return
+
+        start, end = self._timestamp_range(from_date, to_date)
+        doc_ids = [doc_id for _, doc_id in self._timestamp_index[start:end]]
+        if doc_ids:
+            with metrics.timer("tinydb_operation_seconds", operation="delete_by_date"):
+                self.db.remove(doc_ids=doc_ids)
+            del self._timestamp_index[start:end]
+            self._unindex_doc_ids(doc_ids, timestamp_indexed=False)
+            self._after_write()
+
+    def flush(self) -> None:
+        if self._write_behind:
+            with metrics.timer("tinydb_operation_seconds", operation="flush"):
+                self.db.storage.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        _write_behind_backends.discard(self)
+        self.db.close()
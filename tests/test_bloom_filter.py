@@ -0,0 +1,48 @@
+from src.bloom_filter import BloomFilter
+from unittest import TestCase
+import os
+class TestBloomFilter(TestCase):
+	def tearDown(self):
+		if os.path.exists("test_filter.bloom"):
+			os.remove("test_filter.bloom")
+
+	def test_invalid_parameters(self):
+		with self.assertRaises(ValueError):
+			BloomFilter(capacity = 0)
+		with self.assertRaises(ValueError):
+			BloomFilter(error_rate = 1)
+
+	def test_no_false_negatives(self):
+		bloom_filter = BloomFilter(capacity = 1000)
+		bloom_filter.update(f"id{i}" for i in range(1000))
+		self.assertTrue(all(f"id{i}" in bloom_filter for i in range(1000)))
+		self.assertEqual(bloom_filter.count, 1000)
+		self.assertFalse(bloom_filter.is_full())
+		bloom_filter.add("one more")
+		self.assertTrue(bloom_filter.is_full())
+
+	def test_false_positive_rate(self):
+		bloom_filter = BloomFilter(capacity = 1000, error_rate = 0.01)
+		bloom_filter.update(f"id{i}" for i in range(1000))
+		false_positives = sum(f"other{i}" in bloom_filter for i in range(10000))
+		self.assertLess(false_positives, 300)
+
+	def test_save_and_load(self):
+		bloom_filter = BloomFilter(capacity = 100)
+		bloom_filter.update(["id1", "id2"])
+		bloom_filter.save("test_filter.bloom", {"signature": [["test.json", 10, 20]]})
+
+		loaded, metadata = BloomFilter.load("test_filter.bloom")
+		self.assertEqual(metadata, {"signature": [["test.json", 10, 20]]})
+		self.assertEqual(loaded.count, 2)
+		self.assertIn("id1", loaded)
+		self.assertIn("id2", loaded)
+		self.assertNotIn("id3", loaded)
+
+	def test_load_corrupted_file(self):
+		bloom_filter = BloomFilter(capacity = 100)
+		bloom_filter.save("test_filter.bloom")
+		with open("test_filter.bloom", "ab") as file:
+			file.write(b"extra")
+		with self.assertRaises(ValueError):
+			BloomFilter.load("test_filter.bloom")
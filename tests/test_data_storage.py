@@ -3,11 +3,14 @@ from src.content_provider.papers_with_code_content_provider import PapersWithCod
 from src.data_storage import DataStorage
 from src.db_backend_interface import DatabaseBackend
 from src.tiny_db_backend import TinyDBBackend
+from src.sqlite_backend import SQLiteBackend
 from unittest import TestCase, mock
 import requests
 import json
 import os
 import glob
+import asyncio
+import threading
 class TestDataStorage(TestCase):
 	def tearDown(self):
 		files = glob.glob('data/*')
@@ -92,4 +95,344 @@ class TestDataStorage(TestCase):
 
 		self.assertEqual(dataStorage.exists(storage_file_name,"id1"), True)
 		self.assertEqual(dataStorage.exists(storage_file_name,"id2"), True)
-		self.assertEqual(dataStorage.exists(storage_file_name,"id3"), False)
\ No newline at end of file
+		self.assertEqual(dataStorage.exists(storage_file_name,"id3"), False)
+
+	def test_invalid_max_open_backends(self):
+		with self.assertRaises(ValueError):
+			DataStorage(folder = "data/", max_open_backends = 0)
+
+	def test_storage_file_is_opened_once(self):
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		mock_backend = mock.Mock(wraps=TinyDBBackend)
+		with mock.patch.dict(DataStorage.BACKENDS, {"tinydb": (mock_backend, ".json")}):
+			dataStorage = DataStorage(folder = "data/")
+			dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+			dataStorage.exists(storage_file_name, "id1")
+			dataStorage.exists(storage_file_name, "id3")
+		self.assertEqual(mock_backend.call_count, 1)
+
+	def test_least_recently_used_backend_is_evicted(self):
+		dataStorage = DataStorage(folder = "data/", max_open_backends = 2)
+		test1 = dataStorage.get_backend("test1")
+		test2 = dataStorage.get_backend("test2")
+		self.assertIs(dataStorage.get_backend("test1"), test1)
+		with mock.patch.object(test2, 'close', wraps=test2.close) as mock_close:
+			dataStorage.get_backend("test3")
+		mock_close.assert_called_once()
+		self.assertIs(dataStorage.get_backend("test1"), test1)
+		self.assertIsNot(dataStorage.get_backend("test2"), test2)
+
+	def test_close_on_context_exit(self):
+		with mock.patch('src.tiny_db_backend.TinyDBBackend.close') as mock_close:
+			with DataStorage(folder = "data/") as dataStorage:
+				dataStorage.get_backend("test1")
+				dataStorage.get_backend("test2")
+			self.assertEqual(mock_close.call_count, 2)
+		self.assertEqual(len(dataStorage._backends), 0)
+
+	def test_save_reports_writes_once(self):
+		dataStorage = DataStorage(folder = "data/")
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000},
+			{'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 3000}
+		]
+		db = dataStorage.get_backend(storage_file_name)
+		with mock.patch.object(db.db.storage, 'write', wraps=db.db.storage.write) as mock_write:
+			dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+		self.assertEqual(mock_write.call_count, 1)
+		self.assertEqual(TinyDBBackend("data/"+storage_file_name+".json").get(), items)
+
+	def test_save_reports_does_not_write_partially_on_invalid_report(self):
+		dataStorage = DataStorage(folder = "data/")
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2'}
+		]
+		with self.assertRaises(ValueError):
+			dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+		self.assertFalse(dataStorage.exists(storage_file_name, "id1"))
+
+
+	def test_invalid_backend(self):
+		with self.assertRaises(ValueError):
+			DataStorage(folder = "data/", backend = "csv")
+
+	def test_sqlite_backend(self):
+		dataStorage = DataStorage(folder = "data/", backend = "sqlite")
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+		dataStorage.close()
+
+		databaseBackend = SQLiteBackend("data/"+storage_file_name+".sqlite3")
+		self.assertEqual(databaseBackend.get(), items)
+		databaseBackend.close()
+
+	def test_exists_many_function(self):
+		dataStorage = DataStorage(folder = "data/")
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+
+		self.assertEqual(dataStorage.exists_many(storage_file_name, ["id1", "id2", "id3"]), {"id1", "id2"})
+		with self.assertRaises(ValueError):
+			dataStorage.exists_many(storage_file_name, "id1")
+		with self.assertRaises(ValueError):
+			dataStorage.exists_many(1, ["id1"])
+
+	def test_invalid_shard_by(self):
+		with self.assertRaises(ValueError):
+			DataStorage(folder = "data/", shard_by = "week")
+
+	def test_get_by_date(self):
+		dataStorage = DataStorage(folder = "data/")
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+
+		self.assertEqual(dataStorage.get_by_date(storage_file_name, from_date = 1500), [items[1]])
+		self.assertEqual(dataStorage.get_by_date(storage_file_name), items)
+		with self.assertRaises(ValueError):
+			dataStorage.get_by_date(storage_file_name, from_date = 2000, to_date = 1000)
+
+	def test_sharded_reports_are_saved_per_month(self):
+		dataStorage = DataStorage(folder = "data/", shard_by = "month")
+		storage_file_name = "test"
+		january = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1673740800}
+		february = {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 1676419200}
+		march = {'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 1678838400}
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = [january, february, march])
+
+		self.assertEqual(dataStorage.get_shards(storage_file_name), ["2023-01", "2023-02", "2023-03"])
+		self.assertEqual(TinyDBBackend("data/test.2023-02.json").get(), [february])
+		self.assertFalse(os.path.exists("data/test.json"))
+
+	def test_sharded_dedup_across_shards(self):
+		dataStorage = DataStorage(folder = "data/", shard_by = "month")
+		storage_file_name = "test"
+		january = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1673740800}
+		january_again_in_march = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1678838400}
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = [january])
+
+		reopened = DataStorage(folder = "data/", shard_by = "month")
+		reopened.save_reports(storage_file_name = storage_file_name, reports = [january_again_in_march])
+		self.assertEqual(reopened.get_shards(storage_file_name), ["2023-01"])
+		self.assertTrue(reopened.exists(storage_file_name, "id1"))
+		self.assertFalse(reopened.exists(storage_file_name, "id2"))
+		self.assertEqual(reopened.exists_many(storage_file_name, ["id1", "id2"]), {"id1"})
+
+	def test_sharded_get_by_date_only_opens_overlapping_shards(self):
+		dataStorage = DataStorage(folder = "data/", shard_by = "month")
+		storage_file_name = "test"
+		january = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1673740800}
+		february = {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 1676419200}
+		march = {'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 1678838400}
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = [january, february, march])
+
+		reopened = DataStorage(folder = "data/", shard_by = "month")
+		with mock.patch.object(reopened, 'get_backend', wraps=reopened.get_backend) as mock_get_backend:
+			self.assertEqual(reopened.get_by_date(storage_file_name, from_date = 1676000000), [february, march])
+			self.assertEqual(reopened.get_by_date(storage_file_name, from_date = 1676000000, to_date = 1677000000), [february])
+		self.assertEqual(mock_get_backend.call_args_list, [mock.call("test", "2023-02"), mock.call("test", "2023-03"), mock.call("test", "2023-02")])
+		self.assertEqual(reopened.get_by_date(storage_file_name), [january, february, march])
+
+	def test_write_behind_backend_options(self):
+		dataStorage = DataStorage(folder = "data/", backend_options = {"write_behind": True})
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+		self.assertTrue(dataStorage.exists(storage_file_name, "id1"))
+		self.assertFalse(os.path.exists("data/test.json"))
+
+		dataStorage.flush()
+		self.assertEqual(TinyDBBackend("data/test.json").get(), items)
+
+	def test_invalid_backend_options(self):
+		with self.assertRaises(TypeError):
+			DataStorage(folder = "data/", backend_options = ["write_behind"])
+
+	def test_sharded_write_behind_manifest_waits_for_flush(self):
+		dataStorage = DataStorage(folder = "data/", shard_by = "month", backend_options = {"write_behind": True})
+		storage_file_name = "test"
+		january = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1673740800}
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = [january])
+		self.assertTrue(dataStorage.exists(storage_file_name, "id1"))
+		self.assertFalse(DataStorage(folder = "data/", shard_by = "month").exists(storage_file_name, "id1"))
+
+		dataStorage.flush()
+		self.assertTrue(DataStorage(folder = "data/", shard_by = "month").exists(storage_file_name, "id1"))
+		self.assertEqual(TinyDBBackend("data/test.2023-01.json").get(), [january])
+
+	def test_known_keys(self):
+		dataStorage = DataStorage(folder = "data/")
+		storage_file_name = "test"
+		dataStorage.add_known_keys(storage_file_name, ["/paper/1", "/paper/2", "/paper/1"])
+		dataStorage.add_known_keys(storage_file_name, ["/paper/2", "/paper/3"])
+		known_keys = dataStorage.known_keys(storage_file_name)
+		self.assertTrue(known_keys("/paper/3"))
+		self.assertFalse(known_keys("/paper/4"))
+		self.assertFalse(dataStorage.is_known_key("other", "/paper/1"))
+
+		with open("data/test.keys") as file:
+			self.assertEqual(file.read().splitlines(), ["/paper/1", "/paper/2", "/paper/3"])
+		self.assertTrue(DataStorage(folder = "data/").is_known_key(storage_file_name, "/paper/1"))
+		with self.assertRaises(ValueError):
+			dataStorage.add_known_keys(storage_file_name, ["two\nlines"])
+
+	def test_write_behind_known_keys_wait_for_flush(self):
+		dataStorage = DataStorage(folder = "data/", backend_options = {"write_behind": True})
+		dataStorage.add_known_keys("test", ["/paper/1"])
+		self.assertTrue(dataStorage.is_known_key("test", "/paper/1"))
+		self.assertFalse(DataStorage(folder = "data/").is_known_key("test", "/paper/1"))
+
+		dataStorage.flush()
+		self.assertTrue(DataStorage(folder = "data/").is_known_key("test", "/paper/1"))
+
+	def test_id_filter_answers_new_ids_without_opening_the_store(self):
+		dataStorage = DataStorage(folder = "data/", id_filter = True)
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = items)
+		self.assertTrue(os.path.exists("data/test.bloom"))
+
+		reopened = DataStorage(folder = "data/", id_filter = True)
+		with mock.patch.object(reopened, 'get_backend', wraps=reopened.get_backend) as mock_get_backend:
+			self.assertFalse(reopened.exists(storage_file_name, "id3"))
+			self.assertEqual(reopened.exists_many(storage_file_name, ["id3", "id4"]), set())
+			mock_get_backend.assert_not_called()
+			self.assertTrue(reopened.exists(storage_file_name, "id1"))
+			self.assertEqual(reopened.exists_many(storage_file_name, ["id2", "id3"]), {"id2"})
+			mock_get_backend.assert_called_with(storage_file_name)
+
+	def test_id_filter_is_rebuilt_when_the_store_changed(self):
+		dataStorage = DataStorage(folder = "data/", id_filter = True)
+		storage_file_name = "test"
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = [{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}])
+
+		other_writer = TinyDBBackend("data/test.json")
+		other_writer.insert({'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000})
+
+		reopened = DataStorage(folder = "data/", id_filter = True)
+		self.assertTrue(reopened.exists(storage_file_name, "id2"))
+		self.assertEqual(reopened.exists_many(storage_file_name, ["id1", "id2", "id3"]), {"id1", "id2"})
+
+	def test_id_filter_survives_reopening_each_backend(self):
+		item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+		for backend in ["tinydb", "sqlite", "jsonl"]:
+			dataStorage = DataStorage(folder = "data/", backend = backend, id_filter = True)
+			dataStorage.save_reports(storage_file_name = backend, reports = [item])
+			dataStorage.close()
+
+			reopened = DataStorage(folder = "data/", backend = backend, id_filter = True)
+			with mock.patch.object(reopened, '_build_id_filter', wraps=reopened._build_id_filter) as mock_build_id_filter:
+				self.assertFalse(reopened.exists(backend, "id2"))
+				self.assertTrue(reopened.exists(backend, "id1"))
+			mock_build_id_filter.assert_not_called()
+			reopened.close()
+
+	def test_sqlite_id_filter_is_rebuilt_after_a_replaced_report(self):
+		dataStorage = DataStorage(folder = "data/", backend = "sqlite", id_filter = True)
+		dataStorage.save_reports("test", [{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}, {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}])
+		dataStorage.close()
+
+		other_writer = SQLiteBackend("data/test.sqlite3")
+		other_writer.delete('id2')
+		other_writer.insert({'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 3000})
+		other_writer.close()
+
+		reopened = DataStorage(folder = "data/", backend = "sqlite", id_filter = True)
+		self.assertTrue(reopened.exists("test", "id3"))
+		reopened.close()
+
+	def test_id_filter_with_shards(self):
+		dataStorage = DataStorage(folder = "data/", shard_by = "month", id_filter = True)
+		storage_file_name = "test"
+		january = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1673740800}
+		dataStorage.save_reports(storage_file_name = storage_file_name, reports = [january])
+
+		reopened = DataStorage(folder = "data/", shard_by = "month", id_filter = True)
+		with mock.patch.object(reopened, '_get_manifest', wraps=reopened._get_manifest) as mock_get_manifest:
+			self.assertFalse(reopened.exists(storage_file_name, "id2"))
+			mock_get_manifest.assert_not_called()
+		self.assertTrue(reopened.exists(storage_file_name, "id1"))
+
+	def test_different_storage_files_do_not_wait_for_each_other(self):
+		dataStorage = DataStorage(folder = "data/")
+		item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+		dataStorage.save_reports("test1", [item])
+		saved = threading.Event()
+
+		def save_other_file():
+			dataStorage.save_reports("test2", [item])
+			saved.set()
+
+		with dataStorage._lock("test1"):
+			thread = threading.Thread(target = save_other_file)
+			thread.start()
+			self.assertTrue(saved.wait(5))
+		thread.join()
+		self.assertTrue(dataStorage.exists("test2", "id1"))
+
+	def test_backends_in_use_are_not_evicted(self):
+		dataStorage = DataStorage(folder = "data/", max_open_backends = 1)
+		test1 = dataStorage.get_backend("test1")
+		acquired, release = threading.Event(), threading.Event()
+
+		def use_test1():
+			with dataStorage._lock("test1"):
+				acquired.set()
+				release.wait(5)
+
+		thread = threading.Thread(target = use_test1)
+		thread.start()
+		acquired.wait(5)
+		with mock.patch.object(test1, 'close') as mock_close:
+			dataStorage.get_backend("test2")
+			mock_close.assert_not_called()
+			release.set()
+			thread.join()
+			dataStorage.get_backend("test3")
+			mock_close.assert_called_once()
+		self.assertEqual(list(dataStorage._backends), ["test3"])
+
+	def test_async_wrappers(self):
+		dataStorage = DataStorage(folder = "data/")
+		storage_file_name = "test"
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+
+		async def run():
+			await dataStorage.asave_reports(storage_file_name, items)
+			await dataStorage.aflush()
+			return (
+				await dataStorage.aexists(storage_file_name, "id1"),
+				await dataStorage.aexists_many(storage_file_name, ["id1", "id3"]),
+				await dataStorage.aget_by_date(storage_file_name, from_date = 1500)
+			)
+
+		self.assertEqual(asyncio.run(run()), (True, {"id1"}, [items[1]]))
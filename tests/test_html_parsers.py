@@ -0,0 +1,71 @@
+from src.content_provider.html_parsers import BeautifulSoupParser, StreamingParser, create_parser
+from unittest import TestCase, skipUnless
+import importlib.util
+from bs4 import BeautifulSoup, FeatureNotFound
+def lxml_installed():
+	try:
+		BeautifulSoup("", "lxml")
+		return True
+	except FeatureNotFound:
+		return False
+
+LXML = lxml_installed()
+SELECTOLAX = importlib.util.find_spec("selectolax") is not None
+
+class TestHTMLParsers(TestCase):
+	def setUp(self):
+		with open("tests/fixtures/paperswithcode_listing.html", "rb") as file:
+			self.listing = file.read()
+		with open("tests/fixtures/paperswithcode_paper.html", "rb") as file:
+			self.paper = file.read()
+		self.reference = BeautifulSoupParser("html.parser")
+
+	def assert_same_output(self, parser):
+		self.assertEqual(parser.parse_listing(self.listing), self.reference.parse_listing(self.listing))
+		self.assertEqual(parser.parse_paper(self.paper), self.reference.parse_paper(self.paper))
+
+	def test_reference_output(self):
+		cards = self.reference.parse_listing(self.listing)
+		self.assertEqual(len(cards), 40)
+		self.assertEqual(cards[0]["uid"], "/paper/neural-0")
+		self.assertEqual(cards[0]["github_link"], "https://github.com/owner0/repo0")
+		self.assertEqual(cards[0]["media"], "https://production-media.paperswithcode.com/thumbnails/papers/2300.00000.jpg")
+		self.assertEqual(len(cards[0]["tags"]), 3)
+		self.assertIsInstance(cards[0]["stars"], int)
+		abstract, arxiv_url = self.reference.parse_paper(self.paper)
+		self.assertEqual(arxiv_url, "https://arxiv.org/pdf/2310.01234v1.pdf")
+		self.assertTrue(abstract.endswith("Read more — (“quoted”)"))
+
+	def test_streaming_parser(self):
+		self.assert_same_output(create_parser("stream"))
+
+	def test_streaming_parser_small_chunks(self):
+		# Text and tags cut by chunk boundaries must come out the same.
+		for chunk_size in [1, 7, 100]:
+			self.assert_same_output(StreamingParser(chunk_size))
+
+	def test_streaming_parser_stops_early(self):
+		# Nothing after the card container is needed, so it is never parsed.
+		end = self.listing.index(b"<footer")
+		self.assertEqual(StreamingParser().parse_listing(self.listing[:end] + b"<div class=\"infinite-container\"><div class=\"row infinite-item item paper-card\">"), self.reference.parse_listing(self.listing))
+
+	def test_streaming_parser_missing_abstract(self):
+		with self.assertRaises(ValueError):
+			StreamingParser().parse_paper(b"<html><body><p>Not a paper</p></body></html>")
+
+	@skipUnless(LXML, "lxml is not installed")
+	def test_lxml_parser(self):
+		self.assert_same_output(create_parser("lxml"))
+
+	@skipUnless(SELECTOLAX, "selectolax is not installed")
+	def test_selectolax_parser(self):
+		self.assert_same_output(create_parser("selectolax"))
+
+	@skipUnless(not LXML, "lxml is installed")
+	def test_missing_lxml(self):
+		with self.assertRaises(ImportError):
+			create_parser("lxml")
+
+	def test_invalid_parser(self):
+		with self.assertRaises(ValueError):
+			create_parser("regex")
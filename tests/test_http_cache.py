@@ -0,0 +1,95 @@
+from src.content_provider.http_cache import HTTPCache
+from unittest import TestCase
+from unittest.mock import patch
+import requests
+import shutil
+import time
+class FakeSession:
+	def __init__(self):
+		self.calls = []
+		self.responses = {}
+
+	def get(self, url, headers=None, **kwargs):
+		self.calls.append((url, headers))
+		status_code, body, response_headers = self.responses[url]
+		response = requests.Response()
+		response.status_code = status_code
+		response._content = body
+		response.headers.update(response_headers)
+		return response
+
+class TestHTTPCache(TestCase):
+	def setUp(self):
+		self.folder = "test_http_cache"
+		self.session = FakeSession()
+
+	def tearDown(self):
+		shutil.rmtree(self.folder, ignore_errors=True)
+
+	def test_invalid_parameters(self):
+		with self.assertRaises(ValueError):
+			HTTPCache("")
+		with self.assertRaises(ValueError):
+			HTTPCache(self.folder, max_bytes = 0)
+
+	def test_ttl_by_url_pattern(self):
+		cache = HTTPCache(self.folder, ttls = [(r"/paper/", 3600), (r"/list", 60)])
+		self.assertEqual(cache.ttl("https://paperswithcode.com/paper/example"), 3600)
+		self.assertEqual(cache.ttl("https://paperswithcode.com/list"), 60)
+		self.assertEqual(cache.ttl("https://paperswithcode.com/"), 0)
+
+	def test_fresh_entries_are_served_without_a_request(self):
+		cache = HTTPCache(self.folder, ttls = [(r"/paper/", 3600)])
+		self.session.responses["https://example.com/paper/1"] = (200, b"paper 1", {"Content-Type": "text/html"})
+
+		first = cache.get(self.session, "https://example.com/paper/1", timeout = 1)
+		second = HTTPCache(self.folder, ttls = [(r"/paper/", 3600)]).get(self.session, "https://example.com/paper/1", timeout = 1)
+
+		self.assertEqual(len(self.session.calls), 1)
+		self.assertEqual((first.status_code, first.content), (200, b"paper 1"))
+		self.assertEqual((second.status_code, second.content), (200, b"paper 1"))
+		self.assertEqual(second.headers["content-type"], "text/html")
+		self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+	def test_stale_entries_are_revalidated(self):
+		cache = HTTPCache(self.folder, ttls = [(r"/paper/", 60)])
+		url = "https://example.com/paper/1"
+		self.session.responses[url] = (200, b"paper 1", {"ETag": '"v1"', "Last-Modified": "Mon, 02 Oct 2023 10:00:00 GMT"})
+		cache.get(self.session, url)
+
+		self.session.responses[url] = (304, b"", {})
+		with patch("src.content_provider.http_cache.time.time", return_value = time.time() + 120):
+			response = cache.get(self.session, url)
+		self.assertEqual(self.session.calls[1][1], {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 02 Oct 2023 10:00:00 GMT"})
+		self.assertEqual(response.content, b"paper 1")
+		self.assertEqual(cache.revalidations, 1)
+
+		self.session.responses[url] = (200, b"paper 1 v2", {"ETag": '"v2"'})
+		with patch("src.content_provider.http_cache.time.time", return_value = time.time() + 240):
+			self.assertEqual(cache.get(self.session, url).content, b"paper 1 v2")
+		self.assertEqual(cache.get(self.session, url).content, b"paper 1 v2")
+		self.assertEqual(len(self.session.calls), 3)
+
+	def test_errors_are_not_cached(self):
+		cache = HTTPCache(self.folder, ttls = [(r".*", 3600)])
+		self.session.responses["https://example.com/"] = (500, b"", {})
+		self.assertEqual(cache.get(self.session, "https://example.com/").status_code, 500)
+		self.assertEqual(cache.get(self.session, "https://example.com/").status_code, 500)
+		self.assertEqual(len(self.session.calls), 2)
+
+	def test_least_recently_used_entries_are_evicted(self):
+		cache = HTTPCache(self.folder, ttls = [(r".*", 3600)], max_bytes = 250)
+		for index in range(3):
+			self.session.responses[f"https://example.com/{index}"] = (200, b"x" * 100, {})
+		cache.get(self.session, "https://example.com/0")
+		cache.get(self.session, "https://example.com/1")
+		time.sleep(0.01)
+		cache.get(self.session, "https://example.com/0")
+		time.sleep(0.01)
+		cache.get(self.session, "https://example.com/2")
+
+		self.assertEqual(len(self.session.calls), 3)
+		cache.get(self.session, "https://example.com/0")
+		self.assertEqual(len(self.session.calls), 3)
+		cache.get(self.session, "https://example.com/1")
+		self.assertEqual(len(self.session.calls), 4)
@@ -0,0 +1,66 @@
+from src.identity_index import IdentityIndex, normalize_arxiv_id, normalize_github_repo, normalize_title, paper_identities
+from unittest import TestCase
+import json
+import os
+class TestIdentityIndex(TestCase):
+	def setUp(self):
+		self.path = "test_identity_index.tsv"
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+	def test_normalize_arxiv_id(self):
+		self.assertEqual(normalize_arxiv_id("https://arxiv.org/abs/2301.12345v2"), "2301.12345")
+		self.assertEqual(normalize_arxiv_id("http://arxiv.org/pdf/2301.12345.pdf"), "2301.12345")
+		self.assertEqual(normalize_arxiv_id("https://arxiv.org/abs/cs/0112017"), "cs/0112017")
+		self.assertIsNone(normalize_arxiv_id("https://example.com/paper"))
+		self.assertIsNone(normalize_arxiv_id(None))
+
+	def test_normalize_github_repo(self):
+		self.assertEqual(normalize_github_repo("https://github.com/Owner/Repo"), "owner/repo")
+		self.assertEqual(normalize_github_repo("https://github.com/owner/repo.git"), "owner/repo")
+		self.assertEqual(normalize_github_repo("https://github.com/owner/repo/tree/main?tab=readme"), "owner/repo")
+		self.assertIsNone(normalize_github_repo("https://gitlab.com/owner/repo"))
+
+	def test_normalize_title(self):
+		self.assertEqual(normalize_title("  Attention Is All You Need! "), "attention is all you need")
+		self.assertEqual(normalize_title("Señales — Modelos"), "senales modelos")
+		self.assertIsNone(normalize_title("?!"))
+
+	def test_paper_identities(self):
+		paper = {"title": "Paper 1", "github_link": "https://github.com/owner/repo", "arxiv_url": "https://arxiv.org/abs/2301.12345v1", "stars": 10}
+		self.assertEqual(paper_identities({"paper": json.dumps(paper)}), ["arxiv:2301.12345", "github:owner/repo", "title:paper 1"])
+		self.assertEqual(paper_identities(paper), ["arxiv:2301.12345", "github:owner/repo", "title:paper 1"])
+		self.assertEqual(paper_identities({"test_content": "content1"}), [])
+		self.assertEqual(paper_identities({"paper": "not json"}), [])
+
+	def test_claim(self):
+		index = IdentityIndex(self.path)
+		self.assertIsNone(index.claim(["arxiv:1", "title:paper 1"], "provider1", "id1"))
+		self.assertIsNone(index.claim(["arxiv:1", "title:paper 1"], "provider1", "id1"))
+		self.assertEqual(index.claim(["arxiv:2", "title:paper 1"], "provider2", "id2"), ("provider1", "id1"))
+		self.assertIsNone(index.find(["arxiv:2"]))
+		self.assertIsNone(index.claim([], "provider2", "id3"))
+
+		index = IdentityIndex(self.path)
+		self.assertEqual(index.find(["arxiv:2", "arxiv:1"]), ("provider1", "id1"))
+
+	def test_reserve(self):
+		index = IdentityIndex(self.path)
+		self.assertIsNone(index.reserve(["arxiv:1", "title:paper 1"], "provider1", "id1"))
+		self.assertIsNone(index.reserve(["arxiv:1", "title:paper 1"], "provider1", "id1"))
+		self.assertEqual(index.reserve(["title:paper 1"], "provider2", "id2"), ("provider1", "id1"))
+		# Reservations are never written, so a failed post doesn't block the paper.
+		self.assertIsNone(IdentityIndex(self.path).find(["arxiv:1"]))
+		index.clear_reservations()
+		self.assertIsNone(index.reserve(["title:paper 1"], "provider2", "id2"))
+		self.assertIsNone(index.claim(["title:paper 1"], "provider2", "id2"))
+		self.assertEqual(IdentityIndex(self.path).find(["title:paper 1"]), ("provider2", "id2"))
+
+	def test_repo_alone_is_not_the_same_paper(self):
+		index = IdentityIndex(self.path)
+		self.assertIsNone(index.claim(["github:google-research/google-research", "title:paper 1"], "provider1", "id1"))
+		self.assertIsNone(index.reserve(["github:google-research/google-research", "title:paper 2"], "provider1", "id2"))
+		self.assertEqual(index.reserve(["github:google-research/google-research", "title:paper 1"], "provider2", "id3"), ("provider1", "id1"))
+
@@ -0,0 +1,40 @@
+from src.json_lines import load_json_lines
+from unittest import TestCase
+import os
+class TestJsonLines(TestCase):
+	def setUp(self):
+		self.path = "test_json_lines.jsonl"
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+	def write(self, text):
+		with open(self.path, "w") as file:
+			file.write(text)
+
+	def read(self):
+		with open(self.path) as file:
+			return file.read()
+
+	def test_missing_file(self):
+		self.assertEqual(load_json_lines(self.path), [])
+
+	def test_records(self):
+		self.write('{"a": 1}\n{"b": 2}\n')
+		self.assertEqual(load_json_lines(self.path), [{"a": 1}, {"b": 2}])
+
+	def test_torn_last_line_is_cut_off(self):
+		self.write('{"a": 1}\n{"b": ')
+		self.assertEqual(load_json_lines(self.path), [{"a": 1}])
+		self.assertEqual(self.read(), '{"a": 1}\n')
+
+	def test_last_line_without_newline_is_cut_off(self):
+		self.write('{"a": 1}\n{"b": 2}')
+		self.assertEqual(load_json_lines(self.path), [{"a": 1}])
+		self.assertEqual(self.read(), '{"a": 1}\n')
+
+	def test_corrupted_line_in_the_middle(self):
+		self.write('not json\n{"a": 1}\n')
+		with self.assertRaises(ValueError):
+			load_json_lines(self.path)
@@ -0,0 +1,91 @@
+import unittest
+import os
+import json
+from src.db_backend_interface import DatabaseBackend
+from src.jsonl_backend import JsonLinesBackend
+from tests import test_tiny_db_backend
+
+class TestJsonLinesBackend(test_tiny_db_backend.TestTinyDBBackend):
+    """Runs the TinyDBBackend contract against JsonLinesBackend."""
+
+    def setUp(self):
+        self.db_path = 'test_db.jsonl'
+        self.db: DatabaseBackend = JsonLinesBackend(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        os.remove(self.db_path)
+
+    def read_records(self):
+        with open(self.db_path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_inserts_and_deletes_are_appended(self):
+        item1 = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        item2 = {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+        self.db.insert(item1)
+        self.db.insert(item2)
+        self.db.delete('id1')
+        self.db.delete_by_date(from_date=1500)
+        self.assertEqual(self.read_records(), [{'item': item1}, {'item': item2}, {'delete': 0}, {'delete': 1}])
+        self.assertEqual(JsonLinesBackend(self.db_path).get(), [])
+
+    def test_torn_last_line_is_dropped(self):
+        item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        self.db.insert(item)
+        self.db.close()
+        with open(self.db_path, 'a') as file:
+            file.write('{"item": {"id": "id2", "conte')
+
+        self.db = JsonLinesBackend(self.db_path)
+        self.assertEqual(self.db.get(), [item])
+        self.db.insert({'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 3000})
+        self.assertEqual([record['item']['id'] for record in self.read_records()], ['id1', 'id3'])
+
+    def test_last_line_without_newline_is_dropped(self):
+        item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        self.db.insert(item)
+        self.db.close()
+        # The record made it to disk but its newline didn't.
+        with open(self.db_path, 'a') as file:
+            file.write('{"item": {"id": "id2", "timestamp": 2000}}')
+
+        self.db = JsonLinesBackend(self.db_path)
+        self.assertEqual(self.db.get(), [item])
+        item3 = {'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 3000}
+        self.db.insert(item3)
+        self.db.close()
+        self.db = JsonLinesBackend(self.db_path)
+        self.assertEqual(self.db.get(), [item, item3])
+
+    def test_corrupted_record_in_the_middle(self):
+        with open(self.db_path, 'w') as file:
+            file.write('not json\n{"delete": 0}\n')
+        with self.assertRaises(ValueError):
+            JsonLinesBackend(self.db_path)
+
+    def test_compaction_after_threshold(self):
+        self.db.close()
+        self.db = JsonLinesBackend(self.db_path, compaction_threshold=2)
+        items = [
+            {'id': f'id{i}', 'type': 'post', 'content': f'Content {i}', 'timestamp': 1000 * i}
+            for i in range(1, 5)
+        ]
+        self.db.insert_many(items)
+        self.db.delete('id1')
+        self.db.delete('id3')
+        self.db.close()
+
+        self.assertEqual(self.read_records(), [{'item': items[1]}, {'item': items[3]}])
+        self.db = JsonLinesBackend(self.db_path)
+        self.db.delete('id4')
+        self.assertEqual(self.db.get(), [items[1]])
+        self.assertEqual(JsonLinesBackend(self.db_path).get(), [items[1]])
+
+    def test_invalid_compaction_threshold(self):
+        with self.assertRaises(ValueError):
+            JsonLinesBackend(self.db_path, compaction_threshold=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+from src.llm_cache import LLMCache
+from unittest import TestCase
+from unittest.mock import patch
+import os
+import shutil
+import time
+class TestLLMCache(TestCase):
+	def setUp(self):
+		self.folder = "test_llm_cache"
+
+	def tearDown(self):
+		shutil.rmtree(self.folder, ignore_errors=True)
+
+	def test_invalid_parameters(self):
+		with self.assertRaises(ValueError):
+			LLMCache("")
+		with self.assertRaises(ValueError):
+			LLMCache(self.folder, max_entries = 0)
+		with self.assertRaises(ValueError):
+			LLMCache(self.folder, ttl = 0)
+
+	def test_key_depends_on_template_parameters_and_content(self):
+		key = LLMCache.key("template", {"temperature": 0}, "id1")
+		self.assertEqual(key, LLMCache.key("template", {"temperature": 0}, "id1"))
+		self.assertNotEqual(key, LLMCache.key("other template", {"temperature": 0}, "id1"))
+		self.assertNotEqual(key, LLMCache.key("template", {"temperature": 1}, "id1"))
+		self.assertNotEqual(key, LLMCache.key("template", {"temperature": 0}, "id2"))
+
+	def test_set_and_get(self):
+		cache = LLMCache(self.folder)
+		self.assertIsNone(cache.get("key1"))
+		cache.set("key1", "post1")
+		self.assertEqual(cache.get("key1"), "post1")
+		self.assertEqual(LLMCache(self.folder).get("key1"), "post1")
+
+	def test_expired_entries_are_ignored(self):
+		cache = LLMCache(self.folder, ttl = 60)
+		cache.set("key1", "post1")
+		with patch("src.llm_cache.time.time", return_value = time.time() + 61):
+			self.assertIsNone(cache.get("key1"))
+		self.assertEqual(cache.get("key1"), "post1")
+
+	def test_oldest_entries_are_evicted(self):
+		cache = LLMCache(self.folder, max_entries = 10)
+		for i in range(11):
+			cache.set(f"key{i}", f"post{i}")
+			os.utime(os.path.join(self.folder, f"key{i}.json"), (i, i))
+		self.assertLessEqual(len(os.listdir(self.folder)), 10)
+		self.assertIsNone(cache.get("key0"))
+		self.assertEqual(cache.get("key10"), "post10")
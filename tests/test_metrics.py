@@ -0,0 +1,61 @@
+from src.metrics import Metrics
+from unittest import TestCase
+import os
+class TestMetrics(TestCase):
+	def tearDown(self):
+		if os.path.exists("test_metrics.prom"):
+			os.remove("test_metrics.prom")
+
+	def test_disabled_metrics_record_nothing(self):
+		metrics = Metrics()
+		metrics.increment("items_total")
+		metrics.observe("stage_seconds", 1)
+		with metrics.timer("stage_seconds"):
+			pass
+		self.assertEqual(metrics.snapshot(), {"counters": {}, "histograms": {}})
+		metrics.dump("test_metrics.prom")
+		self.assertFalse(os.path.exists("test_metrics.prom"))
+
+	def test_counters(self):
+		metrics = Metrics(enabled = True)
+		metrics.increment("items_total", provider = "provider1")
+		metrics.increment("items_total", 2, provider = "provider1")
+		metrics.increment("items_total", provider = "provider2")
+		metrics.increment("errors_total")
+		self.assertEqual(metrics.snapshot()["counters"], {'items_total{provider="provider1"}': 3, 'items_total{provider="provider2"}': 1, "errors_total": 1})
+		metrics.reset()
+		self.assertEqual(metrics.snapshot()["counters"], {})
+
+	def test_histograms(self):
+		metrics = Metrics(enabled = True)
+		metrics.observe("stage_seconds", 0.003, stage = "fetch")
+		metrics.observe("stage_seconds", 0.2, stage = "fetch")
+		metrics.observe("stage_seconds", 100, stage = "fetch")
+		with metrics.timer("stage_seconds", stage = "save"):
+			pass
+
+		histograms = metrics.snapshot()["histograms"]
+		fetch = histograms['stage_seconds{stage="fetch"}']
+		self.assertEqual(fetch["count"], 3)
+		self.assertAlmostEqual(fetch["sum"], 100.203)
+		self.assertEqual(fetch["buckets"][0.001], 0)
+		self.assertEqual(fetch["buckets"][0.005], 1)
+		self.assertEqual(fetch["buckets"][0.25], 2)
+		self.assertEqual(fetch["buckets"][60], 2)
+		self.assertEqual(histograms['stage_seconds{stage="save"}']["count"], 1)
+
+	def test_prometheus_dump(self):
+		metrics = Metrics(enabled = True, path = "test_metrics.prom")
+		metrics.increment("items_total", provider = "provider1")
+		metrics.observe("stage_seconds", 0.2, stage = "fetch")
+		metrics.dump()
+
+		with open("test_metrics.prom") as file:
+			lines = file.read().splitlines()
+		self.assertEqual(lines[:2], ["# TYPE items_total counter", 'items_total{provider="provider1"} 1'])
+		self.assertIn("# TYPE stage_seconds histogram", lines)
+		self.assertIn('stage_seconds_bucket{stage="fetch",le="0.1"} 0', lines)
+		self.assertIn('stage_seconds_bucket{stage="fetch",le="0.25"} 1', lines)
+		self.assertIn('stage_seconds_bucket{stage="fetch",le="+Inf"} 1', lines)
+		self.assertIn('stage_seconds_sum{stage="fetch"} 0.2', lines)
+		self.assertIn('stage_seconds_count{stage="fetch"} 1', lines)
@@ -0,0 +1,36 @@
+from src.migrate_to_sqlite import migrate
+from src.sqlite_backend import SQLiteBackend
+from src.tiny_db_backend import TinyDBBackend
+from unittest import TestCase
+import os
+import glob
+class TestMigrateToSQLite(TestCase):
+	def setUp(self):
+		os.makedirs("data", exist_ok=True)
+
+	def tearDown(self):
+		files = glob.glob('data/*')
+		for file in files:
+			os.remove(file)
+
+	def test_migrate(self):
+		items = [
+			{'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+			{'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+		]
+		source = TinyDBBackend("data/test.json")
+		source.insert_many(items)
+		source.close()
+
+		self.assertEqual(migrate("data/test.json"), 2)
+		self.assertEqual(migrate("data/test.json"), 2)
+
+		target = SQLiteBackend("data/test.sqlite3")
+		self.assertEqual(target.get(), items)
+		self.assertEqual(target.get_by_date(from_date=1500), [items[1]])
+		target.close()
+
+	def test_migrate_missing_file(self):
+		with self.assertRaises(FileNotFoundError):
+			migrate("data/missing.json")
+		self.assertFalse(os.path.exists("data/missing.json"))
@@ -0,0 +1,67 @@
+from src.near_duplicate_index import NearDuplicateIndex, paper_text
+from unittest import TestCase
+import glob
+import json
+import os
+ABSTRACT = "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks that include an encoder and a decoder."
+class TestNearDuplicateIndex(TestCase):
+	def setUp(self):
+		self.path = "test_near_duplicates"
+
+	def tearDown(self):
+		for file in glob.glob(self.path + ".*"):
+			os.remove(file)
+
+	def test_invalid_parameters(self):
+		with self.assertRaises(ValueError):
+			NearDuplicateIndex(self.path, threshold = 0)
+		with self.assertRaises(ValueError):
+			NearDuplicateIndex(self.path, num_perm = 100, bands = 32)
+
+	def test_paper_text(self):
+		paper = {"title": "Paper 1", "subtitle": "Short", "abstract": "Long abstract", "stars": 10}
+		self.assertEqual(paper_text({"paper": json.dumps(paper)}), "Paper 1 Long abstract")
+		self.assertEqual(paper_text({"paper": json.dumps(dict(paper, abstract = ""))}), "Paper 1 Short")
+		self.assertIsNone(paper_text({"test_content": "content1"}))
+
+	def test_similar_texts_are_found(self):
+		index = NearDuplicateIndex(self.path)
+		index.add("id1", "Attention is all you need " + ABSTRACT)
+		match = index.find("Attention is all you need! " + ABSTRACT.replace("dominant", "dominent"))
+		self.assertEqual(match[0], "id1")
+		self.assertGreater(match[1], 0.8)
+		self.assertIsNone(index.find("Denoising diffusion probabilistic models for high quality image synthesis"))
+
+	def test_claim(self):
+		index = NearDuplicateIndex(self.path)
+		self.assertIsNone(index.claim("id1", ABSTRACT))
+		self.assertIsNone(index.claim("id1", ABSTRACT))
+		self.assertEqual(index.claim("id2", ABSTRACT)[0], "id1")
+		self.assertEqual(len(index), 1)
+
+	def test_reserve(self):
+		index = NearDuplicateIndex(self.path)
+		self.assertIsNone(index.reserve("id1", ABSTRACT))
+		self.assertEqual(index.reserve("id2", ABSTRACT)[0], "id1")
+		self.assertEqual(len(index), 0)
+		self.assertIsNone(NearDuplicateIndex(self.path).find(ABSTRACT))
+		index.clear_reservations()
+		self.assertIsNone(index.reserve("id2", ABSTRACT))
+		index.add("id2", ABSTRACT)
+		self.assertEqual(NearDuplicateIndex(self.path).find(ABSTRACT)[0], "id2")
+
+	def test_index_is_persisted(self):
+		index = NearDuplicateIndex(self.path)
+		index.add("id1", ABSTRACT)
+		index.add("id2", "Denoising diffusion probabilistic models")
+		# A crash after writing the signature but before the key.
+		with open(self.path + ".sig", "ab") as file:
+			file.write(index.signature("orphan").tobytes())
+
+		index = NearDuplicateIndex(self.path)
+		self.assertEqual(len(index), 2)
+		self.assertEqual(index.find(ABSTRACT)[0], "id1")
+		index.add("id3", "Another paper entirely")
+		self.assertEqual(NearDuplicateIndex(self.path).find("Another paper entirely")[0], "id3")
+		with self.assertRaises(ValueError):
+			NearDuplicateIndex(self.path, num_perm = 64)
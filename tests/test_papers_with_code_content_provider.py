@@ -1,8 +1,72 @@
-from src.content_provider.content_provider import ContentProvider
+from src.content_provider.content_provider import ContentProvider, StopAfterKnown
 from src.content_provider.papers_with_code_content_provider import PapersWithCodeContentProvider
+from src.content_provider.http_cache import HTTPCache
 from unittest import TestCase, mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
 import requests
 import json
+import shutil
+import threading
+import time
+CARD = """
+	<div class="row infinite-item item paper-card">
+		<h1><a href="/paper/example-paper-{index}">Example Paper {index}</a></h1>
+		<p class="item-strip-abstract">This is an example abstract.</p>
+		<div class="item-image" style="background-image: url('https://example.com/image.jpg')"></div>
+		<div class="entity-stars">
+			<span class="badge">1,234 stars</span>
+		</div>
+		<div class="item-github-link">
+			<a href="https://github.com/example">Github Link</a>
+		</div>
+	</div>
+"""
+PAPER = """
+<div class="paper-abstract">
+	<p>Abstract of {uid}.</p>
+	<a class="badge badge-light" href="https://arxiv.org/abs/example">arXiv</a>
+</div>
+"""
+
+def start_paperswithcode_stand_in(papers, detail_latency, pages = 1, repeat_last_page = False):
+	# Serves listing pages with the given number of cards each, and paper pages
+	# that take detail_latency seconds to answer, like the real site under load.
+	# The listing pages asked for are recorded in server.listing_pages. With
+	# repeat_last_page, pages past the end serve the last page instead of a 404.
+	class Handler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def do_GET(self):
+			status = 200
+			if self.path.startswith("/paper/"):
+				time.sleep(detail_latency)
+				body = PAPER.format(uid=self.path)
+			else:
+				page = int(self.path.split("?page=")[1]) if "?page=" in self.path else 1
+				server.listing_pages.append(page)
+				if repeat_last_page:
+					page = min(page, pages)
+				if page > pages:
+					status = 404
+					body = "Not Found"
+				else:
+					body = '<div class="infinite-container">' + "".join(CARD.format(index=index) for index in range((page - 1) * papers, page * papers)) + '</div>'
+			body = body.encode()
+			self.send_response(status)
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, *args):
+			pass
+
+	server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+	server.daemon_threads = True
+	server.listing_pages = []
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server
+
 class TestPapersWithCodeContentProvider(TestCase):
 
 	def test_create_papers_with_code_content_provider(self):
@@ -13,7 +77,7 @@ class TestPapersWithCodeContentProvider(TestCase):
 		contentProvider = PapersWithCodeContentProvider()
 		self.assertEqual(contentProvider.name(), "PapersWithCodeContentProvider")
 
-	@mock.patch('requests.get')
+	@mock.patch('requests.Session.get')
 	def test_get_content_error(self, mock_get):
 		mock_get.return_value.status_code = 500  # Simulate a server error
 		contentProvider = PapersWithCodeContentProvider()
@@ -23,7 +87,7 @@ class TestPapersWithCodeContentProvider(TestCase):
 
 
 
-	@mock.patch('requests.get')
+	@mock.patch('requests.Session.get')
 	def test_get_content_paper_page_not_reachable(self, mock_get):
 		# Mock HTML for main page
 		mock_html_content_main = """
@@ -46,7 +110,7 @@ class TestPapersWithCodeContentProvider(TestCase):
 			</div>
 			"""
 		
-		def side_effect_func(url):
+		def side_effect_func(url, **kwargs):
 			response = requests.Response()
 			if "paperswithcode.com/paper" in url:  # If the URL is for a specific paper, return status code 500
 				response.status_code = 500
@@ -76,7 +140,7 @@ class TestPapersWithCodeContentProvider(TestCase):
 		self.assertEqual(content[0], expected_content)
 
 
-	@mock.patch('requests.get')
+	@mock.patch('requests.Session.get')
 	def test_get_content_success_returns_expected_dict(self, mock_get):
 		# Mock HTML for main page
 		mock_html_content_main = """
@@ -107,7 +171,7 @@ class TestPapersWithCodeContentProvider(TestCase):
 		"""
 		
 		# Define a side_effect function to return different responses based on input URL
-		def side_effect_func(url):
+		def side_effect_func(url, **kwargs):
 			response = requests.Response()
 			if "paperswithcode.com/paper" in url:
 				response.status_code = 200
@@ -137,3 +201,193 @@ class TestPapersWithCodeContentProvider(TestCase):
 		expected_content = {"paper" : json.dumps(expected_content)}
 		self.assertEqual(content[0], expected_content)
 
+
+	@mock.patch('requests.Session.get')
+	def test_aget_content_error(self, mock_get):
+		mock_get.return_value.status_code = 500
+		contentProvider = PapersWithCodeContentProvider()
+		with self.assertRaises(requests.exceptions.HTTPError):
+			asyncio.run(contentProvider.aget_content())
+
+	@mock.patch('requests.Session.get')
+	def test_aget_content_keeps_page_order(self, mock_get):
+		card = """
+			<div class="row infinite-item item paper-card">
+				<h1><a href="/paper/example-paper-{index}">Example Paper {index}</a></h1>
+				<p class="item-strip-abstract">This is an example abstract.</p>
+				<div class="item-image" style="background-image: url('https://example.com/image.jpg')"></div>
+				<div class="entity-stars">
+					<span class="badge">1,234 stars</span>
+				</div>
+				<div class="item-github-link">
+					<a href="https://github.com/example">Github Link</a>
+				</div>
+			</div>
+		"""
+		mock_html_content_main = '<div class="infinite-container">' + "".join(card.format(index=index) for index in range(5)) + '</div>'
+		mock_html_content_paper = """
+		<div class="paper-abstract">
+			<p>Abstract of {uid}.</p>
+			<a class="badge badge-light" href="https://arxiv.org/abs/example">arXiv</a>
+		</div>
+		"""
+
+		def side_effect_func(url, **kwargs):
+			response = requests.Response()
+			response.status_code = 200
+			if "paperswithcode.com/paper" in url:
+				response._content = mock_html_content_paper.format(uid=url.split("paperswithcode.com")[1]).encode()
+			else:
+				response._content = mock_html_content_main.encode()
+			return response
+
+		mock_get.side_effect = side_effect_func
+
+		contentProvider = PapersWithCodeContentProvider()
+		content = asyncio.run(contentProvider.aget_content())
+
+		self.assertEqual(content, contentProvider.get_content())
+		papers = [json.loads(paper["paper"]) for paper in content]
+		self.assertEqual([paper["title"] for paper in papers], [f"Example Paper {index}" for index in range(5)])
+		self.assertEqual([paper["abstract"] for paper in papers], [f"Abstract of /paper/example-paper-{index}." for index in range(5)])
+		self.assertEqual(papers[0]["stars"], 1234)
+
+	def test_invalid_parameters(self):
+		with self.assertRaises(ValueError):
+			PapersWithCodeContentProvider(max_concurrent_requests = 0)
+		with self.assertRaises(ValueError):
+			PapersWithCodeContentProvider(timeout = 0)
+		with self.assertRaises(ValueError):
+			PapersWithCodeContentProvider(parser = "regex")
+		with self.assertRaises(ValueError):
+			PapersWithCodeContentProvider(max_pages = 0)
+		with self.assertRaises(ValueError):
+			StopAfterKnown(0)
+
+	def test_detail_pages_are_fetched_concurrently(self):
+		server = start_paperswithcode_stand_in(papers = 8, detail_latency = 0.1)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+		start = time.monotonic()
+		serial_content = PapersWithCodeContentProvider(base_url = base_url, max_concurrent_requests = 1).get_content()
+		serial_elapsed = time.monotonic() - start
+		start = time.monotonic()
+		content = PapersWithCodeContentProvider(base_url = base_url, max_concurrent_requests = 8).get_content()
+		elapsed = time.monotonic() - start
+
+		self.assertGreaterEqual(serial_elapsed, 0.8)
+		self.assertLess(elapsed, serial_elapsed / 2)
+		self.assertEqual(content, serial_content)
+		papers = [json.loads(paper["paper"]) for paper in content]
+		self.assertEqual([paper["abstract"] for paper in papers], [f"Abstract of /paper/example-paper-{index}." for index in range(8)])
+		self.assertEqual(asyncio.run(PapersWithCodeContentProvider(base_url = base_url).aget_content()), content)
+		self.assertEqual(PapersWithCodeContentProvider(base_url = base_url, parser = "stream").get_content(), content)
+
+	def test_detail_page_timeout(self):
+		server = start_paperswithcode_stand_in(papers = 2, detail_latency = 0.5)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}", timeout = 0.1)
+		content = contentProvider.get_content()
+
+		papers = [json.loads(paper["paper"]) for paper in content]
+		self.assertEqual([paper["title"] for paper in papers], ["Example Paper 0", "Example Paper 1"])
+		self.assertEqual([paper["abstract"] for paper in papers], ["", ""])
+		self.assertEqual([contentProvider.content_key(paper) for paper in content], [None, None])
+
+	def test_paper_pages_are_served_from_the_http_cache(self):
+		server = start_paperswithcode_stand_in(papers = 3, detail_latency = 0)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		self.addCleanup(shutil.rmtree, "test_http_cache", True)
+		http_cache = HTTPCache("test_http_cache", ttls = [(r"/paper/", 3600)])
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}", http_cache = http_cache)
+
+		content = contentProvider.get_content()
+		self.assertEqual(contentProvider.get_content(), content)
+
+		self.assertEqual(http_cache.misses, 5)
+		self.assertEqual(http_cache.hits, 3)
+		with self.assertRaises(TypeError):
+			PapersWithCodeContentProvider(http_cache = "cache/")
+
+	def test_known_papers_are_not_fetched(self):
+		server = start_paperswithcode_stand_in(papers = 3, detail_latency = 0)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}")
+		contentProvider.set_known_keys(lambda uid: uid == "/paper/example-paper-1")
+
+		with mock.patch('requests.Session.get', autospec = True, side_effect = requests.Session.get) as mock_get:
+			content = contentProvider.get_content()
+
+		self.assertEqual([contentProvider.content_key(paper) for paper in content], ["/paper/example-paper-0", "/paper/example-paper-2"])
+		self.assertEqual(mock_get.call_count, 3)
+		self.assertIsNone(contentProvider.content_key({"test_content": "content1"}))
+
+	def test_get_content_iter_walks_the_listing_lazily(self):
+		server = start_paperswithcode_stand_in(papers = 2, detail_latency = 0, pages = 3)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}", max_pages = None)
+
+		contents = contentProvider.get_content_iter()
+		first = next(contents)
+		self.assertEqual(server.listing_pages, [1])
+		uids = [contentProvider.content_key(first)] + [contentProvider.content_key(content) for content in contents]
+
+		self.assertEqual(uids, [f"/paper/example-paper-{index}" for index in range(6)])
+		self.assertEqual(server.listing_pages, [1, 2, 3, 4])
+		# get_content() still reads the front page only.
+		self.assertEqual(len(contentProvider.get_content()), 2)
+		self.assertEqual(server.listing_pages, [1, 2, 3, 4, 1])
+
+	def test_get_content_iter_stops_after_known_papers(self):
+		server = start_paperswithcode_stand_in(papers = 3, detail_latency = 0, pages = 5)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}")
+		# Papers 2 to 6 were stored by an earlier run.
+		contentProvider.set_known_keys(lambda uid: 2 <= int(uid.split("-")[-1]) <= 6)
+
+		with mock.patch('requests.Session.get', autospec = True, side_effect = requests.Session.get) as mock_get:
+			contents = list(contentProvider.get_content_iter(StopAfterKnown(3)))
+
+		self.assertEqual([contentProvider.content_key(content) for content in contents], ["/paper/example-paper-0", "/paper/example-paper-1"])
+		self.assertEqual(server.listing_pages, [1, 2])
+		self.assertEqual(mock_get.call_count, 4)
+
+	def test_get_content_iter_ends_on_a_page_with_nothing_new(self):
+		server = start_paperswithcode_stand_in(papers = 2, detail_latency = 0, pages = 2, repeat_last_page = True)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}", max_pages = None)
+
+		contents = list(contentProvider.get_content_iter())
+
+		self.assertEqual(len(contents), 4)
+		self.assertEqual(server.listing_pages, [1, 2, 3])
+
+	def test_get_content_iter_respects_max_pages(self):
+		server = start_paperswithcode_stand_in(papers = 2, detail_latency = 0, pages = 5)
+		self.addCleanup(server.server_close)
+		self.addCleanup(server.shutdown)
+		contentProvider = PapersWithCodeContentProvider(base_url = f"http://127.0.0.1:{server.server_address[1]}", max_pages = 2)
+
+		contents = asyncio.run(self.collect(contentProvider.aget_content_iter()))
+
+		self.assertEqual(len(contents), 4)
+		self.assertEqual(server.listing_pages, [1, 2])
+
+	async def collect(self, contents):
+		return [content async for content in contents]
+
+	@mock.patch('src.content_provider.content_provider.ContentProvider.get_content', return_value=[{"test_content": "content1"}, {"test_content": "content2"}])
+	def test_default_get_content_iter_yields_get_content(self, mock_get_content):
+		contentProvider = ContentProvider()
+
+		self.assertEqual(list(contentProvider.get_content_iter()), mock_get_content.return_value)
+		self.assertEqual(list(contentProvider.get_content_iter(lambda key, known: True)), [])
@@ -0,0 +1,73 @@
+import asyncio
+from src.rate_limiter import RateLimiter
+from unittest import TestCase
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+		self.sleeps = []
+
+	def __call__(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.sleeps.append(seconds)
+		self.now += seconds
+
+class TestRateLimiter(TestCase):
+	def test_invalid_limits(self):
+		with self.assertRaises(ValueError):
+			RateLimiter(requests_per_minute = 0)
+		with self.assertRaises(ValueError):
+			RateLimiter(tokens_per_minute = "many")
+
+	def test_no_limits_never_waits(self):
+		clock = FakeClock()
+		rate_limiter = RateLimiter(clock = clock, sleep = clock.sleep)
+		for _ in range(100):
+			rate_limiter.acquire(10000)
+		self.assertEqual(clock.sleeps, [])
+
+	def test_requests_per_minute(self):
+		clock = FakeClock()
+		rate_limiter = RateLimiter(requests_per_minute = 60, clock = clock, sleep = clock.sleep)
+		for _ in range(60):
+			rate_limiter.acquire()
+		self.assertEqual(clock.now, 0)
+		rate_limiter.acquire()
+		self.assertAlmostEqual(clock.now, 1)
+		rate_limiter.acquire()
+		self.assertAlmostEqual(clock.now, 2)
+
+	def test_tokens_per_minute(self):
+		clock = FakeClock()
+		rate_limiter = RateLimiter(requests_per_minute = 1000, tokens_per_minute = 600, clock = clock, sleep = clock.sleep)
+		rate_limiter.acquire(500)
+		self.assertEqual(clock.now, 0)
+		rate_limiter.acquire(200)
+		self.assertAlmostEqual(clock.now, 10)
+
+	def test_call_bigger_than_the_bucket_waits_for_a_full_bucket(self):
+		clock = FakeClock()
+		rate_limiter = RateLimiter(tokens_per_minute = 600, clock = clock, sleep = clock.sleep)
+		rate_limiter.acquire(600)
+		rate_limiter.acquire(5000)
+		self.assertAlmostEqual(clock.now, 60)
+
+	def test_estimate_tokens(self):
+		self.assertEqual(RateLimiter.estimate_tokens(""), 1)
+		self.assertEqual(RateLimiter.estimate_tokens("a" * 400), 101)
+
+	def test_aacquire(self):
+		clock = FakeClock()
+
+		async def async_sleep(seconds):
+			clock.sleep(seconds)
+
+		rate_limiter = RateLimiter(requests_per_minute = 60, clock = clock, sleep = None, async_sleep = async_sleep)
+
+		async def run():
+			for _ in range(62):
+				await rate_limiter.aacquire()
+
+		asyncio.run(run())
+		self.assertAlmostEqual(clock.now, 2)
@@ -14,8 +14,61 @@ import os
 import glob
 from src.data_storage import DataStorage
 from src.tiny_db_backend import TinyDBBackend
+from src.rate_limiter import RateLimiter
+from src.llm_cache import LLMCache
+from src.run_journal import RunJournal
+from src.identity_index import IdentityIndex
+from src.near_duplicate_index import NearDuplicateIndex
+from src.metrics import metrics
 import hashlib
 from datetime import datetime
+import threading
+import time
+import asyncio
+import shutil
+
+class SlowContentProvider(ContentProvider):
+	def __init__(self, name, contents, delay=0, error=None):
+		super().__init__()
+		self._name = name
+		self._contents = contents
+		self._delay = delay
+		self._error = error
+
+	def name(self):
+		return self._name
+
+	def get_content(self):
+		time.sleep(self._delay)
+		if self._error is not None:
+			raise self._error
+		return self._contents
+
+class PagedContentProvider(ContentProvider):
+	# Lists its contents lazily and records what was listed when, in events.
+	def __init__(self, name, contents, events, error=None):
+		super().__init__()
+		self._name = name
+		self._contents = contents
+		self._events = events
+		self._error = error
+
+	def name(self):
+		return self._name
+
+	def content_key(self, content):
+		return content["test_content"]
+
+	def get_content_iter(self, stop=None):
+		for content in self._contents:
+			key = self.content_key(content)
+			if stop is not None and stop(key, self.is_known(key)):
+				return
+			self._events.append(f'list {key}')
+			yield content
+		if self._error is not None:
+			raise self._error
+
 class TestReporter(TestCase):
 	def create_id(self,json_obj):
 		json_str = json.dumps(json_obj, sort_keys=True) # Sort keys to ensure consistent ordering
@@ -205,7 +258,7 @@ class TestReporter(TestCase):
 		)
 
 
-	@patch('requests.get')
+	@patch('requests.Session.get')
 	def test_report_handles_content_provider_fail(self, mock_get):
 		logger = self.create_logger("test_logger")
 		mock_get.return_value.status_code = 500  
@@ -245,7 +298,7 @@ class TestReporter(TestCase):
 
 	@patch('logging.Logger.error')
 	@patch('logging.Logger.info')
-	@patch('requests.get')
+	@patch('requests.Session.get')
 	@patch('src.content_provider.content_provider.ContentProvider.name', return_value="test_content_provider")
 	def test_report_logs_content_provider_start_fail_and_finish(self,mock_name, mock_get, mock_info, mock_error):
 		logger = self.create_logger('test_logger')
@@ -348,6 +401,580 @@ class TestReporter(TestCase):
 
 		result2 = reporter.report()  
 		self.assertEqual(result2, [])
+	@patch('src.content_provider.content_provider.ContentProvider.get_content', return_value=[{"test_content":"content1"}, {"test_content":"content2"}, {"test_content":"content3"}])
+	@patch('src.content_provider.content_provider.ContentProvider.name', return_value="test_content_provider")
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_report_checks_existing_ids_in_one_batch(self, mock_time, mock_name, mock_get_content):
+		logger = self.create_logger("test_logger")
+		content_provider = ContentProvider()
+
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			return {"post": inputs.pop("test_content") + " test"}
+
+		llm_chain = FakeChain(
+			expected_inputs=["test_content"],
+			expected_outputs=["post"],
+			inputs_to_outputs=inputs_to_outputs,
+		)
+
+		data_storage = DataStorage("data/")
+		data_storage.save_reports(content_provider.name(), [{'id': self.create_id({"test_content":"content2"}), 'timestamp': 1000}])
+		reporter = Reporter([content_provider], llm_chain, logger, data_storage)
+
+		with patch.object(data_storage, 'exists_many', wraps=data_storage.exists_many) as mock_exists_many, patch.object(data_storage, 'exists') as mock_exists:
+			result = reporter.report()
+
+		mock_exists_many.assert_called_once()
+		mock_exists.assert_not_called()
+		self.assertEqual([report['report']['post'] for report in result], ['content1 test', 'content3 test'])
+	@patch('src.content_provider.content_provider.ContentProvider.get_content', return_value=[{"test_content":"content"}])
+	@patch('src.content_provider.content_provider.ContentProvider.name', return_value="test_content_provider")
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_report_flushes_data_storage(self, mock_time, mock_name, mock_get_content):
+		logger = self.create_logger("test_logger")
+		llm_chain = FakeChain(output= {"post": "This is a test post"}, expected_inputs=["test_content"])
+
+		data_storage = DataStorage("data/", backend_options={"write_behind": True})
+		reporter = Reporter(self.get_one_content_provider_in_a_list(), llm_chain, logger, data_storage)
+		reporter.report()
+
+		db = TinyDBBackend("data/test_content_provider.json")
+		self.assertEqual([item['report']['post'] for item in db.get()], ["This is a test post"])
+	def post_chain(self):
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			return {"post": inputs.pop("test_content") + " test"}
+
+		return FakeChain(
+			expected_inputs=["test_content"],
+			expected_outputs=["post"],
+			inputs_to_outputs=inputs_to_outputs,
+		)
+
+	def test_invalid_max_workers(self):
+		logger = self.create_logger("test_logger")
+		with self.assertRaises(ValueError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), max_workers=0)
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_concurrent_report_keeps_provider_order(self, mock_time):
+		logger = self.create_logger("test_logger")
+		content_providers = [
+			SlowContentProvider("provider1", [{"test_content": "content1"}], delay=0.3),
+			SlowContentProvider("provider2", [{"test_content": "content2"}], delay=0.3),
+			SlowContentProvider("provider3", [{"test_content": "content3"}], delay=0.3)
+		]
+		data_storage = DataStorage("data/")
+		reporter = Reporter(content_providers, self.post_chain(), logger, data_storage, max_workers=3)
+
+		start = time.monotonic()
+		result = reporter.report()
+		elapsed = time.monotonic() - start
+
+		self.assertLess(elapsed, 0.6)
+		self.assertEqual([report['report']['post'] for report in result], ['content1 test', 'content2 test', 'content3 test'])
+		self.assertEqual([report['report']['content_provider'] for report in result], ['provider1', 'provider2', 'provider3'])
+		self.assertTrue(data_storage.exists("provider2", self.create_id({"test_content": "content2"})))
+
+	@patch('logging.Logger.error')
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_failing_provider_does_not_stop_the_others(self, mock_time, mock_error):
+		logger = self.create_logger("test_logger")
+		content_providers = [
+			SlowContentProvider("provider1", [], error=RuntimeError("parser broke")),
+			SlowContentProvider("provider2", [{"test_content": "content2"}])
+		]
+		for max_workers in [1, 2]:
+			data_storage = DataStorage("data/")
+			reporter = Reporter(content_providers, self.post_chain(), logger, data_storage, max_workers=max_workers)
+			result = reporter.report()
+			self.assertEqual([report['report']['post'] for report in result], ['content2 test'])
+			mock_error.assert_called_with("Error reporting from provider1: parser broke")
+			for file in glob.glob('data/*'):
+				os.remove(file)
+	def test_invalid_generation_options(self):
+		logger = self.create_logger("test_logger")
+		with self.assertRaises(ValueError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), max_concurrent_generations=0)
+		with self.assertRaises(TypeError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), rate_limiter="60 rpm")
+		with self.assertRaises(ValueError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), batch_size=0)
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_concurrent_generation_is_bounded(self, mock_time):
+		logger = self.create_logger("test_logger")
+		lock = threading.Lock()
+		running = {"now": 0, "max": 0}
+
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			with lock:
+				running["now"] += 1
+				running["max"] = max(running["max"], running["now"])
+			time.sleep(0.1)
+			with lock:
+				running["now"] -= 1
+			return {"post": inputs.pop("test_content") + " test"}
+
+		llm_chain = FakeChain(expected_inputs=["test_content"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		contents = [{"test_content": f"content{i}"} for i in range(8)]
+		content_providers = [SlowContentProvider("provider1", contents[:4]), SlowContentProvider("provider2", contents[4:])]
+		reporter = Reporter(content_providers, llm_chain, logger, DataStorage("data/"), max_workers=2, max_concurrent_generations=3)
+
+		result = reporter.report()
+
+		self.assertEqual(running["max"], 3)
+		self.assertEqual([report['report']['post'] for report in result], [f"content{i} test" for i in range(8)])
+		self.assertEqual([report['id'] for report in result], [self.create_id(content) for content in contents])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_generation_goes_through_the_rate_limiter(self, mock_time):
+		logger = self.create_logger("test_logger")
+		rate_limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+		contents = [{"test_content": "content1"}, {"test_content": "content2"}]
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, DataStorage("data/"), max_concurrent_generations=2, rate_limiter=rate_limiter)
+
+		with patch.object(rate_limiter, 'aacquire', wraps=rate_limiter.aacquire) as mock_acquire:
+			result = reporter.report()
+
+		self.assertEqual(len(result), 2)
+		self.assertCountEqual(mock_acquire.call_args_list, [call(RateLimiter.estimate_tokens(json.dumps(content))) for content in contents])
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_areport(self, mock_time):
+		logger = self.create_logger("test_logger")
+		content_providers = [SlowContentProvider("provider1", [{"test_content": "content1"}]), SlowContentProvider("provider2", [{"test_content": "content2"}])]
+		data_storage = DataStorage("data/")
+		reporter = Reporter(content_providers, self.post_chain(), logger, data_storage, max_workers=2)
+
+		async def run():
+			return await reporter.areport(), await reporter.areport()
+
+		result, result2 = asyncio.run(run())
+
+		self.assertEqual([report['report']['post'] for report in result], ['content1 test', 'content2 test'])
+		self.assertEqual(result2, [])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_areport_uses_the_async_chain_api(self, mock_time):
+		logger = self.create_logger("test_logger")
+		llm_chain = self.post_chain()
+		reporter = Reporter([SlowContentProvider("provider1", [{"test_content": "content1"}])], llm_chain, logger, DataStorage("data/"))
+
+		with patch.object(FakeChain, 'arun', autospec=True, side_effect=FakeChain.arun) as mock_arun, patch.object(FakeChain, 'run', autospec=True) as mock_run:
+			result = reporter.report()
+
+		mock_arun.assert_called_once()
+		mock_run.assert_not_called()
+		self.assertEqual(result[0]['report']['post'], 'content1 test')
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_chain_without_async_support_runs_in_a_thread(self, mock_time):
+		logger = self.create_logger("test_logger")
+		llm_chain = self.post_chain()
+		reporter = Reporter([SlowContentProvider("provider1", [{"test_content": "content1"}, {"test_content": "content2"}])], llm_chain, logger, DataStorage("data/"))
+
+		with patch.object(FakeChain, '_acall', autospec=True, side_effect=NotImplementedError) as mock_acall:
+			result = reporter.report()
+
+		mock_acall.assert_called_once()
+		self.assertEqual([report['report']['post'] for report in result], ['content1 test', 'content2 test'])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_cached_posts_are_not_generated_again(self, mock_time):
+		logger = self.create_logger("test_logger")
+		self.addCleanup(shutil.rmtree, "test_llm_cache", True)
+		llm_cache = LLMCache("test_llm_cache")
+		contents = [{"test_content": "content1"}, {"test_content": "content2"}]
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, DataStorage("data/"), llm_cache=llm_cache)
+		self.assertEqual(len(reporter.report()), 2)
+
+		# A crash before save_reports leaves the storage empty but the cache warm.
+		for file in glob.glob('data/*'):
+			os.remove(file)
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, DataStorage("data/"), llm_cache=llm_cache)
+		with patch.object(FakeChain, '_call', autospec=True) as mock_call, patch.object(FakeChain, '_acall', autospec=True) as mock_acall:
+			result = reporter.report()
+
+		mock_call.assert_not_called()
+		mock_acall.assert_not_called()
+		self.assertEqual([report['report']['post'] for report in result], ['content1 test', 'content2 test'])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_batch_mode_uses_chain_apply(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": f"content{i}"} for i in range(5)]
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, DataStorage("data/"), batch_size=2)
+
+		with patch.object(FakeChain, 'apply', autospec=True, side_effect=Chain.apply) as mock_apply, patch.object(FakeChain, 'run', autospec=True) as mock_run:
+			result = reporter.report()
+
+		self.assertEqual([len(args[1]) for args, _ in mock_apply.call_args_list], [2, 2, 1])
+		mock_run.assert_not_called()
+		self.assertEqual([report['report']['post'] for report in result], [f"content{i} test" for i in range(5)])
+		self.assertEqual([report['id'] for report in result], [self.create_id(content) for content in contents])
+
+	@patch('logging.Logger.warning')
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_batch_mode_falls_back_to_single_calls(self, mock_time, mock_warning):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": "content1"}, {"test_content": "content2"}]
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, DataStorage("data/"), batch_size=2)
+
+		with patch.object(FakeChain, 'apply', autospec=True, return_value=[{"post": "only one"}]):
+			result = reporter.report()
+
+		mock_warning.assert_called_once()
+		self.assertEqual([report['report']['post'] for report in result], ['content1 test', 'content2 test'])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_iter_reports_saves_each_report_before_yielding_it(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": "content1"}, {"test_content": "content2"}]
+		data_storage = DataStorage("data/")
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, data_storage)
+
+		posts = []
+		for report in reporter.iter_reports():
+			self.assertTrue(data_storage.exists("provider1", report['id']))
+			posts.append(report['report']['post'])
+
+		self.assertEqual(posts, ['content1 test', 'content2 test'])
+		self.assertEqual(list(reporter.iter_reports()), [])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_iter_reports_can_stop_early(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": f"content{i}"} for i in range(4)]
+		data_storage = DataStorage("data/")
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, data_storage)
+
+		reports = reporter.iter_reports(save_batch_size=2)
+		first = next(reports)
+		reports.close()
+
+		self.assertEqual(first['report']['post'], 'content0 test')
+		self.assertTrue(data_storage.exists("provider1", self.create_id(contents[1])))
+		with self.assertRaises(ValueError):
+			next(reporter.iter_reports(save_batch_size=0))
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_interrupted_run_resumes_from_the_journal(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": "content1"}, {"test_content": "content2"}]
+		journal = RunJournal("data/journal.jsonl")
+		journal.record_contents("provider1", contents)
+		journal.record_post("provider1", self.create_id(contents[0]), "content1 journaled")
+		journal.record_done("provider2")
+		content_providers = [SlowContentProvider("provider1", [], error=requests.exceptions.HTTPError("down")), SlowContentProvider("provider2", [], error=requests.exceptions.HTTPError("down"))]
+		data_storage = DataStorage("data/")
+		reporter = Reporter(content_providers, self.post_chain(), logger, data_storage, run_journal=journal)
+
+		with patch.object(FakeChain, 'arun', autospec=True, side_effect=FakeChain.arun) as mock_arun:
+			result = reporter.report()
+
+		self.assertEqual(mock_arun.call_count, 1)
+		self.assertEqual([report['report']['post'] for report in result], ['content1 journaled', 'content2 test'])
+		self.assertTrue(data_storage.exists("provider1", self.create_id(contents[1])))
+		self.assertIsNone(journal.get_contents("provider1"))
+		self.assertFalse(journal.is_done("provider2"))
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_journal_records_the_run_until_it_finishes(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": "content1"}]
+		journal = RunJournal("data/journal.jsonl")
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, DataStorage("data/"), run_journal=journal)
+
+		with patch.object(RunJournal, 'clear'):
+			reporter.report()
+
+		self.assertEqual(journal.get_contents("provider1"), contents)
+		self.assertEqual(journal.get_posts("provider1"), {self.create_id(contents[0]): "content1 test"})
+		self.assertTrue(journal.is_done("provider1"))
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_journal_is_kept_when_a_provider_fails(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": f"content{i}"} for i in range(4)]
+		journal = RunJournal("data/journal.jsonl")
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			if inputs["test_content"] == "content3":
+				raise RuntimeError("LLM down")
+			return {"post": inputs.pop("test_content") + " test"}
+		llm_chain = FakeChain(expected_inputs=["test_content"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		reporter = Reporter([SlowContentProvider("provider1", contents)], llm_chain, logger, DataStorage("data/"), run_journal=journal)
+
+		self.assertEqual(reporter.report(), [])
+
+		self.assertEqual(journal.get_contents("provider1"), contents)
+		self.assertEqual(len(journal.get_posts("provider1")), 3)
+		self.assertEqual(len(RunJournal("data/journal.jsonl").get_posts("provider1")), 3)
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_failing_provider_does_not_hold_back_the_others(self, mock_time):
+		logger = self.create_logger("test_logger")
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			if inputs["test_content"].startswith("b"):
+				raise RuntimeError("LLM refuses provider b")
+			return {"post": inputs.pop("test_content")}
+		llm_chain = FakeChain(expected_inputs=["test_content"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		journal = RunJournal("data/journal.jsonl")
+		data_storage = DataStorage("data/")
+
+		for day in range(3):
+			content_providers = [SlowContentProvider("a", [{"test_content": f"a-day{day}"}]), SlowContentProvider("b", [{"test_content": f"b-day{day}"}])]
+			reporter = Reporter(content_providers, llm_chain, logger, data_storage, run_journal=journal)
+
+			self.assertEqual([report['report']['post'] for report in reporter.report()], [f'a-day{day}'])
+			self.assertFalse(journal.is_done("a"))
+			# b keeps resuming the listing it got on the first day.
+			self.assertEqual(journal.get_contents("b"), [{"test_content": "b-day0"}])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_paper_covered_by_another_provider_is_skipped(self, mock_time):
+		logger = self.create_logger("test_logger")
+		paper = {"title": "Paper 1", "arxiv_url": "https://arxiv.org/abs/2301.12345"}
+		same_paper = {"title": "Paper 1 ", "arxiv_url": "https://arxiv.org/abs/2301.12345v2", "stars": 3}
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			return {"post": json.loads(inputs.pop("paper"))["title"] + " post"}
+		llm_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		content_providers = [SlowContentProvider("provider1", [{"paper": json.dumps(paper)}]), SlowContentProvider("provider2", [{"paper": json.dumps(same_paper)}, {"paper": json.dumps({"title": "Paper 2"})}])]
+		reporter = Reporter(content_providers, llm_chain, logger, DataStorage("data/"), identity_index=IdentityIndex("data/identities.tsv"))
+
+		result = reporter.report()
+
+		self.assertEqual([report['report']['post'] for report in result], ['Paper 1 post', 'Paper 2 post'])
+		self.assertEqual([report['report']['content_provider'] for report in result], ['provider1', 'provider2'])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_paper_whose_post_failed_is_posted_on_the_next_run(self, mock_time):
+		logger = self.create_logger("test_logger")
+		paper = {"title": "Paper 1", "arxiv_url": "https://arxiv.org/abs/2301.12345", "stars": 10}
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			raise RuntimeError("LLM down")
+		failing_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		reporter = Reporter([SlowContentProvider("provider1", [{"paper": json.dumps(paper)}])], failing_chain, logger, DataStorage("data/"), identity_index=IdentityIndex("data/identities.tsv"))
+		self.assertEqual(reporter.report(), [])
+
+		llm_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=lambda inputs: {"post": json.loads(inputs.pop("paper"))["title"] + " post"})
+		reporter = Reporter([SlowContentProvider("provider1", [{"paper": json.dumps(dict(paper, stars=11))}])], llm_chain, logger, DataStorage("data/"), identity_index=IdentityIndex("data/identities.tsv"))
+		result = reporter.report()
+
+		self.assertEqual([report['report']['post'] for report in result], ['Paper 1 post'])
+		self.assertEqual(IdentityIndex("data/identities.tsv").find(["arxiv:2301.12345"]), ("provider1", result[0]['id']))
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_near_duplicate_is_not_generated_again(self, mock_time):
+		logger = self.create_logger("test_logger")
+		abstract = "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks."
+		paper = {"title": "Paper 1", "abstract": abstract, "stars": 10}
+		contents = [{"paper": json.dumps(paper)}, {"paper": json.dumps(dict(paper, stars=11, abstract=abstract + " "))}]
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			return {"post": json.loads(inputs.pop("paper"))["title"] + " post"}
+		llm_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		reporter = Reporter([SlowContentProvider("provider1", contents)], llm_chain, logger, DataStorage("data/"), near_duplicate_index=NearDuplicateIndex("data/near_duplicates"))
+
+		result = reporter.report()
+
+		self.assertEqual([report['id'] for report in result], [self.create_id(contents[0])])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_near_duplicate_of_a_failed_post_is_posted_on_the_next_run(self, mock_time):
+		logger = self.create_logger("test_logger")
+		paper = {"title": "Paper 1", "abstract": "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks.", "stars": 10}
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			raise RuntimeError("LLM down")
+		failing_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		reporter = Reporter([SlowContentProvider("provider1", [{"paper": json.dumps(paper)}])], failing_chain, logger, DataStorage("data/"), near_duplicate_index=NearDuplicateIndex("data/near_duplicates"))
+		self.assertEqual(reporter.report(), [])
+
+		llm_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=lambda inputs: {"post": json.loads(inputs.pop("paper"))["title"] + " post"})
+		reporter = Reporter([SlowContentProvider("provider1", [{"paper": json.dumps(dict(paper, stars=11))}])], llm_chain, logger, DataStorage("data/"), near_duplicate_index=NearDuplicateIndex("data/near_duplicates"))
+		result = reporter.report()
+
+		self.assertEqual([report['report']['post'] for report in result], ['Paper 1 post'])
+		self.assertEqual(len(NearDuplicateIndex("data/near_duplicates")), 1)
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_report_records_metrics(self, mock_time):
+		logger = self.create_logger("test_logger")
+		metrics.configure(enabled=True, path="data/metrics.prom")
+		self.addCleanup(metrics.reset)
+		self.addCleanup(metrics.configure, False)
+		data_storage = DataStorage("data/")
+		data_storage.save_reports("provider1", [{"id": self.create_id({"test_content": "content1"}), "timestamp": 1000}])
+		contents = [{"test_content": "content1"}, {"test_content": "content2"}, {"test_content": "content3"}]
+		reporter = Reporter([SlowContentProvider("provider1", contents), SlowContentProvider("provider2", [], error=requests.exceptions.HTTPError("down"))], self.post_chain(), logger, data_storage)
+
+		reporter.report()
+
+		snapshot = metrics.snapshot()
+		self.assertEqual(snapshot["counters"]['reporter_items_fetched_total{provider="provider1"}'], 3)
+		self.assertEqual(snapshot["counters"]['reporter_items_deduped_total{provider="provider1",reason="stored"}'], 1)
+		self.assertEqual(snapshot["counters"]["reporter_posts_generated_total"], 2)
+		self.assertEqual(snapshot["counters"]['reporter_reports_saved_total{provider="provider1"}'], 2)
+		self.assertEqual(snapshot["counters"]['reporter_errors_total{provider="provider2",stage="fetch"}'], 1)
+		self.assertEqual(snapshot["histograms"]['reporter_stage_seconds{stage="generate"}']["count"], 2)
+		self.assertEqual(snapshot["histograms"]['storage_operation_seconds{operation="save_reports"}']["count"], 2)
+		self.assertIn('tinydb_operation_seconds{operation="insert_many"}', snapshot["histograms"])
+		with open("data/metrics.prom") as file:
+			self.assertIn("# TYPE reporter_stage_seconds histogram", file.read())
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_stored_papers_are_not_fetched_again(self, mock_time):
+		logger = self.create_logger("test_logger")
+		listing = '<div class="infinite-container">' + "".join(f'''
+			<div class="row infinite-item item paper-card">
+				<h1><a href="/paper/example-paper-{index}">Example Paper {index}</a></h1>
+				<p class="item-strip-abstract">This is an example abstract.</p>
+				<div class="item-image" style="background-image: url('https://example.com/image.jpg')"></div>
+				<div class="entity-stars"><span class="badge">{index} stars</span></div>
+				<div class="item-github-link"><a href="https://github.com/example">Github Link</a></div>
+			</div>''' for index in range(2)) + '</div>'
+		urls = []
+
+		def get(url, **kwargs):
+			urls.append(url)
+			response = requests.Response()
+			response.status_code = 200
+			response._content = ('<div class="paper-abstract"><p>Abstract.</p><a class="badge badge-light" href="https://arxiv.org/abs/1">arXiv</a></div>' if "/paper/" in url else listing).encode()
+			return response
+
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			return {"post": json.loads(inputs.pop("paper"))["title"] + " post"}
+		llm_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		data_storage = DataStorage("data/")
+
+		with patch('requests.Session.get', side_effect=get):
+			self.assertEqual(len(Reporter([PapersWithCodeContentProvider()], llm_chain, logger, data_storage).report()), 2)
+			self.assertEqual(len(urls), 3)
+			urls.clear()
+			self.assertEqual(Reporter([PapersWithCodeContentProvider()], llm_chain, logger, DataStorage("data/")).report(), [])
+
+		self.assertEqual(urls, ["https://paperswithcode.com/"])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_papers_with_a_failed_detail_page_are_fetched_again(self, mock_time):
+		logger = self.create_logger("test_logger")
+		listing = '<div class="infinite-container">' + "".join(f'''
+			<div class="row infinite-item item paper-card">
+				<h1><a href="/paper/example-paper-{index}">Example Paper {index}</a></h1>
+				<p class="item-strip-abstract">This is an example abstract.</p>
+				<div class="item-image" style="background-image: url('https://example.com/image.jpg')"></div>
+				<div class="entity-stars"><span class="badge">{index} stars</span></div>
+				<div class="item-github-link"><a href="https://github.com/example">Github Link</a></div>
+			</div>''' for index in range(2)) + '</div>'
+		urls = []
+		failing = {"https://paperswithcode.com/paper/example-paper-1"}
+
+		def get(url, **kwargs):
+			urls.append(url)
+			response = requests.Response()
+			response.status_code = 500 if url in failing else 200
+			response._content = ('<div class="paper-abstract"><p>Abstract.</p><a class="badge badge-light" href="https://arxiv.org/abs/1">arXiv</a></div>' if "/paper/" in url else listing).encode()
+			return response
+
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			return {"post": json.loads(inputs.pop("paper"))["title"] + " post"}
+		llm_chain = FakeChain(expected_inputs=["paper"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+
+		with patch('requests.Session.get', side_effect=get):
+			Reporter([PapersWithCodeContentProvider()], llm_chain, logger, DataStorage("data/")).report()
+			urls.clear()
+			failing.clear()
+			Reporter([PapersWithCodeContentProvider()], llm_chain, logger, DataStorage("data/")).report()
+
+		self.assertEqual(urls, ["https://paperswithcode.com/", "https://paperswithcode.com/paper/example-paper-1"])
+
+	def test_invalid_llm_cache(self):
+		logger = self.create_logger("test_logger")
+		with self.assertRaises(TypeError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), llm_cache="cache/")
+		with self.assertRaises(TypeError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), run_journal="journal.jsonl")
+
+	def test_invalid_streaming_options(self):
+		logger = self.create_logger("test_logger")
+		with self.assertRaises(ValueError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), stream_chunk_size=0)
+		with self.assertRaises(ValueError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), stream_chunk_size=2, stop_after_known=0)
+		with self.assertRaises(ValueError):
+			Reporter(self.get_one_content_provider_in_a_list(), FakeChain(), logger, DataStorage("data/"), stop_after_known=2)
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_streamed_report_matches_the_whole_listing(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": f"content{i}"} for i in range(5)]
+		data_storage = DataStorage("data/")
+		data_storage.save_reports("provider1", [{'id': self.create_id(contents[1]), 'timestamp': 1000}])
+		reporter = Reporter([SlowContentProvider("provider1", contents)], self.post_chain(), logger, data_storage, stream_chunk_size=2)
+
+		with patch.object(data_storage, 'exists_many', wraps=data_storage.exists_many) as mock_exists_many:
+			result = reporter.report()
+
+		self.assertEqual(mock_exists_many.call_count, 3)
+		self.assertEqual([report['report']['post'] for report in result], ['content0 test', 'content2 test', 'content3 test', 'content4 test'])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_streaming_generates_before_the_listing_ends(self, mock_time):
+		logger = self.create_logger("test_logger")
+		events = []
+		def inputs_to_outputs(inputs: Dict[str, str]) -> Dict[str, str]:
+			events.append(f'generate {inputs["test_content"]}')
+			return {"post": inputs.pop("test_content") + " test"}
+		llm_chain = FakeChain(expected_inputs=["test_content"], expected_outputs=["post"], inputs_to_outputs=inputs_to_outputs)
+		contents = [{"test_content": f"content{i}"} for i in range(5)]
+		reporter = Reporter([PagedContentProvider("provider1", contents, events)], llm_chain, logger, DataStorage("data/"), stream_chunk_size=1)
+
+		posts = [report['report']['post'] for report in reporter.iter_reports()]
+
+		self.assertEqual(posts, [f'content{i} test' for i in range(5)])
+		self.assertLess(events.index('generate content0'), events.index('list content4'))
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_streaming_stops_after_known_contents(self, mock_time):
+		logger = self.create_logger("test_logger")
+		events = []
+		contents = [{"test_content": f"content{i}"} for i in range(7)]
+		data_storage = DataStorage("data/")
+		Reporter([PagedContentProvider("provider1", contents[3:], events)], self.post_chain(), logger, data_storage, stream_chunk_size=2).report()
+		events.clear()
+
+		reporter = Reporter([PagedContentProvider("provider1", contents, events)], self.post_chain(), logger, data_storage, stream_chunk_size=2, stop_after_known=2)
+		result = reporter.report()
+
+		self.assertEqual([report['report']['post'] for report in result], ['content0 test', 'content1 test', 'content2 test'])
+		self.assertEqual(events, ['list content0', 'list content1', 'list content2', 'list content3'])
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_streaming_keeps_reports_listed_before_an_error(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": f"content{i}"} for i in range(3)]
+		data_storage = DataStorage("data/")
+		reporter = Reporter([PagedContentProvider("provider1", contents, [], error=requests.exceptions.HTTPError("page 2 down"))], self.post_chain(), logger, data_storage, stream_chunk_size=2)
+
+		result = reporter.report()
+
+		self.assertEqual([report['report']['post'] for report in result], ['content0 test', 'content1 test', 'content2 test'])
+		self.assertTrue(data_storage.exists("provider1", self.create_id(contents[2])))
+
+	@patch('src.reporter.Reporter.get_timestamp', return_value=1000)
+	def test_streaming_keeps_reports_listed_before_any_listing_error(self, mock_time):
+		logger = self.create_logger("test_logger")
+		contents = [{"test_content": f"content{i}"} for i in range(4)]
+		data_storage = DataStorage("data/")
+		content_providers = [PagedContentProvider("provider1", contents, [], error=ValueError("Paper page without an abstract or an arXiv link")), PagedContentProvider("provider2", contents, [], error=requests.exceptions.ConnectionError("reset"))]
+		reporter = Reporter(content_providers, self.post_chain(), logger, data_storage, stream_chunk_size=2)
+
+		self.assertEqual(len(reporter.report()), 8)
+
+		for content_provider in content_providers:
+			self.assertEqual(data_storage.exists_many(content_provider.name(), [self.create_id(content) for content in contents]), {self.create_id(content) for content in contents})
+
+		reporter = Reporter([PagedContentProvider("provider1", [], [], error=ValueError("no listing"))], self.post_chain(), logger, data_storage, stream_chunk_size=2)
+		with patch.object(logger, 'error') as mock_error:
+			self.assertEqual(reporter.report(), [])
+		mock_error.assert_called_once_with('Error reporting from provider1: no listing')
 
 if __name__ == '__main__':
     unittest.main()
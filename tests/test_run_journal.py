@@ -0,0 +1,77 @@
+from src.run_journal import RunJournal
+from unittest import TestCase
+import os
+class TestRunJournal(TestCase):
+	def setUp(self):
+		self.path = "test_run_journal.jsonl"
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+	def test_records_are_replayed_on_open(self):
+		journal = RunJournal(self.path)
+		journal.record_contents("provider1", [{"test_content": "content1"}])
+		journal.record_post("provider1", "id1", "post1")
+		journal.record_done("provider2")
+		journal.close()
+
+		journal = RunJournal(self.path)
+		self.assertEqual(journal.get_contents("provider1"), [{"test_content": "content1"}])
+		self.assertIsNone(journal.get_contents("provider2"))
+		self.assertEqual(journal.get_posts("provider1"), {"id1": "post1"})
+		self.assertEqual(journal.get_posts("provider2"), {})
+		self.assertTrue(journal.is_done("provider2"))
+		self.assertFalse(journal.is_done("provider1"))
+		journal.close()
+
+	def test_torn_last_record_is_dropped(self):
+		journal = RunJournal(self.path)
+		journal.record_post("provider1", "id1", "post1")
+		journal.close()
+		with open(self.path, "a") as file:
+			file.write('{"type": "post", "provider": "provider1", "id": "id2"')
+
+		journal = RunJournal(self.path)
+		self.assertEqual(journal.get_posts("provider1"), {"id1": "post1"})
+		journal.record_post("provider1", "id3", "post3")
+		journal.close()
+		self.assertEqual(RunJournal(self.path).get_posts("provider1"), {"id1": "post1", "id3": "post3"})
+
+	def test_last_record_without_newline_is_dropped(self):
+		journal = RunJournal(self.path)
+		journal.record_post("provider1", "id1", "post1")
+		journal.close()
+		with open(self.path, "a") as file:
+			file.write('{"type": "post", "provider": "provider1", "id": "id2", "post": "post2"}')
+
+		journal = RunJournal(self.path)
+		journal.record_post("provider1", "id3", "post3")
+		journal.close()
+		self.assertEqual(RunJournal(self.path).get_posts("provider1"), {"id1": "post1", "id3": "post3"})
+
+	def test_forget(self):
+		journal = RunJournal(self.path)
+		journal.record_contents("provider1", [{"test_content": "content1"}])
+		journal.record_post("provider1", "id1", "post1")
+		journal.record_done("provider1")
+		journal.record_contents("provider2", [{"test_content": "content2"}])
+		journal.record_post("provider2", "id2", "post2")
+		journal.forget(["provider1"])
+		journal.record_post("provider2", "id3", "post3")
+		journal.close()
+
+		for journal in [journal, RunJournal(self.path)]:
+			self.assertIsNone(journal.get_contents("provider1"))
+			self.assertEqual(journal.get_posts("provider1"), {})
+			self.assertFalse(journal.is_done("provider1"))
+			self.assertEqual(journal.get_contents("provider2"), [{"test_content": "content2"}])
+			self.assertEqual(journal.get_posts("provider2"), {"id2": "post2", "id3": "post3"})
+
+	def test_clear(self):
+		journal = RunJournal(self.path)
+		journal.record_done("provider1")
+		journal.clear()
+		self.assertFalse(journal.is_done("provider1"))
+		journal.close()
+		self.assertFalse(RunJournal(self.path).is_done("provider1"))
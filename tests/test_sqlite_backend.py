@@ -0,0 +1,58 @@
+import unittest
+import os
+from src.db_backend_interface import DatabaseBackend
+from src.sqlite_backend import SQLiteBackend
+from tests import test_tiny_db_backend
+
+class TestSQLiteBackend(test_tiny_db_backend.TestTinyDBBackend):
+    """Runs the TinyDBBackend contract against SQLiteBackend."""
+
+    def setUp(self):
+        self.db_path = 'test_db.sqlite3'
+        self.db: DatabaseBackend = SQLiteBackend(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_delete_removes_every_document_with_that_id(self):
+        item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        self.db.insert(item)
+        with self.assertRaises(ValueError):
+            self.db.insert(item)
+        self.db.delete('id1')
+        self.assertEqual(self.db.get(), [])
+
+    def test_signature_changes_on_every_write(self):
+        item1 = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        item2 = {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+        self.db.insert_many([item1, item2])
+        signature = SQLiteBackend.signature(self.db_path)
+        # Same row count and max rowid as before, but a different report.
+        self.db.delete('id2')
+        self.db.insert({'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 3000})
+        self.assertNotEqual(SQLiteBackend.signature(self.db_path), signature)
+        signature = SQLiteBackend.signature(self.db_path)
+        self.db.close()
+        self.db = SQLiteBackend(self.db_path)
+        self.assertEqual(SQLiteBackend.signature(self.db_path), signature)
+        self.assertEqual(SQLiteBackend.signature('missing.sqlite3'), [])
+
+    def test_wal_mode_and_indexes(self):
+        self.assertEqual(self.db.conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        indexes = {row[1]: row[2] for row in self.db.conn.execute("PRAGMA index_list(reports)")}
+        self.assertEqual(indexes, {'reports_id': 1, 'reports_timestamp': 0})
+
+    def test_readers_see_committed_inserts(self):
+        item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        reader = SQLiteBackend(self.db_path)
+        self.assertFalse(reader.exists('id1'))
+        self.db.insert(item)
+        self.assertTrue(reader.exists('id1'))
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
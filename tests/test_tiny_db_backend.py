@@ -1,7 +1,10 @@
 import unittest
+import gc
 import os
+import json
+from unittest import mock
 from src.db_backend_interface import DatabaseBackend
-from src.tiny_db_backend import TinyDBBackend
+from src.tiny_db_backend import TinyDBBackend, _flush_write_behind_backends
 
 class TestTinyDBBackend(unittest.TestCase):
     def setUp(self):
@@ -75,6 +78,34 @@ class TestTinyDBBackend(unittest.TestCase):
         self.assertFalse(self.db.exists('id1'))
         self.assertTrue(self.db.exists('id2'))
 
+    def test_delete_removes_every_document_with_that_id(self):
+        item = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        self.db.insert(item)
+        self.db.insert(item)
+        self.db.delete('id1')
+        self.assertFalse(self.db.exists('id1'))
+        self.assertEqual(self.db.get(), [])
+
+    def test_index_is_rebuilt_on_open(self):
+        item1 = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        item2 = {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+        self.db.insert(item1)
+        self.db.insert(item2)
+        reopened = type(self.db)(self.db_path)
+        self.assertTrue(reopened.exists('id1'))
+        self.assertEqual(reopened.get_one('id2'), item2)
+        reopened.delete('id1')
+        self.assertFalse(reopened.exists('id1'))
+        self.assertEqual(reopened.get(), [item2])
+
+    def test_get_one_returns_a_copy(self):
+        item = {'id': 'id1', 'type': 'post', 'content': {'text': 'Content 1'}, 'timestamp': 1000}
+        self.db.insert(item)
+        item['content']['text'] = 'changed after insert'
+        result = self.db.get_one('id1')
+        result['content']['text'] = 'changed after get_one'
+        self.assertEqual(self.db.get_one('id1')['content'], {'text': 'Content 1'})
+
     def test_get_by_date_invalid_timestamp(self):
         with self.assertRaises(ValueError):
             self.db.get_by_date(from_date="invalid_timestamp")
@@ -109,12 +140,73 @@ class TestTinyDBBackend(unittest.TestCase):
         self.assertFalse(self.db.exists('id2'))
         self.assertTrue(self.db.exists('id1'))
 
+    def test_get_by_date_returns_items_in_timestamp_order(self):
+        items = [
+            {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 3000},
+            {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 1000},
+            {'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 2000},
+            {'id': 'id4', 'type': 'post', 'content': 'Content 4', 'timestamp': 2000}
+        ]
+        for item in items:
+            self.db.insert(item)
+        self.assertEqual(self.db.get_by_date(from_date=1500), [items[2], items[3], items[0]])
+        self.assertEqual(self.db.get_by_date(from_date=2000, to_date=2000), [items[2], items[3]])
+        self.assertEqual(self.db.get_by_date(from_date=3500), [])
+
+    def test_delete_by_date_range_keeps_indexes_in_sync(self):
+        items = [
+            {'id': f'id{i}', 'type': 'post', 'content': f'Content {i}', 'timestamp': 1000 * i}
+            for i in range(1, 6)
+        ]
+        for item in items:
+            self.db.insert(item)
+        self.db.delete_by_date(from_date=2000, to_date=4000)
+        self.assertEqual(self.db.get(), [items[0], items[4]])
+        self.assertEqual(self.db.get_by_date(from_date=1000), [items[0], items[4]])
+        self.db.delete('id5')
+        self.assertEqual(self.db.get_by_date(to_date=9000), [items[0]])
+        self.assertEqual(type(self.db)(self.db_path).get_by_date(to_date=9000), [items[0]])
+
     def test_insert_invalid_report(self):
         self.validate_report(self.db.insert)
+
+    def test_insert_many_invalid_report(self):
+        self.validate_report(lambda item: self.db.insert_many([item]))
+
+    def test_upsert_many_invalid_report(self):
+        self.validate_report(lambda item: self.db.upsert_many([item]))
+
+    def test_insert_many(self):
+        items = [
+            {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000},
+            {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+        ]
+        self.db.insert_many(items)
+        self.assertListEqual(self.db.get(), items)
+        self.assertEqual(self.db.get_one('id2'), items[1])
+        self.assertEqual(self.db.get_by_date(from_date=1500), [items[1]])
+
+    def test_upsert_many_skips_existing_ids(self):
+        item1 = {'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000}
+        item2 = {'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000}
+        item2_again = {'id': 'id2', 'type': 'post', 'content': 'Content 2 again', 'timestamp': 3000}
+        self.db.insert(item1)
+        self.db.upsert_many([item1, item2, item2_again])
+        self.assertListEqual(self.db.get(), [item1, item2])
     def test_invalid_id_get_one(self):
         with self.assertRaises(ValueError):
             self.db.get_one(123)
 
+    def test_exists_many(self):
+        self.db.insert({'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000})
+        self.db.insert({'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000})
+        self.assertEqual(self.db.exists_many(['id1', 'id3', 'id2', 'id1']), {'id1', 'id2'})
+        self.assertEqual(self.db.exists_many([]), set())
+
+    def test_invalid_id_exists_many(self):
+        with self.assertRaises(ValueError):
+            self.db.exists_many(['id1', 123])
+
     def test_invalid_id_exists(self):
         with self.assertRaises(ValueError):
             self.db.exists(123)
@@ -124,5 +216,85 @@ class TestTinyDBBackend(unittest.TestCase):
             self.db.delete(123)
 
 
+class TestTinyDBBackendWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.db_path = 'test_db.json'
+
+    def tearDown(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def stored_ids(self):
+        if not os.path.exists(self.db_path):
+            return []
+        with open(self.db_path) as file:
+            return [item['id'] for item in json.load(file).get('_default', {}).values()]
+
+    def test_writes_are_buffered_until_flush(self):
+        db = TinyDBBackend(self.db_path, write_behind=True)
+        db.insert({'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000})
+        self.assertTrue(db.exists('id1'))
+        self.assertEqual(self.stored_ids(), [])
+        db.flush()
+        self.assertEqual(self.stored_ids(), ['id1'])
+        self.assertFalse(os.path.exists(self.db_path + '.tmp'))
+        db.close()
+
+    def test_flush_every(self):
+        db = TinyDBBackend(self.db_path, write_behind=True, flush_every=2)
+        db.insert({'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000})
+        self.assertEqual(self.stored_ids(), [])
+        db.insert({'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000})
+        self.assertEqual(self.stored_ids(), ['id1', 'id2'])
+        db.close()
+
+    @mock.patch('src.tiny_db_backend.time.monotonic')
+    def test_flush_interval(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        db = TinyDBBackend(self.db_path, write_behind=True, flush_interval=30)
+        db.insert({'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000})
+        self.assertEqual(self.stored_ids(), [])
+        mock_monotonic.return_value = 131
+        db.insert({'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000})
+        self.assertEqual(self.stored_ids(), ['id1', 'id2'])
+        mock_monotonic.return_value = 140
+        db.insert({'id': 'id3', 'type': 'post', 'content': 'Content 3', 'timestamp': 3000})
+        self.assertEqual(self.stored_ids(), ['id1', 'id2'])
+        mock_monotonic.return_value = 200
+        db.delete('id1')
+        self.assertEqual(self.stored_ids(), ['id2', 'id3'])
+        mock_monotonic.return_value = 210
+        db.delete_by_date(from_date=2500)
+        self.assertEqual(self.stored_ids(), ['id2', 'id3'])
+        mock_monotonic.return_value = 300
+        db.insert_many([{'id': 'id4', 'type': 'post', 'content': 'Content 4', 'timestamp': 4000}])
+        self.assertEqual(self.stored_ids(), ['id2', 'id4'])
+        db.close()
+
+    def test_close_and_exit_flush(self):
+        db = TinyDBBackend(self.db_path, write_behind=True)
+        db.insert({'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000})
+        _flush_write_behind_backends()
+        self.assertEqual(self.stored_ids(), ['id1'])
+        db.insert({'id': 'id2', 'type': 'post', 'content': 'Content 2', 'timestamp': 2000})
+        db.close()
+        self.assertEqual(self.stored_ids(), ['id1', 'id2'])
+        self.assertEqual(TinyDBBackend(self.db_path, write_behind=True).get_one('id2')['content'], 'Content 2')
+
+    def test_exit_flush_keeps_unclosed_backends(self):
+        db = TinyDBBackend(self.db_path, write_behind=True)
+        db.insert({'id': 'id1', 'type': 'post', 'content': 'Content 1', 'timestamp': 1000})
+        del db
+        gc.collect()
+        _flush_write_behind_backends()
+        self.assertEqual(self.stored_ids(), ['id1'])
+
+    def test_invalid_flush_options(self):
+        with self.assertRaises(ValueError):
+            TinyDBBackend(self.db_path, write_behind=True, flush_every=0)
+        with self.assertRaises(ValueError):
+            TinyDBBackend(self.db_path, write_behind=True, flush_interval=0)
+
+
 if __name__ == '__main__':
     unittest.main()